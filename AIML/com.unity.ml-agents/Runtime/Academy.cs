@@ -113,6 +113,8 @@ namespace Unity.MLAgents
 
         const string k_PortCommandLineFlag = "--mlagents-port";
 
+        const string k_SocketCommandLineFlag = "--mlagents-socket";
+
         // Lazy initializer pattern, see https://csharpindepth.com/articles/singleton#lazy
         static Lazy<Academy> s_Lazy = new Lazy<Academy>(() => new Academy());
 
@@ -391,6 +393,20 @@ namespace Unity.MLAgents
             }
         }
 
+        // Used to read the Unix domain socket path provided by Python, instead of a port.
+        static string ReadSocketPathFromArgs()
+        {
+            var args = Environment.GetCommandLineArgs();
+            for (var i = 0; i < args.Length - 1; i++)
+            {
+                if (args[i] == k_SocketCommandLineFlag)
+                {
+                    return args[i + 1];
+                }
+            }
+            return null;
+        }
+
         EnvironmentParameters m_EnvironmentParameters;
         StatsRecorder m_StatsRecorder;
 
@@ -433,12 +449,14 @@ namespace Unity.MLAgents
 
             // Try to launch the communicator by using the arguments passed at launch
             var port = ReadPortFromArgs();
-            if (port > 0)
+            var socketPath = ReadSocketPathFromArgs();
+            var connectToTrainer = port > 0 || socketPath != null;
+            if (connectToTrainer)
             {
                 Communicator = CommunicatorFactory.Create();
             }
 
-            if (Communicator == null && CommunicatorFactory.Enabled && port > 0)
+            if (Communicator == null && CommunicatorFactory.Enabled && connectToTrainer)
             {
                 Debug.Log("Communicator failed to start!");
             }
@@ -452,6 +470,7 @@ namespace Unity.MLAgents
                 var communicatorInitParams = new CommunicatorInitParameters
                 {
                     port = port,
+                    socketPath = socketPath,
                     unityCommunicationVersion = k_ApiVersion,
                     unityPackageVersion = k_PackageVersion,
                     name = "AcademySingleton",
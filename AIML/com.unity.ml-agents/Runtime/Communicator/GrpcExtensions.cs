@@ -385,7 +385,24 @@ namespace Unity.MLAgents
                 }
             }
 
-            if (compressionType == SensorCompressionType.None)
+            // Only pack the observations if the trainer says it can read them.
+            var trainerCanHandlePacked = Academy.Instance.TrainerCapabilities != null &&
+                Academy.Instance.TrainerCapabilities.PackedFloatObservations && BitConverter.IsLittleEndian;
+            if (compressionType == SensorCompressionType.None && trainerCanHandlePacked)
+            {
+                var floatData = new float[sensor.ObservationSize()];
+                observationWriter.SetTarget(floatData, sensor.GetObservationSpec(), 0);
+                sensor.Write(observationWriter);
+
+                var packedData = new byte[floatData.Length * sizeof(float)];
+                Buffer.BlockCopy(floatData, 0, packedData, 0, packedData.Length);
+                observationProto = new ObservationProto
+                {
+                    PackedFloatData = ByteString.CopyFrom(packedData),
+                    CompressionType = (CompressionTypeProto)SensorCompressionType.None,
+                };
+            }
+            else if (compressionType == SensorCompressionType.None)
             {
                 var numFloats = sensor.ObservationSize();
                 var floatDataProto = new ObservationProto.Types.FloatData();
@@ -472,6 +489,7 @@ namespace Unity.MLAgents
                 TrainingAnalytics = proto.TrainingAnalytics,
                 VariableLengthObservation = proto.VariableLengthObservation,
                 MultiAgentGroups = proto.MultiAgentGroups,
+                PackedFloatObservations = proto.PackedFloatObservations,
             };
         }
 
@@ -486,6 +504,7 @@ namespace Unity.MLAgents
                 TrainingAnalytics = rlCaps.TrainingAnalytics,
                 VariableLengthObservation = rlCaps.VariableLengthObservation,
                 MultiAgentGroups = rlCaps.MultiAgentGroups,
+                PackedFloatObservations = rlCaps.PackedFloatObservations,
             };
         }
 
@@ -12,6 +12,11 @@ namespace Unity.MLAgents
         /// </summary>
         public int port;
 
+        /// <summary>
+        /// Path of the Unix domain socket to connect to instead of the port, if not null.
+        /// </summary>
+        public string socketPath;
+
         /// <summary>
         /// The name of the environment.
         /// </summary>
@@ -120,6 +120,7 @@ namespace Unity.MLAgents
             {
                 initializationInput = Initialize(
                     initParameters.port,
+                    initParameters.socketPath,
                     new UnityOutputProto
                     {
                         RlInitializationOutput = academyParameters
@@ -226,10 +227,11 @@ namespace Unity.MLAgents
             SendCommandEvent(rlInput.Command);
         }
 
-        UnityInputProto Initialize(int port, UnityOutputProto unityOutput, out UnityInputProto unityInput)
+        UnityInputProto Initialize(int port, string socketPath, UnityOutputProto unityOutput, out UnityInputProto unityInput)
         {
             m_IsOpen = true;
-            m_Channel = new Channel($"localhost:{port}", ChannelCredentials.Insecure);
+            var target = socketPath != null ? $"unix:{socketPath}" : $"localhost:{port}";
+            m_Channel = new Channel(target, ChannelCredentials.Insecure);
 
             m_Client = new UnityToExternalProto.UnityToExternalProtoClient(m_Channel);
             var result = m_Client.Exchange(WrapMessage(unityOutput, 200));
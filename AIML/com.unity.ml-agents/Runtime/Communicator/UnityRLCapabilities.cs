@@ -11,6 +11,7 @@ namespace Unity.MLAgents
         public bool TrainingAnalytics;
         public bool VariableLengthObservation;
         public bool MultiAgentGroups;
+        public bool PackedFloatObservations;
 
         /// <summary>
         /// A class holding the capabilities flags for Reinforcement Learning across C# and the Trainer codebase.  This
@@ -23,7 +24,8 @@ namespace Unity.MLAgents
             bool hybridActions = true,
             bool trainingAnalytics = true,
             bool variableLengthObservation = true,
-            bool multiAgentGroups = true)
+            bool multiAgentGroups = true,
+            bool packedFloatObservations = true)
         {
             BaseRLCapabilities = baseRlCapabilities;
             ConcatenatedPngObservations = concatenatedPngObservations;
@@ -32,6 +34,7 @@ namespace Unity.MLAgents
             TrainingAnalytics = trainingAnalytics;
             VariableLengthObservation = variableLengthObservation;
             MultiAgentGroups = multiAgentGroups;
+            PackedFloatObservations = packedFloatObservations;
         }
 
         /// <summary>
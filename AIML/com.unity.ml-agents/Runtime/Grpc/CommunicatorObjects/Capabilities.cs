@@ -25,18 +25,18 @@ namespace Unity.MLAgents.CommunicatorObjects {
       byte[] descriptorData = global::System.Convert.FromBase64String(
           string.Concat(
             "CjVtbGFnZW50c19lbnZzL2NvbW11bmljYXRvcl9vYmplY3RzL2NhcGFiaWxp",
-            "dGllcy5wcm90bxIUY29tbXVuaWNhdG9yX29iamVjdHMi7AEKGFVuaXR5UkxD",
+            "dGllcy5wcm90bxIUY29tbXVuaWNhdG9yX29iamVjdHMijQIKGFVuaXR5UkxD",
             "YXBhYmlsaXRpZXNQcm90bxIaChJiYXNlUkxDYXBhYmlsaXRpZXMYASABKAgS",
             "IwobY29uY2F0ZW5hdGVkUG5nT2JzZXJ2YXRpb25zGAIgASgIEiAKGGNvbXBy",
             "ZXNzZWRDaGFubmVsTWFwcGluZxgDIAEoCBIVCg1oeWJyaWRBY3Rpb25zGAQg",
             "ASgIEhkKEXRyYWluaW5nQW5hbHl0aWNzGAUgASgIEiEKGXZhcmlhYmxlTGVu",
             "Z3RoT2JzZXJ2YXRpb24YBiABKAgSGAoQbXVsdGlBZ2VudEdyb3VwcxgHIAEo",
-            "CEIlqgIiVW5pdHkuTUxBZ2VudHMuQ29tbXVuaWNhdG9yT2JqZWN0c2IGcHJv",
-            "dG8z"));
+            "CBIfChdwYWNrZWRGbG9hdE9ic2VydmF0aW9ucxgIIAEoCEIlqgIiVW5pdHku",
+            "TUxBZ2VudHMuQ29tbXVuaWNhdG9yT2JqZWN0c2IGcHJvdG8z"));
       descriptor = pbr::FileDescriptor.FromGeneratedCode(descriptorData,
           new pbr::FileDescriptor[] { },
           new pbr::GeneratedClrTypeInfo(null, new pbr::GeneratedClrTypeInfo[] {
-            new pbr::GeneratedClrTypeInfo(typeof(global::Unity.MLAgents.CommunicatorObjects.UnityRLCapabilitiesProto), global::Unity.MLAgents.CommunicatorObjects.UnityRLCapabilitiesProto.Parser, new[]{ "BaseRLCapabilities", "ConcatenatedPngObservations", "CompressedChannelMapping", "HybridActions", "TrainingAnalytics", "VariableLengthObservation", "MultiAgentGroups" }, null, null, null)
+            new pbr::GeneratedClrTypeInfo(typeof(global::Unity.MLAgents.CommunicatorObjects.UnityRLCapabilitiesProto), global::Unity.MLAgents.CommunicatorObjects.UnityRLCapabilitiesProto.Parser, new[]{ "BaseRLCapabilities", "ConcatenatedPngObservations", "CompressedChannelMapping", "HybridActions", "TrainingAnalytics", "VariableLengthObservation", "MultiAgentGroups", "PackedFloatObservations" }, null, null, null)
           }));
     }
     #endregion
@@ -80,6 +80,7 @@ namespace Unity.MLAgents.CommunicatorObjects {
       trainingAnalytics_ = other.trainingAnalytics_;
       variableLengthObservation_ = other.variableLengthObservation_;
       multiAgentGroups_ = other.multiAgentGroups_;
+      packedFloatObservations_ = other.packedFloatObservations_;
       _unknownFields = pb::UnknownFieldSet.Clone(other._unknownFields);
     }
 
@@ -186,6 +187,20 @@ namespace Unity.MLAgents.CommunicatorObjects {
       }
     }
 
+    /// <summary>Field number for the "packedFloatObservations" field.</summary>
+    public const int PackedFloatObservationsFieldNumber = 8;
+    private bool packedFloatObservations_;
+    /// <summary>
+    /// uncompressed observations packed as little-endian float32 bytes.
+    /// </summary>
+    [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+    public bool PackedFloatObservations {
+      get { return packedFloatObservations_; }
+      set {
+        packedFloatObservations_ = value;
+      }
+    }
+
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
     public override bool Equals(object other) {
       return Equals(other as UnityRLCapabilitiesProto);
@@ -206,6 +221,7 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (TrainingAnalytics != other.TrainingAnalytics) return false;
       if (VariableLengthObservation != other.VariableLengthObservation) return false;
       if (MultiAgentGroups != other.MultiAgentGroups) return false;
+      if (PackedFloatObservations != other.PackedFloatObservations) return false;
       return Equals(_unknownFields, other._unknownFields);
     }
 
@@ -219,6 +235,7 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (TrainingAnalytics != false) hash ^= TrainingAnalytics.GetHashCode();
       if (VariableLengthObservation != false) hash ^= VariableLengthObservation.GetHashCode();
       if (MultiAgentGroups != false) hash ^= MultiAgentGroups.GetHashCode();
+      if (PackedFloatObservations != false) hash ^= PackedFloatObservations.GetHashCode();
       if (_unknownFields != null) {
         hash ^= _unknownFields.GetHashCode();
       }
@@ -260,6 +277,10 @@ namespace Unity.MLAgents.CommunicatorObjects {
         output.WriteRawTag(56);
         output.WriteBool(MultiAgentGroups);
       }
+      if (PackedFloatObservations != false) {
+        output.WriteRawTag(64);
+        output.WriteBool(PackedFloatObservations);
+      }
       if (_unknownFields != null) {
         _unknownFields.WriteTo(output);
       }
@@ -289,6 +310,9 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (MultiAgentGroups != false) {
         size += 1 + 1;
       }
+      if (PackedFloatObservations != false) {
+        size += 1 + 1;
+      }
       if (_unknownFields != null) {
         size += _unknownFields.CalculateSize();
       }
@@ -321,6 +345,9 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (other.MultiAgentGroups != false) {
         MultiAgentGroups = other.MultiAgentGroups;
       }
+      if (other.PackedFloatObservations != false) {
+        PackedFloatObservations = other.PackedFloatObservations;
+      }
       _unknownFields = pb::UnknownFieldSet.MergeFrom(_unknownFields, other._unknownFields);
     }
 
@@ -360,6 +387,10 @@ namespace Unity.MLAgents.CommunicatorObjects {
             MultiAgentGroups = input.ReadBool();
             break;
           }
+          case 64: {
+            PackedFloatObservations = input.ReadBool();
+            break;
+          }
         }
       }
     }
@@ -25,24 +25,24 @@ namespace Unity.MLAgents.CommunicatorObjects {
       byte[] descriptorData = global::System.Convert.FromBase64String(
           string.Concat(
             "CjRtbGFnZW50c19lbnZzL2NvbW11bmljYXRvcl9vYmplY3RzL29ic2VydmF0",
-            "aW9uLnByb3RvEhRjb21tdW5pY2F0b3Jfb2JqZWN0cyKPAwoQT2JzZXJ2YXRp",
+            "aW9uLnByb3RvEhRjb21tdW5pY2F0b3Jfb2JqZWN0cyKsAwoQT2JzZXJ2YXRp",
             "b25Qcm90bxINCgVzaGFwZRgBIAMoBRJEChBjb21wcmVzc2lvbl90eXBlGAIg",
             "ASgOMiouY29tbXVuaWNhdG9yX29iamVjdHMuQ29tcHJlc3Npb25UeXBlUHJv",
             "dG8SGQoPY29tcHJlc3NlZF9kYXRhGAMgASgMSAASRgoKZmxvYXRfZGF0YRgE",
             "IAEoCzIwLmNvbW11bmljYXRvcl9vYmplY3RzLk9ic2VydmF0aW9uUHJvdG8u",
-            "RmxvYXREYXRhSAASIgoaY29tcHJlc3NlZF9jaGFubmVsX21hcHBpbmcYBSAD",
-            "KAUSHAoUZGltZW5zaW9uX3Byb3BlcnRpZXMYBiADKAUSRAoQb2JzZXJ2YXRp",
-            "b25fdHlwZRgHIAEoDjIqLmNvbW11bmljYXRvcl9vYmplY3RzLk9ic2VydmF0",
-            "aW9uVHlwZVByb3RvEgwKBG5hbWUYCCABKAkaGQoJRmxvYXREYXRhEgwKBGRh",
-            "dGEYASADKAJCEgoQb2JzZXJ2YXRpb25fZGF0YSopChRDb21wcmVzc2lvblR5",
-            "cGVQcm90bxIICgROT05FEAASBwoDUE5HEAEqQAoUT2JzZXJ2YXRpb25UeXBl",
-            "UHJvdG8SCwoHREVGQVVMVBAAEg8KC0dPQUxfU0lHTkFMEAEiBAgCEAIiBAgD",
-            "EANCJaoCIlVuaXR5Lk1MQWdlbnRzLkNvbW11bmljYXRvck9iamVjdHNiBnBy",
-            "b3RvMw=="));
+            "RmxvYXREYXRhSAASGwoRcGFja2VkX2Zsb2F0X2RhdGEYCSABKAxIABIiChpj",
+            "b21wcmVzc2VkX2NoYW5uZWxfbWFwcGluZxgFIAMoBRIcChRkaW1lbnNpb25f",
+            "cHJvcGVydGllcxgGIAMoBRJEChBvYnNlcnZhdGlvbl90eXBlGAcgASgOMiou",
+            "Y29tbXVuaWNhdG9yX29iamVjdHMuT2JzZXJ2YXRpb25UeXBlUHJvdG8SDAoE",
+            "bmFtZRgIIAEoCRoZCglGbG9hdERhdGESDAoEZGF0YRgBIAMoAkISChBvYnNl",
+            "cnZhdGlvbl9kYXRhKikKFENvbXByZXNzaW9uVHlwZVByb3RvEggKBE5PTkUQ",
+            "ABIHCgNQTkcQASpAChRPYnNlcnZhdGlvblR5cGVQcm90bxILCgdERUZBVUxU",
+            "EAASDwoLR09BTF9TSUdOQUwQASIECAIQAiIECAMQA0IlqgIiVW5pdHkuTUxB",
+            "Z2VudHMuQ29tbXVuaWNhdG9yT2JqZWN0c2IGcHJvdG8z"));
       descriptor = pbr::FileDescriptor.FromGeneratedCode(descriptorData,
           new pbr::FileDescriptor[] { },
           new pbr::GeneratedClrTypeInfo(new[] {typeof(global::Unity.MLAgents.CommunicatorObjects.CompressionTypeProto), typeof(global::Unity.MLAgents.CommunicatorObjects.ObservationTypeProto), }, new pbr::GeneratedClrTypeInfo[] {
-            new pbr::GeneratedClrTypeInfo(typeof(global::Unity.MLAgents.CommunicatorObjects.ObservationProto), global::Unity.MLAgents.CommunicatorObjects.ObservationProto.Parser, new[]{ "Shape", "CompressionType", "CompressedData", "FloatData", "CompressedChannelMapping", "DimensionProperties", "ObservationType", "Name" }, new[]{ "ObservationData" }, null, new pbr::GeneratedClrTypeInfo[] { new pbr::GeneratedClrTypeInfo(typeof(global::Unity.MLAgents.CommunicatorObjects.ObservationProto.Types.FloatData), global::Unity.MLAgents.CommunicatorObjects.ObservationProto.Types.FloatData.Parser, new[]{ "Data" }, null, null, null)})
+            new pbr::GeneratedClrTypeInfo(typeof(global::Unity.MLAgents.CommunicatorObjects.ObservationProto), global::Unity.MLAgents.CommunicatorObjects.ObservationProto.Parser, new[]{ "Shape", "CompressionType", "CompressedData", "FloatData", "PackedFloatData", "CompressedChannelMapping", "DimensionProperties", "ObservationType", "Name" }, new[]{ "ObservationData" }, null, new pbr::GeneratedClrTypeInfo[] { new pbr::GeneratedClrTypeInfo(typeof(global::Unity.MLAgents.CommunicatorObjects.ObservationProto.Types.FloatData), global::Unity.MLAgents.CommunicatorObjects.ObservationProto.Types.FloatData.Parser, new[]{ "Data" }, null, null, null)})
           }));
     }
     #endregion
@@ -100,6 +100,9 @@ namespace Unity.MLAgents.CommunicatorObjects {
         case ObservationDataOneofCase.FloatData:
           FloatData = other.FloatData.Clone();
           break;
+        case ObservationDataOneofCase.PackedFloatData:
+          PackedFloatData = other.PackedFloatData;
+          break;
       }
 
       _unknownFields = pb::UnknownFieldSet.Clone(other._unknownFields);
@@ -153,6 +156,20 @@ namespace Unity.MLAgents.CommunicatorObjects {
       }
     }
 
+    /// <summary>Field number for the "packed_float_data" field.</summary>
+    public const int PackedFloatDataFieldNumber = 9;
+    /// <summary>
+    /// Uncompressed observation packed as little-endian float32 values.
+    /// </summary>
+    [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
+    public pb::ByteString PackedFloatData {
+      get { return observationDataCase_ == ObservationDataOneofCase.PackedFloatData ? (pb::ByteString) observationData_ : pb::ByteString.Empty; }
+      set {
+        observationData_ = pb::ProtoPreconditions.CheckNotNull(value, "value");
+        observationDataCase_ = ObservationDataOneofCase.PackedFloatData;
+      }
+    }
+
     /// <summary>Field number for the "compressed_channel_mapping" field.</summary>
     public const int CompressedChannelMappingFieldNumber = 5;
     private static readonly pb::FieldCodec<int> _repeated_compressedChannelMapping_codec
@@ -206,6 +223,7 @@ namespace Unity.MLAgents.CommunicatorObjects {
       None = 0,
       CompressedData = 3,
       FloatData = 4,
+      PackedFloatData = 9,
     }
     private ObservationDataOneofCase observationDataCase_ = ObservationDataOneofCase.None;
     [global::System.Diagnostics.DebuggerNonUserCodeAttribute]
@@ -236,6 +254,7 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (CompressionType != other.CompressionType) return false;
       if (CompressedData != other.CompressedData) return false;
       if (!object.Equals(FloatData, other.FloatData)) return false;
+      if (PackedFloatData != other.PackedFloatData) return false;
       if(!compressedChannelMapping_.Equals(other.compressedChannelMapping_)) return false;
       if(!dimensionProperties_.Equals(other.dimensionProperties_)) return false;
       if (ObservationType != other.ObservationType) return false;
@@ -251,6 +270,7 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (CompressionType != 0) hash ^= CompressionType.GetHashCode();
       if (observationDataCase_ == ObservationDataOneofCase.CompressedData) hash ^= CompressedData.GetHashCode();
       if (observationDataCase_ == ObservationDataOneofCase.FloatData) hash ^= FloatData.GetHashCode();
+      if (observationDataCase_ == ObservationDataOneofCase.PackedFloatData) hash ^= PackedFloatData.GetHashCode();
       hash ^= compressedChannelMapping_.GetHashCode();
       hash ^= dimensionProperties_.GetHashCode();
       if (ObservationType != 0) hash ^= ObservationType.GetHashCode();
@@ -292,6 +312,10 @@ namespace Unity.MLAgents.CommunicatorObjects {
         output.WriteRawTag(66);
         output.WriteString(Name);
       }
+      if (observationDataCase_ == ObservationDataOneofCase.PackedFloatData) {
+        output.WriteRawTag(74);
+        output.WriteBytes(PackedFloatData);
+      }
       if (_unknownFields != null) {
         _unknownFields.WriteTo(output);
       }
@@ -310,6 +334,9 @@ namespace Unity.MLAgents.CommunicatorObjects {
       if (observationDataCase_ == ObservationDataOneofCase.FloatData) {
         size += 1 + pb::CodedOutputStream.ComputeMessageSize(FloatData);
       }
+      if (observationDataCase_ == ObservationDataOneofCase.PackedFloatData) {
+        size += 1 + pb::CodedOutputStream.ComputeBytesSize(PackedFloatData);
+      }
       size += compressedChannelMapping_.CalculateSize(_repeated_compressedChannelMapping_codec);
       size += dimensionProperties_.CalculateSize(_repeated_dimensionProperties_codec);
       if (ObservationType != 0) {
@@ -351,6 +378,9 @@ namespace Unity.MLAgents.CommunicatorObjects {
           }
           FloatData.MergeFrom(other.FloatData);
           break;
+        case ObservationDataOneofCase.PackedFloatData:
+          PackedFloatData = other.PackedFloatData;
+          break;
       }
 
       _unknownFields = pb::UnknownFieldSet.MergeFrom(_unknownFields, other._unknownFields);
@@ -404,6 +434,10 @@ namespace Unity.MLAgents.CommunicatorObjects {
             Name = input.ReadString();
             break;
           }
+          case 74: {
+            PackedFloatData = input.ReadBytes();
+            break;
+          }
         }
       }
     }
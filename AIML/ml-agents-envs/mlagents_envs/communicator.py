@@ -16,6 +16,7 @@ class Communicator:
         :int worker_id: Offset from base_port. Used for training multiple environments simultaneously.
         :int base_port: Baseline port number to connect to Unity environment over. worker_id increments over this.
         """
+        self._pending_inputs: Optional[UnityInputProto] = None
 
     def initialize(
         self, inputs: UnityInputProto, poll_callback: Optional[PollCallback] = None
@@ -27,6 +28,14 @@ class Communicator:
         :return: UnityOutput: The initialization output sent by Unity
         """
 
+    def get_input_buffer(self) -> UnityInputProto:
+        """
+        Returns a UnityInputProto to fill in place and pass to exchange. It can be the same
+        proto on every call, so it must be refilled before each exchange.
+        :return: The UnityInputProto to fill.
+        """
+        return UnityInputProto()
+
     def exchange(
         self, inputs: UnityInputProto, poll_callback: Optional[PollCallback] = None
     ) -> Optional[UnityOutputProto]:
@@ -37,6 +46,26 @@ class Communicator:
         :return: The UnityOutputs generated by the Environment
         """
 
+    def send_input(self, inputs: UnityInputProto) -> None:
+        """
+        Sends an input to the Environment without waiting for its output, which is returned by
+        the next call to receive_output. By default, the whole exchange happens in
+        receive_output.
+        :param inputs: The UnityInput that needs to be sent the Environment
+        """
+        self._pending_inputs = inputs
+
+    def receive_output(
+        self, poll_callback: Optional[PollCallback] = None
+    ) -> Optional[UnityOutputProto]:
+        """
+        Waits for the output of the Environment to the input given to send_input.
+        :param poll_callback: Optional callback to be used while polling the connection.
+        :return: The UnityOutputs generated by the Environment
+        """
+        inputs, self._pending_inputs = self._pending_inputs, None
+        return self.exchange(inputs, poll_callback)
+
     def close(self):
         """
         Sends a shutdown signal to the unity environment, and closes the connection.
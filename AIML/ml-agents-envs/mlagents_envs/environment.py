@@ -35,9 +35,7 @@ from mlagents_envs.exception import (
 from mlagents_envs.communicator_objects.command_pb2 import STEP, RESET
 from mlagents_envs.rpc_utils import behavior_spec_from_proto, steps_from_proto
 
-from mlagents_envs.communicator_objects.unity_rl_input_pb2 import UnityRLInputProto
 from mlagents_envs.communicator_objects.unity_rl_output_pb2 import UnityRLOutputProto
-from mlagents_envs.communicator_objects.agent_action_pb2 import AgentActionProto
 from mlagents_envs.communicator_objects.unity_output_pb2 import UnityOutputProto
 from mlagents_envs.communicator_objects.capabilities_pb2 import UnityRLCapabilitiesProto
 from mlagents_envs.communicator_objects.unity_rl_initialization_input_pb2 import (
@@ -77,6 +75,7 @@ class UnityEnvironment(BaseEnv):
 
     # Command line argument used to pass the port to the executable environment.
     _PORT_COMMAND_LINE_ARG = "--mlagents-port"
+    _SOCKET_COMMAND_LINE_ARG = "--mlagents-socket"
 
     @staticmethod
     def _raise_version_exception(unity_com_ver: str) -> None:
@@ -126,6 +125,7 @@ class UnityEnvironment(BaseEnv):
         capabilities.trainingAnalytics = True
         capabilities.variableLengthObservation = True
         capabilities.multiAgentGroups = True
+        capabilities.packedFloatObservations = True
         return capabilities
 
     @staticmethod
@@ -155,6 +155,8 @@ class UnityEnvironment(BaseEnv):
         side_channels: Optional[List[SideChannel]] = None,
         log_folder: Optional[str] = None,
         num_areas: int = 1,
+        uint8_visual_observations: bool = False,
+        socket_path: Optional[str] = None,
     ):
         """
         Starts a new unity environment and establishes a connection with the environment.
@@ -168,7 +170,11 @@ class UnityEnvironment(BaseEnv):
         no_graphics_monitor: Whether to run the main worker in graphics mode, with the remaining in no-graphics mode
         :int timeout_wait: Time (in seconds) to wait for connection from environment. :list args: Addition Unity
         command line arguments :list side_channels: Additional side channel for no-rl communication with Unity :str
-        log_folder: Optional folder to write the Unity Player log file into.  Requires absolute path.
+        log_folder: Optional folder to write the Unity Player log file into.  Requires absolute path. :bool
+        uint8_visual_observations: Whether to keep compressed visual observations as uint8 arrays with values in
+        [0, 255] instead of float32 arrays with values in [0, 1]. :str socket_path: Path of a Unix domain
+        socket to communicate with the environment over instead of the port. Only supported for executables on
+        Linux and macOS.
         """
         atexit.register(self._close)
         self._additional_args = additional_args or []
@@ -186,7 +192,10 @@ class UnityEnvironment(BaseEnv):
         # The process that is started. If None, no process was started
         self._process: Optional[subprocess.Popen] = None
         self._timeout_wait: int = timeout_wait
-        self._communicator = self._get_communicator(worker_id, base_port, timeout_wait)
+        self._socket_path = socket_path
+        self._communicator = self._get_communicator(
+            worker_id, base_port, timeout_wait, socket_path
+        )
         self._worker_id = worker_id
         if side_channels is None:
             side_channels = []
@@ -200,6 +209,7 @@ class UnityEnvironment(BaseEnv):
             side_channels.append(default_training_side_channel)
         self._side_channel_manager = SideChannelManager(side_channels)
         self._log_folder = log_folder
+        self._uint8_visual_observations = uint8_visual_observations
         self.academy_capabilities: UnityRLCapabilitiesProto = None  # type: ignore
 
         # If the environment name is None, a new environment will not be launched
@@ -210,6 +220,11 @@ class UnityEnvironment(BaseEnv):
                 "If the environment name is None, "
                 "the worker-id must be 0 in order to connect with the Editor."
             )
+        if file_name is None and socket_path is not None:
+            raise UnityEnvironmentException(
+                "The Editor can only connect over a port, a socket path requires an "
+                "environment executable."
+            )
         if file_name is not None:
             try:
                 self._process = env_utils.launch_executable(
@@ -256,21 +271,27 @@ class UnityEnvironment(BaseEnv):
         self._env_state: Dict[str, Tuple[DecisionSteps, TerminalSteps]] = {}
         self._env_specs: Dict[str, BehaviorSpec] = {}
         self._env_actions: Dict[str, ActionTuple] = {}
+        # Filled in place for each exchange with the communicator.
+        self._unity_input = self._communicator.get_input_buffer()
         self._is_first_message = True
+        self._step_pending = False
         self._update_behavior_specs(aca_output)
         self.academy_capabilities = aca_params.capabilities
         if default_training_side_channel is not None:
             default_training_side_channel.environment_initialized()
 
     @staticmethod
-    def _get_communicator(worker_id, base_port, timeout_wait):
-        return RpcCommunicator(worker_id, base_port, timeout_wait)
+    def _get_communicator(worker_id, base_port, timeout_wait, socket_path=None):
+        return RpcCommunicator(worker_id, base_port, timeout_wait, socket_path)
 
     def _executable_args(self) -> List[str]:
         args: List[str] = []
         if self._no_graphics:
             args += ["-nographics", "-batchmode"]
-        args += [UnityEnvironment._PORT_COMMAND_LINE_ARG, str(self._port)]
+        if self._socket_path is not None:
+            args += [UnityEnvironment._SOCKET_COMMAND_LINE_ARG, self._socket_path]
+        else:
+            args += [UnityEnvironment._PORT_COMMAND_LINE_ARG, str(self._port)]
 
         # If the logfile arg isn't already set in the env args,
         # try to set it to an output directory
@@ -304,7 +325,9 @@ class UnityEnvironment(BaseEnv):
             if brain_name in output.agentInfos:
                 agent_info_list = output.agentInfos[brain_name].value
                 self._env_state[brain_name] = steps_from_proto(
-                    agent_info_list, self._env_specs[brain_name]
+                    agent_info_list,
+                    self._env_specs[brain_name],
+                    self._uint8_visual_observations,
                 )
             else:
                 self._env_state[brain_name] = (
@@ -330,6 +353,16 @@ class UnityEnvironment(BaseEnv):
 
     @timed
     def step(self) -> None:
+        self.begin_step()
+        self.end_step()
+
+    def begin_step(self) -> None:
+        """
+        Sends the actions to the environment without waiting for the simulation to step.
+        Several environments can step at the same time by calling begin_step on all of them
+        before calling end_step. No other method of the environment can be called until
+        end_step is called.
+        """
         if self._is_first_message:
             return self.reset()
         if not self._loaded:
@@ -344,8 +377,19 @@ class UnityEnvironment(BaseEnv):
                     group_name
                 ].action_spec.empty_action(n_agents)
         step_input = self._generate_step_input(self._env_actions)
+        self._communicator.send_input(step_input)
+        self._step_pending = True
+
+    def end_step(self) -> None:
+        """
+        Waits for the step started by begin_step to complete and updates the DecisionSteps
+        and TerminalSteps.
+        """
+        if not self._step_pending:
+            return
+        self._step_pending = False
         with hierarchical_timer("communicator.exchange"):
-            outputs = self._communicator.exchange(step_input, self._poll_process)
+            outputs = self._communicator.receive_output(self._poll_process)
         if outputs is None:
             raise UnityCommunicatorStoppedException("Communicator has exited.")
         self._update_behavior_specs(outputs)
@@ -452,37 +496,59 @@ class UnityEnvironment(BaseEnv):
     def _generate_step_input(
         self, vector_action: Dict[str, ActionTuple]
     ) -> UnityInputProto:
-        rl_in = UnityRLInputProto()
-        for b in vector_action:
+        # The same AgentActionProtos are refilled every step.
+        rl_in = self._unity_input.rl_input
+        rl_in.command = STEP
+        # The Unity versions that support hybrid actions only read the continuous and
+        # discrete actions, so the deprecated field is only filled for older versions.
+        fill_deprecated = not self.academy_capabilities.hybridActions
+        for b in list(rl_in.agent_actions):
+            if b not in vector_action:
+                del rl_in.agent_actions[b]
+        for b, action_tuple in vector_action.items():
             n_agents = len(self._env_state[b][0])
             if n_agents == 0:
+                if b in rl_in.agent_actions:
+                    del rl_in.agent_actions[b]
                 continue
-            for i in range(n_agents):
-                action = AgentActionProto()
-                if vector_action[b].continuous is not None:
-                    action.vector_actions_deprecated.extend(
-                        vector_action[b].continuous[i]
-                    )
-                    action.continuous_actions.extend(vector_action[b].continuous[i])
-                if vector_action[b].discrete is not None:
-                    action.vector_actions_deprecated.extend(
-                        vector_action[b].discrete[i]
-                    )
-                    action.discrete_actions.extend(vector_action[b].discrete[i])
-                rl_in.agent_actions[b].value.extend([action])
-                rl_in.command = STEP
+            agent_actions = rl_in.agent_actions[b].value
+            del agent_actions[n_agents:]
+            while len(agent_actions) < n_agents:
+                agent_actions.add()
+            # Convert the arrays to lists once, rather than each row separately.
+            continuous = (
+                action_tuple.continuous.tolist()
+                if action_tuple.continuous is not None
+                else None
+            )
+            discrete = (
+                action_tuple.discrete.tolist()
+                if action_tuple.discrete is not None
+                else None
+            )
+            for i, action in enumerate(agent_actions):
+                action.Clear()
+                if continuous is not None:
+                    if fill_deprecated:
+                        action.vector_actions_deprecated.extend(continuous[i])
+                    action.continuous_actions.extend(continuous[i])
+                if discrete is not None:
+                    if fill_deprecated:
+                        action.vector_actions_deprecated.extend(discrete[i])
+                    action.discrete_actions.extend(discrete[i])
         rl_in.side_channel = bytes(
             self._side_channel_manager.generate_side_channel_messages()
         )
-        return self._wrap_unity_input(rl_in)
+        return self._unity_input
 
     def _generate_reset_input(self) -> UnityInputProto:
-        rl_in = UnityRLInputProto()
+        rl_in = self._unity_input.rl_input
+        rl_in.Clear()
         rl_in.command = RESET
         rl_in.side_channel = bytes(
             self._side_channel_manager.generate_side_channel_messages()
         )
-        return self._wrap_unity_input(rl_in)
+        return self._unity_input
 
     def _send_academy_parameters(
         self, init_parameters: UnityRLInitializationInputProto
@@ -491,12 +557,6 @@ class UnityEnvironment(BaseEnv):
         inputs.rl_initialization_input.CopyFrom(init_parameters)
         return self._communicator.initialize(inputs, self._poll_process)
 
-    @staticmethod
-    def _wrap_unity_input(rl_input: UnityRLInputProto) -> UnityInputProto:
-        result = UnityInputProto()
-        result.rl_input.CopyFrom(rl_input)
-        return result
-
     @staticmethod
     def _returncode_to_signal_name(returncode: int) -> Optional[str]:
         """
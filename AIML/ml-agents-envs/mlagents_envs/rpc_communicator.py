@@ -1,9 +1,11 @@
 import grpc
-from typing import Optional
+from typing import Any, Deque, Optional, Tuple
 
-from multiprocessing import Pipe
+from collections import deque
 from sys import platform
+import os
 import socket
+import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
 
@@ -18,9 +20,76 @@ from mlagents_envs.communicator_objects.unity_output_pb2 import UnityOutputProto
 from .exception import UnityTimeOutException, UnityWorkerInUseException
 
 
+class InProcessConnection:
+    """
+    One end of a thread-safe, in-process replacement for multiprocessing.Pipe. Messages are
+    handed over by reference instead of being pickled, since both the gRPC server threads
+    and the caller live in the same process.
+    """
+
+    def __init__(
+        self,
+        condition: threading.Condition,
+        inbox: Deque[Any],
+        outbox: Deque[Any],
+        closed: threading.Event,
+    ):
+        self._condition = condition
+        self._inbox = inbox
+        self._outbox = outbox
+        self._closed = closed
+
+    def send(self, obj: Any) -> None:
+        with self._condition:
+            if self._closed.is_set():
+                raise BrokenPipeError("Connection is closed.")
+            self._outbox.append(obj)
+            self._condition.notify_all()
+
+    def recv(self) -> Any:
+        with self._condition:
+            self._condition.wait_for(self._readable)
+            if not self._inbox:
+                raise EOFError("Connection is closed.")
+            return self._inbox.popleft()
+
+    def poll(self, timeout: Optional[float] = 0.0) -> bool:
+        """
+        Waits up to timeout seconds for a message (or for the connection to be closed).
+        :return: Whether recv can be called without blocking.
+        """
+        with self._condition:
+            return self._condition.wait_for(self._readable, timeout)
+
+    def close(self) -> None:
+        """
+        Closes both ends. Messages already sent can still be received.
+        """
+        with self._condition:
+            self._closed.set()
+            self._condition.notify_all()
+
+    def _readable(self) -> bool:
+        return bool(self._inbox) or self._closed.is_set()
+
+
+def in_process_pipe() -> Tuple[InProcessConnection, InProcessConnection]:
+    """
+    Creates a pair of connected InProcessConnections.
+    """
+    condition = threading.Condition()
+    closed = threading.Event()
+    first_to_second: Deque[Any] = deque()
+    second_to_first: Deque[Any] = deque()
+    return (
+        InProcessConnection(condition, second_to_first, first_to_second, closed),
+        InProcessConnection(condition, first_to_second, second_to_first, closed),
+    )
+
+
 class UnityToExternalServicerImplementation(UnityToExternalProtoServicer):
     def __init__(self):
-        self.parent_conn, self.child_conn = Pipe()
+        self.parent_conn, self.child_conn = in_process_pipe()
 
     def Initialize(self, request, context):
         self.child_conn.send(request)
@@ -32,7 +101,13 @@ class UnityToExternalServicerImplementation(UnityToExternalProtoServicer):
 
 
 class RpcCommunicator(Communicator):
-    def __init__(self, worker_id=0, base_port=5005, timeout_wait=30):
+    def __init__(
+        self,
+        worker_id=0,
+        base_port=5005,
+        timeout_wait=30,
+        socket_path: Optional[str] = None,
+    ):
         """
         Python side of the grpc communication. Python is the server and Unity the client
 
@@ -40,21 +115,34 @@ class RpcCommunicator(Communicator):
         :int base_port: Baseline port number to connect to Unity environment over. worker_id increments over this.
         :int worker_id: Offset from base_port. Used for training multiple environments simultaneously.
         :int timeout_wait: Timeout (in seconds) to wait for a response before exiting.
+        :str socket_path: Path of a Unix domain socket to serve on instead of the TCP port.
         """
         super().__init__(worker_id, base_port)
         self.port = base_port + worker_id
         self.worker_id = worker_id
         self.timeout_wait = timeout_wait
+        self.socket_path = socket_path
         self.server = None
         self.unity_to_external = None
         self.is_open = False
+        # The message sent on each exchange, reused so that the inputs are filled in place
+        # instead of being copied into a new message.
+        self._exchange_message = UnityMessageProto()
+        self._exchange_message.header.status = 200
         self.create_server()
 
     def create_server(self):
         """
         Creates the GRPC server.
         """
-        self.check_port(self.port)
+        if self.socket_path is not None:
+            self.check_socket_path(self.socket_path)
+            address = "unix:" + self.socket_path
+        else:
+            self.check_port(self.port)
+            # Using unspecified address, which means that grpc is communicating on all IPs
+            # This is so that the docker container can connect.
+            address = "[::]:" + str(self.port)
 
         try:
             # Establish communication grpc
@@ -66,9 +154,7 @@ class RpcCommunicator(Communicator):
             add_UnityToExternalProtoServicer_to_server(
                 self.unity_to_external, self.server
             )
-            # Using unspecified address, which means that grpc is communicating on all IPs
-            # This is so that the docker container can connect.
-            self.server.add_insecure_port("[::]:" + str(self.port))
+            self.server.add_insecure_port(address)
             self.server.start()
             self.is_open = True
         except Exception:
@@ -90,6 +176,29 @@ class RpcCommunicator(Communicator):
         finally:
             s.close()
 
+    def check_socket_path(self, socket_path: str) -> None:
+        """
+        Attempts to connect to the requested Unix domain socket, checking if it is already in
+        use. A socket file nobody listens on is left over from a previous run and is removed,
+        unless it belongs to another user.
+        """
+        if not os.path.exists(socket_path):
+            return
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(socket_path)
+            in_use = True
+        except OSError:
+            in_use = False
+        finally:
+            s.close()
+        if in_use:
+            raise UnityWorkerInUseException(self.worker_id)
+        try:
+            os.remove(socket_path)
+        except OSError as e:
+            raise UnityWorkerInUseException(self.worker_id) from e
+
     def poll_for_timeout(self, poll_callback: Optional[PollCallback] = None) -> None:
         """
         Polls the GRPC parent connection for data, to be used before calling recv.  This prevents
@@ -101,7 +210,9 @@ class RpcCommunicator(Communicator):
         so that we can stop sooner and raise a more appropriate error.
         """
         deadline = time.monotonic() + self.timeout_wait
-        callback_timeout_wait = self.timeout_wait // 10
+        # Don't round down to a zero timeout, this loop would then spin and starve the
+        # gRPC threads of the GIL.
+        callback_timeout_wait = self.timeout_wait / 10
         while time.monotonic() < deadline:
             if self.unity_to_external.parent_conn.poll(callback_timeout_wait):
                 # Got an acknowledgment from the connection
@@ -132,13 +243,26 @@ class RpcCommunicator(Communicator):
         self.unity_to_external.parent_conn.recv()
         return aca_param
 
+    def get_input_buffer(self) -> UnityInputProto:
+        return self._exchange_message.unity_input
+
     def exchange(
         self, inputs: UnityInputProto, poll_callback: Optional[PollCallback] = None
     ) -> Optional[UnityOutputProto]:
-        message = UnityMessageProto()
-        message.header.status = 200
-        message.unity_input.CopyFrom(inputs)
+        self.send_input(inputs)
+        return self.receive_output(poll_callback)
+
+    def send_input(self, inputs: UnityInputProto) -> None:
+        # The message is serialized by the gRPC server before Unity can answer it, so it
+        # can be refilled once the output is received.
+        message = self._exchange_message
+        if inputs is not message.unity_input:
+            message.unity_input.CopyFrom(inputs)
         self.unity_to_external.parent_conn.send(message)
+
+    def receive_output(
+        self, poll_callback: Optional[PollCallback] = None
+    ) -> Optional[UnityOutputProto]:
         self.poll_for_timeout(poll_callback)
         output = self.unity_to_external.parent_conn.recv()
         if output.header.status != 200:
@@ -156,3 +280,5 @@ class RpcCommunicator(Communicator):
             self.unity_to_external.parent_conn.close()
             self.server.stop(False)
             self.is_open = False
+            if self.socket_path is not None and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
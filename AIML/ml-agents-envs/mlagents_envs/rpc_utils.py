@@ -16,13 +16,20 @@ from mlagents_envs.communicator_objects.observation_pb2 import (
 )
 from mlagents_envs.communicator_objects.brain_parameters_pb2 import BrainParametersProto
 import numpy as np
+import array
 import io
-from typing import cast, List, Tuple, Collection, Optional, Iterable
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import cast, List, NamedTuple, Tuple, Collection, Optional
 from PIL import Image
 
 
 PNG_HEADER = b"\x89PNG\r\n\x1a\n"
 
+# Dtype of the values of ObservationProto.packed_float_data.
+PACKED_FLOAT_DTYPE = np.dtype("<f4")
+
 
 def behavior_spec_from_proto(
     brain_param_proto: BrainParametersProto, agent_info: AgentInfoProto
@@ -70,126 +77,207 @@ def behavior_spec_from_proto(
     return BehaviorSpec(observation_specs, action_spec)
 
 
-class OffsetBytesIO:
-    """
-    Simple file-like class that wraps a bytes, and allows moving its "start"
-    position in the bytes. This is only used for reading concatenated PNGs,
-    because Pillow always calls seek(0) at the start of reading.
-    """
+# Number of threads decoding the compressed observations of a step. Pillow releases the GIL
+# while it decompresses, so the images of several agents are decoded in parallel.
+IMAGE_DECODE_THREADS = min(8, os.cpu_count() or 1)
+_image_decode_pool: Optional[ThreadPoolExecutor] = None
 
-    __slots__ = ["fp", "offset"]
 
-    def __init__(self, data: bytes):
-        self.fp = io.BytesIO(data)
-        self.offset = 0
+def _get_image_decode_pool() -> ThreadPoolExecutor:
+    global _image_decode_pool
+    if _image_decode_pool is None:
+        _image_decode_pool = ThreadPoolExecutor(
+            IMAGE_DECODE_THREADS, thread_name_prefix="image_decode"
+        )
+    return _image_decode_pool
 
-    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
-        if whence == io.SEEK_SET:
-            res = self.fp.seek(offset + self.offset)
-            return res - self.offset
-        raise NotImplementedError()
 
-    def tell(self) -> int:
-        return self.fp.tell() - self.offset
+def _reset_image_decode_pool() -> None:
+    # The threads of the pool don't exist in a forked process.
+    global _image_decode_pool
+    _image_decode_pool = None
 
-    def read(self, size: int = -1) -> bytes:
-        return self.fp.read(size)
 
-    def original_tell(self) -> int:
-        """
-        Returns the offset into the original byte array
-        """
-        return self.fp.tell()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_image_decode_pool)
 
 
-@timed
-def process_pixels(
-    image_bytes: bytes, expected_channels: int, mappings: Optional[List[int]] = None
-) -> np.ndarray:
+def _split_pngs(image_bytes: bytes) -> List[bytes]:
     """
-    Converts byte array observation image into numpy array, re-sizes it,
-    and optionally converts it to grey scale
-    :param image_bytes: input byte array corresponding to image
-    :param expected_channels: Expected output channels
-    :return: processed numpy array of observation from environment
+    Splits concatenated PNGs by walking their chunk headers up to the IEND chunk, so that
+    each PNG can be decoded on its own without scanning the image data for the next header.
     """
-    image_fp = OffsetBytesIO(image_bytes)
-
-    image_arrays = []
-    # Read the images back from the bytes (without knowing the sizes).
-    while True:
-        with hierarchical_timer("image_decompress"):
-            image = Image.open(image_fp)
-            # Normally Image loads lazily, load() forces it to do loading in the timer scope.
-            image.load()
-        image_arrays.append(
-            np.moveaxis(np.array(image, dtype=np.float32) / 255.0, -1, 0)
-        )
-
-        # Look for the next header, starting from the current stream location
-        try:
-            new_offset = image_bytes.index(PNG_HEADER, image_fp.original_tell())
-            image_fp.offset = new_offset
-        except ValueError:
-            # Didn't find the header, so must be at the end.
-            break
-
-    if mappings is not None and len(mappings) > 0:
-        return _process_images_mapping(image_arrays, mappings)
-    else:
-        return _process_images_num_channels(image_arrays, expected_channels)
-
-
-def _process_images_mapping(image_arrays, mappings):
+    pngs = []
+    start = image_bytes.find(PNG_HEADER)
+    while start >= 0:
+        offset = start + len(PNG_HEADER)
+        while offset + 8 <= len(image_bytes):
+            # Each chunk is its length, its type, its data and a 4 bytes CRC.
+            length, chunk_type = struct.unpack_from(">I4s", image_bytes, offset)
+            offset += 12 + length
+            if chunk_type == b"IEND":
+                break
+        pngs.append(image_bytes[start:offset])
+        start = image_bytes.find(PNG_HEADER, offset)
+    return pngs
+
+
+def _decode_png(png: bytes) -> np.ndarray:
     """
-    Helper function for processing decompressed images with compressed channel mappings.
+    Decodes a PNG into a uint8 array of shape (height, width, channels).
     """
-    image_arrays = np.concatenate(image_arrays, axis=0).transpose((0, 1, 2))
-
-    if len(mappings) != len(image_arrays):
-        raise UnityObservationException(
-            f"Compressed observation and its mapping had different number of channels - "
-            f"observation had {len(image_arrays)} channels but its mapping had {len(mappings)} channels"
-        )
-    if len({m for m in mappings if m > -1}) != max(mappings) + 1:
+    image = Image.open(io.BytesIO(png))
+    # Normally Image loads lazily, load() forces the decompression here.
+    image.load()
+    image_array = np.asarray(image)
+    if image_array.ndim == 2:
+        image_array = image_array[..., np.newaxis]
+    return image_array
+
+
+def _channel_sources(
+    mappings: List[int], expected_channels: int, image_channels: List[int]
+) -> List[List[int]]:
+    """
+    Returns, for each channel of the observation, the channels of the decompressed images
+    that are averaged into it.
+    :param mappings: The compressed channel mapping of the observation, if any.
+    :param expected_channels: Number of channels of the observation.
+    :param image_channels: Number of channels of each decompressed image.
+    """
+    num_channels = sum(image_channels)
+    if len(mappings) > 0:
+        if len(mappings) != num_channels:
+            raise UnityObservationException(
+                f"Compressed observation and its mapping had different number of channels - "
+                f"observation had {num_channels} channels but its mapping had {len(mappings)} channels"
+            )
+        if len({m for m in mappings if m > -1}) != max(mappings) + 1:
+            raise UnityObservationException(
+                f"Invalid Compressed Channel Mapping: the mapping {mappings} does not have the correct format."
+            )
+        if max(mappings) >= num_channels:
+            raise UnityObservationException(
+                f"Invalid Compressed Channel Mapping: the mapping has index larger than the total "
+                f"number of channels in observation - mapping index {max(mappings)} is"
+                f"invalid for input observation with {num_channels} channels."
+            )
+        sources: List[List[int]] = [[] for _ in range(max(mappings) + 1)]
+        for channel, mapping_idx in enumerate(mappings):
+            if mapping_idx > -1:
+                sources[mapping_idx].append(channel)
+        return sources
+    if expected_channels == 1:
+        # Old API without mapping: convert the first image to grayscale.
+        return [list(range(image_channels[0]))]
+    # Old API without mapping: use the first expected_channels channels. The additional
+    # channels were only added to make the number of channels divisible by 3.
+    return [[channel] for channel in range(min(expected_channels, num_channels))]
+
+
+def _decode_pixels(
+    image_bytes: bytes,
+    expected_channels: int,
+    mappings: List[int],
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Decodes the concatenated PNGs of a compressed observation into a float32 array of
+    shape (channels, height, width), with values in [0, 1].
+    :param out: Array to decode into. A new one is allocated if it's None. If it is a
+        uint8 array, the pixel values are kept in [0, 255] instead.
+    """
+    images = [_decode_png(png) for png in _split_pngs(image_bytes)]
+    if not images:
+        raise UnityObservationException("Compressed observation contained no PNG.")
+    channels = [
+        (image, channel) for image in images for channel in range(image.shape[-1])
+    ]
+    sources = _channel_sources(
+        mappings, expected_channels, [image.shape[-1] for image in images]
+    )
+    shape = (len(sources),) + images[0].shape[:2]
+    if any(image.shape[:2] != shape[1:] for image in images):
         raise UnityObservationException(
-            f"Invalid Compressed Channel Mapping: the mapping {mappings} does not have the correct format."
+            f"The images of a compressed observation had different sizes: "
+            f"{[image.shape[:2] for image in images]}"
         )
-    if max(mappings) >= len(image_arrays):
+    if out is None:
+        out = np.empty(shape, dtype=np.float32)
+    elif out.shape != shape:
         raise UnityObservationException(
-            f"Invalid Compressed Channel Mapping: the mapping has index larger than the total "
-            f"number of channels in observation - mapping index {max(mappings)} is"
-            f"invalid for input observation with {len(image_arrays)} channels."
+            f"Decompressed observation did not have the expected shape - "
+            f"decompressed had {shape} but expected {out.shape}"
         )
-
-    processed_image_arrays: List[np.array] = [[] for _ in range(max(mappings) + 1)]
-    for mapping_idx, img in zip(mappings, image_arrays):
-        if mapping_idx > -1:
-            processed_image_arrays[mapping_idx].append(img)
-
-    for i, img_array in enumerate(processed_image_arrays):
-        processed_image_arrays[i] = np.mean(img_array, axis=0)
-    img = np.stack(processed_image_arrays, axis=0)
-    return img
+    # Images whose channels are consecutive channels of the observation are converted in
+    # one operation. This is the case of all the images without a mapping to grayscale.
+    target_channels = {
+        source_channels[0]: out_channel
+        for out_channel, source_channels in enumerate(sources)
+        if len(source_channels) == 1
+    }
+    keep_uint8 = out.dtype == np.uint8
+    converted = set()
+    first_channel = 0
+    for image in images:
+        num_image_channels = image.shape[-1]
+        start = target_channels.get(first_channel, -1)
+        if start >= 0 and all(
+            target_channels.get(first_channel + c) == start + c
+            for c in range(num_image_channels)
+        ):
+            channels_first = np.moveaxis(image, -1, 0)
+            if keep_uint8:
+                out[start : start + num_image_channels] = channels_first
+            else:
+                # Transposing the uint8 image first is cheaper than dividing a strided view.
+                np.divide(
+                    np.ascontiguousarray(channels_first),
+                    np.float32(255.0),
+                    out=out[start : start + num_image_channels],
+                )
+            converted.update(range(start, start + num_image_channels))
+        first_channel += num_image_channels
+    for out_channel_index, (out_channel, source_channels) in enumerate(
+        zip(out, sources)
+    ):
+        if out_channel_index in converted:
+            continue
+        if len(source_channels) == 1:
+            image, channel = channels[source_channels[0]]
+            if keep_uint8:
+                out_channel[...] = image[..., channel]
+            else:
+                np.divide(image[..., channel], np.float32(255.0), out=out_channel)
+        else:
+            total = np.sum(
+                [channels[c][0][..., channels[c][1]] for c in source_channels],
+                axis=0,
+                dtype=np.float32,
+            )
+            if keep_uint8:
+                np.rint(total / len(source_channels), out=total)
+                out_channel[...] = total
+            else:
+                np.divide(
+                    total, np.float32(255.0 * len(source_channels)), out=out_channel
+                )
+    return out
 
 
-def _process_images_num_channels(image_arrays, expected_channels):
+@timed
+def process_pixels(
+    image_bytes: bytes, expected_channels: int, mappings: Optional[List[int]] = None
+) -> np.ndarray:
     """
-    Helper function for processing decompressed images with number of expected channels.
-    This is for old API without mapping provided. Use the first n channel, n=expected_channels.
+    Converts byte array observation image into numpy array, re-sizes it,
+    and optionally converts it to grey scale
+    :param image_bytes: input byte array corresponding to image
+    :param expected_channels: Expected output channels
+    :return: processed numpy array of observation from environment
     """
-    if expected_channels == 1:
-        # Convert to grayscale
-        img = np.mean(image_arrays[0], axis=0)
-        img = np.reshape(img, [1, img.shape[0], img.shape[1]])
-    else:
-        img = np.concatenate(image_arrays, axis=0)
-        # We can drop additional channels since they may need to be added to include
-        # numbers of observation channels not divisible by 3.
-        actual_channels = list(img.shape)[0]
-        if actual_channels > expected_channels:
-            img = img[0:expected_channels, ...]
-    return img
+    with hierarchical_timer("image_decompress"):
+        return _decode_pixels(image_bytes, expected_channels, mappings or [])
 
 
 def _check_observations_match_spec(
@@ -212,37 +300,26 @@ def _check_observations_match_spec(
             )
 
 
-@timed
-def _observation_to_np_array(
-    obs: ObservationProto, expected_shape: Optional[Iterable[int]] = None
-) -> np.ndarray:
+def _observation_to_np_array(obs: ObservationProto, out: np.ndarray) -> None:
     """
-    Converts observation proto into numpy array of the appropriate size.
+    Converts observation proto into the numpy array out, of the observation's shape.
     :param obs: observation proto to be converted
-    :param expected_shape: optional shape information, used for sanity checks.
-    :return: processed numpy array of observation from environment
+    :param out: array to write the observation to.
     """
-    if expected_shape is not None:
-        if list(obs.shape) != list(expected_shape):
-            raise UnityObservationException(
-                f"Observation did not have the expected shape - got {obs.shape} but expected {expected_shape}"
-            )
-    expected_channels = obs.shape[0]
     if obs.compression_type == COMPRESSION_TYPE_NONE:
-        img = np.array(obs.float_data.data, dtype=np.float32)
-        img = np.reshape(img, obs.shape)
-        return img
+        if obs.WhichOneof("observation_data") == "packed_float_data":
+            out[...] = np.frombuffer(obs.packed_float_data, PACKED_FLOAT_DTYPE).reshape(
+                out.shape
+            )
+        else:
+            out[...] = np.reshape(obs.float_data.data, out.shape)
     else:
-        img = process_pixels(
-            obs.compressed_data, expected_channels, list(obs.compressed_channel_mapping)
+        _decode_pixels(
+            obs.compressed_data,
+            out.shape[0],
+            list(obs.compressed_channel_mapping),
+            out=out,
         )
-        # Compare decompressed image size to observation shape and make sure they match
-        if list(obs.shape) != list(img.shape):
-            raise UnityObservationException(
-                f"Decompressed observation did not have the expected shape - "
-                f"decompressed had {img.shape} but expected {obs.shape}"
-            )
-        return img
 
 
 @timed
@@ -250,22 +327,39 @@ def _process_maybe_compressed_observation(
     obs_index: int,
     observation_spec: ObservationSpec,
     agent_info_list: Collection[AgentInfoProto],
+    uint8_visual_observations: bool = False,
 ) -> np.ndarray:
+    """
+    Decodes a visual observation of all the agents into a single array.
+    :param uint8_visual_observations: Whether to keep the pixels of compressed
+        observations as uint8 values in [0, 255] instead of converting them to float32.
+        Uncompressed observations are always float32.
+    """
     shape = cast(Tuple[int, int, int], observation_spec.shape)
+    dtype = np.float32
+    if uint8_visual_observations and (
+        len(agent_info_list) == 0
+        or next(iter(agent_info_list)).observations[obs_index].compression_type
+        != COMPRESSION_TYPE_NONE
+    ):
+        dtype = np.uint8
+    batched_visual = np.empty((len(agent_info_list),) + shape, dtype=dtype)
     if len(agent_info_list) == 0:
-        return np.zeros((0, shape[0], shape[1], shape[2]), dtype=np.float32)
-
-    try:
-        batched_visual = [
-            _observation_to_np_array(agent_obs.observations[obs_index], shape)
-            for agent_obs in agent_info_list
-        ]
-    except ValueError:
-        # Try to get a more useful error message
-        _check_observations_match_spec(obs_index, observation_spec, agent_info_list)
-        # If that didn't raise anything, raise the original error
-        raise
-    return np.array(batched_visual, dtype=np.float32)
+        return batched_visual
+    # Fail before decoding anything if an observation has the wrong shape.
+    _check_observations_match_spec(obs_index, observation_spec, agent_info_list)
+    observations = [agent_obs.observations[obs_index] for agent_obs in agent_info_list]
+    with hierarchical_timer("image_decompress"):
+        if len(observations) > 1 and IMAGE_DECODE_THREADS > 1:
+            for future in [
+                _get_image_decode_pool().submit(_observation_to_np_array, obs, out)
+                for obs, out in zip(observations, batched_visual)
+            ]:
+                future.result()
+        else:
+            for obs, out in zip(observations, batched_visual):
+                _observation_to_np_array(obs, out)
+    return batched_visual
 
 
 def _raise_on_nan_and_inf(data: np.array, source: str) -> np.array:
@@ -296,14 +390,20 @@ def _process_rank_one_or_two_observation(
 ) -> np.ndarray:
     if len(agent_info_list) == 0:
         return np.zeros((0,) + observation_spec.shape, dtype=np.float32)
+    observations = [agent_obs.observations[obs_index] for agent_obs in agent_info_list]
     try:
-        np_obs = np.array(
-            [
-                agent_obs.observations[obs_index].float_data.data
-                for agent_obs in agent_info_list
-            ],
-            dtype=np.float32,
-        ).reshape((len(agent_info_list),) + observation_spec.shape)
+        if observations[0].WhichOneof("observation_data") == "packed_float_data":
+            # The packed observations of all the agents are decoded at once.
+            packed = bytearray().join(obs.packed_float_data for obs in observations)
+            flat_obs = np.frombuffer(packed, PACKED_FLOAT_DTYPE)
+        else:
+            # Slicing copies a repeated field into a list in one call, and the array
+            # converts the list without iterating over it in Python.
+            values = array.array("f")
+            for obs in observations:
+                values.fromlist(obs.float_data.data[:])
+            flat_obs = np.frombuffer(values, dtype=np.float32)
+        np_obs = flat_obs.reshape((len(agent_info_list),) + observation_spec.shape)
     except ValueError:
         # Try to get a more useful error message
         _check_observations_match_spec(obs_index, observation_spec, agent_info_list)
@@ -313,16 +413,115 @@ def _process_rank_one_or_two_observation(
     return np_obs
 
 
+class _AgentInfoArrays(NamedTuple):
+    reward: np.ndarray
+    group_reward: np.ndarray
+    agent_id: np.ndarray
+    group_id: np.ndarray
+    max_step_reached: np.ndarray
+
+
+# Columns of the array the scalar fields of the AgentInfoProtos are decoded into.
+_REWARD, _GROUP_REWARD, _AGENT_ID, _GROUP_ID, _MAX_STEP_REACHED, _DONE = range(6)
+
+
+@timed
+def _decode_agent_infos(
+    agent_info_list: Collection[AgentInfoProto], action_mask_size: int
+) -> Tuple[
+    List[AgentInfoProto],
+    List[AgentInfoProto],
+    _AgentInfoArrays,
+    _AgentInfoArrays,
+    Optional[np.ndarray],
+]:
+    """
+    Decodes the scalar fields and action masks of the AgentInfoProtos of a behavior in a
+    single pass over the agents, and splits them between decisions and terminations.
+    :param agent_info_list: The AgentInfoProtos of the behavior.
+    :param action_mask_size: Total size of the discrete action branches, 0 for no mask.
+    :return: The decision and terminal AgentInfoProtos, their decoded scalar fields, and
+        the action mask of the decisions if action_mask_size isn't 0. Agents whose mask
+        doesn't have action_mask_size entries have no masked actions.
+    """
+    decision_agent_info_list: List[AgentInfoProto] = []
+    terminal_agent_info_list: List[AgentInfoProto] = []
+    decision_masks = []
+    rows = []
+    for agent_info in agent_info_list:
+        rows.append(
+            (
+                agent_info.reward,
+                agent_info.group_reward,
+                agent_info.id,
+                agent_info.group_id,
+                agent_info.max_step_reached,
+                agent_info.done,
+            )
+        )
+        if agent_info.done:
+            terminal_agent_info_list.append(agent_info)
+        else:
+            decision_agent_info_list.append(agent_info)
+            if action_mask_size > 0:
+                # Slicing copies the repeated field in one call instead of iterating it.
+                decision_masks.append(agent_info.action_mask[:])
+    # Rewards are floats and ids are int32s, so float64 holds all of them exactly.
+    scalars = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    rewards = scalars[:, _REWARD : _GROUP_REWARD + 1].astype(np.float32)
+    if not np.isfinite(rewards).all():
+        _raise_on_nan_and_inf(rewards[:, _REWARD], "rewards")
+        _raise_on_nan_and_inf(rewards[:, _GROUP_REWARD], "group_rewards")
+    done = scalars[:, _DONE].astype(bool)
+
+    def _arrays(selection: np.ndarray) -> _AgentInfoArrays:
+        return _AgentInfoArrays(
+            reward=rewards[selection, _REWARD],
+            group_reward=rewards[selection, _GROUP_REWARD],
+            agent_id=scalars[selection, _AGENT_ID].astype(np.int32),
+            group_id=scalars[selection, _GROUP_ID].astype(np.int32),
+            max_step_reached=scalars[selection, _MAX_STEP_REACHED].astype(bool),
+        )
+
+    action_mask = None
+    if action_mask_size > 0:
+        action_mask = np.zeros((len(decision_masks), action_mask_size), dtype=bool)
+        full_masks = [
+            index
+            for index, mask in enumerate(decision_masks)
+            if len(mask) == action_mask_size
+        ]
+        if len(full_masks) == len(decision_masks):
+            action_mask[:] = decision_masks
+        elif full_masks:
+            action_mask[full_masks] = [decision_masks[index] for index in full_masks]
+    return (
+        decision_agent_info_list,
+        terminal_agent_info_list,
+        _arrays(~done),
+        _arrays(done),
+        action_mask,
+    )
+
+
 @timed
 def steps_from_proto(
-    agent_info_list: Collection[AgentInfoProto], behavior_spec: BehaviorSpec
+    agent_info_list: Collection[AgentInfoProto],
+    behavior_spec: BehaviorSpec,
+    uint8_visual_observations: bool = False,
 ) -> Tuple[DecisionSteps, TerminalSteps]:
-    decision_agent_info_list = [
-        agent_info for agent_info in agent_info_list if not agent_info.done
-    ]
-    terminal_agent_info_list = [
-        agent_info for agent_info in agent_info_list if agent_info.done
-    ]
+    action_mask_size = (
+        sum(behavior_spec.action_spec.discrete_branches)
+        if behavior_spec.action_spec.discrete_size > 0
+        else 0
+    )
+    (
+        decision_agent_info_list,
+        terminal_agent_info_list,
+        decision_info,
+        terminal_info,
+        action_mask_matrix,
+    ) = _decode_agent_infos(agent_info_list, action_mask_size)
     decision_obs_list: List[np.ndarray] = []
     terminal_obs_list: List[np.ndarray] = []
     for obs_index, observation_spec in enumerate(behavior_spec.observation_specs):
@@ -330,12 +529,18 @@ def steps_from_proto(
         if is_visual:
             decision_obs_list.append(
                 _process_maybe_compressed_observation(
-                    obs_index, observation_spec, decision_agent_info_list
+                    obs_index,
+                    observation_spec,
+                    decision_agent_info_list,
+                    uint8_visual_observations,
                 )
             )
             terminal_obs_list.append(
                 _process_maybe_compressed_observation(
-                    obs_index, observation_spec, terminal_agent_info_list
+                    obs_index,
+                    observation_spec,
+                    terminal_agent_info_list,
+                    uint8_visual_observations,
                 )
             )
         else:
@@ -349,77 +554,26 @@ def steps_from_proto(
                     obs_index, observation_spec, terminal_agent_info_list
                 )
             )
-    decision_rewards = np.array(
-        [agent_info.reward for agent_info in decision_agent_info_list], dtype=np.float32
-    )
-    terminal_rewards = np.array(
-        [agent_info.reward for agent_info in terminal_agent_info_list], dtype=np.float32
-    )
-
-    decision_group_rewards = np.array(
-        [agent_info.group_reward for agent_info in decision_agent_info_list],
-        dtype=np.float32,
-    )
-    terminal_group_rewards = np.array(
-        [agent_info.group_reward for agent_info in terminal_agent_info_list],
-        dtype=np.float32,
-    )
-
-    _raise_on_nan_and_inf(decision_rewards, "rewards")
-    _raise_on_nan_and_inf(terminal_rewards, "rewards")
-    _raise_on_nan_and_inf(decision_group_rewards, "group_rewards")
-    _raise_on_nan_and_inf(terminal_group_rewards, "group_rewards")
-
-    decision_group_id = [agent_info.group_id for agent_info in decision_agent_info_list]
-    terminal_group_id = [agent_info.group_id for agent_info in terminal_agent_info_list]
-
-    max_step = np.array(
-        [agent_info.max_step_reached for agent_info in terminal_agent_info_list],
-        dtype=bool,
-    )
-    decision_agent_id = np.array(
-        [agent_info.id for agent_info in decision_agent_info_list], dtype=np.int32
-    )
-    terminal_agent_id = np.array(
-        [agent_info.id for agent_info in terminal_agent_info_list], dtype=np.int32
-    )
     action_mask = None
-    if behavior_spec.action_spec.discrete_size > 0:
-        if any(
-            [agent_info.action_mask is not None]
-            for agent_info in decision_agent_info_list
-        ):
-            n_agents = len(decision_agent_info_list)
-            a_size = np.sum(behavior_spec.action_spec.discrete_branches)
-            mask_matrix = np.ones((n_agents, a_size), dtype=bool)
-            for agent_index, agent_info in enumerate(decision_agent_info_list):
-                if agent_info.action_mask is not None:
-                    if len(agent_info.action_mask) == a_size:
-                        mask_matrix[agent_index, :] = [
-                            False if agent_info.action_mask[k] else True
-                            for k in range(a_size)
-                        ]
-            action_mask = (1 - mask_matrix).astype(bool)
-            indices = _generate_split_indices(
-                behavior_spec.action_spec.discrete_branches
-            )
-            action_mask = np.split(action_mask, indices, axis=1)
+    if action_mask_matrix is not None:
+        indices = _generate_split_indices(behavior_spec.action_spec.discrete_branches)
+        action_mask = np.split(action_mask_matrix, indices, axis=1)
     return (
         DecisionSteps(
             decision_obs_list,
-            decision_rewards,
-            decision_agent_id,
+            decision_info.reward,
+            decision_info.agent_id,
             action_mask,
-            decision_group_id,
-            decision_group_rewards,
+            decision_info.group_id,
+            decision_info.group_reward,
         ),
         TerminalSteps(
             terminal_obs_list,
-            terminal_rewards,
-            max_step,
-            terminal_agent_id,
-            terminal_group_id,
-            terminal_group_rewards,
+            terminal_info.reward,
+            terminal_info.max_step_reached,
+            terminal_info.agent_id,
+            terminal_info.group_id,
+            terminal_info.group_reward,
         ),
     )
 
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Union
 import struct
 
 
@@ -8,13 +8,32 @@ class IncomingMessage:
     Values must be read in the order they were written.
     """
 
-    def __init__(self, buffer: bytes, offset: int = 0):
+    def __init__(self, buffer: Union[bytes, memoryview], offset: int = 0):
         """
-        Create a new IncomingMessage from the bytes.
+        Create a new IncomingMessage from the bytes. The buffer can be a memoryview
+        into the data received from Unity, which is read without being copied.
         """
         self.buffer = buffer
         self.offset = offset
 
+    @property
+    def buffer(self) -> bytes:
+        """
+        The bytes of the message. When the message was created from a memoryview, they
+        are copied the first time they are asked for; use view to read them without a
+        copy.
+        """
+        if self._buffer is None:
+            self._buffer = bytes(self.view)
+        return self._buffer
+
+    @buffer.setter
+    def buffer(self, buffer: Union[bytes, memoryview]) -> None:
+        self.view = memoryview(buffer)
+        self._buffer: Optional[bytes] = (
+            None if isinstance(buffer, memoryview) else buffer
+        )
+
     def read_bool(self, default_value: bool = False) -> bool:
         """
         Read a boolean value from the message buffer.
@@ -24,7 +43,7 @@ class IncomingMessage:
         if self._at_end_of_buffer():
             return default_value
 
-        val = struct.unpack_from("<?", self.buffer, self.offset)[0]
+        val = struct.unpack_from("<?", self.view, self.offset)[0]
         self.offset += 1
         return val
 
@@ -37,7 +56,7 @@ class IncomingMessage:
         if self._at_end_of_buffer():
             return default_value
 
-        val = struct.unpack_from("<i", self.buffer, self.offset)[0]
+        val = struct.unpack_from("<i", self.view, self.offset)[0]
         self.offset += 4
         return val
 
@@ -50,7 +69,7 @@ class IncomingMessage:
         if self._at_end_of_buffer():
             return default_value
 
-        val = struct.unpack_from("<f", self.buffer, self.offset)[0]
+        val = struct.unpack_from("<f", self.view, self.offset)[0]
         self.offset += 4
         return val
 
@@ -64,9 +83,8 @@ class IncomingMessage:
             return [] if default_value is None else default_value
 
         list_len = self.read_int32()
-        output = []
-        for _ in range(list_len):
-            output.append(self.read_float32())
+        output = list(struct.unpack_from(f"<{list_len}f", self.view, self.offset))
+        self.offset += 4 * list_len
         return output
 
     def read_string(self, default_value: str = "") -> str:
@@ -79,7 +97,7 @@ class IncomingMessage:
             return default_value
 
         encoded_str_len = self.read_int32()
-        val = self.buffer[self.offset : self.offset + encoded_str_len].decode("ascii")
+        val = str(self.view[self.offset : self.offset + encoded_str_len], "ascii")
         self.offset += encoded_str_len
         return val
 
@@ -87,7 +105,7 @@ class IncomingMessage:
         """
         Get a copy of the internal bytes used by the message.
         """
-        return bytearray(self.buffer)
+        return bytearray(self.view)
 
     def _at_end_of_buffer(self) -> bool:
-        return self.offset >= len(self.buffer)
+        return self.offset >= len(self.view)
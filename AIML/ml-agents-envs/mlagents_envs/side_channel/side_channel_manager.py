@@ -6,24 +6,43 @@ from mlagents_envs.exception import UnityEnvironmentException
 from mlagents_envs.logging_util import get_logger
 
 
+# Header of each message: the channel id followed by the length of the message.
+_CHANNEL_ID_SIZE = 16
+_MESSAGE_LENGTH = struct.Struct("<i")
+
+
 class SideChannelManager:
     def __init__(self, side_channels=Optional[List[SideChannel]]):
         self._side_channels_dict = self._get_side_channels_dict(side_channels)
+        # Side channels by the bytes of their id, so that the ids of the received messages
+        # can be looked up without creating a UUID.
+        self._side_channels_by_id_bytes: Dict[bytes, SideChannel] = {
+            channel_id.bytes_le: channel
+            for channel_id, channel in self._side_channels_dict.items()
+        }
 
     def process_side_channel_message(self, data: bytes) -> None:
         """
         Separates the data received from Python into individual messages for each
-        registered side channel and calls on_message_received on them.
+        registered side channel and calls on_message_received on them. The messages
+        read directly from data, without copying it.
         :param data: The packed message sent by Unity
         """
+        # A view of bytes can be hashed like bytes to look up the channel ids. The data
+        # received from Unity is already bytes, other buffers are copied once.
+        if not isinstance(data, bytes):
+            data = bytes(data)
+        view = memoryview(data)
         offset = 0
-        while offset < len(data):
+        while offset < len(view):
             try:
-                channel_id = uuid.UUID(bytes_le=bytes(data[offset : offset + 16]))
-                offset += 16
-                (message_len,) = struct.unpack_from("<i", data, offset)
-                offset = offset + 4
-                message_data = data[offset : offset + message_len]
+                channel_id_bytes = view[offset : offset + _CHANNEL_ID_SIZE]
+                if len(channel_id_bytes) != _CHANNEL_ID_SIZE:
+                    raise ValueError("Incomplete channel id.")
+                offset += _CHANNEL_ID_SIZE
+                (message_len,) = _MESSAGE_LENGTH.unpack_from(view, offset)
+                offset = offset + _MESSAGE_LENGTH.size
+                message_data = view[offset : offset + message_len]
                 offset = offset + message_len
             except (struct.error, ValueError, IndexError):
                 raise UnityEnvironmentException(
@@ -35,14 +54,15 @@ class SideChannelManager:
                 raise UnityEnvironmentException(
                     "The message received by the side channel {} was "
                     "unexpectedly short. Make sure your Unity Environment "
-                    "sending side channel data properly.".format(channel_id)
-                )
-            if channel_id in self._side_channels_dict:
-                incoming_message = IncomingMessage(message_data)
-                self._side_channels_dict[channel_id].on_message_received(
-                    incoming_message
+                    "sending side channel data properly.".format(
+                        uuid.UUID(bytes_le=bytes(channel_id_bytes))
+                    )
                 )
+            channel = self._side_channels_by_id_bytes.get(channel_id_bytes)
+            if channel is not None:
+                channel.on_message_received(IncomingMessage(message_data))
             else:
+                channel_id = uuid.UUID(bytes_le=bytes(channel_id_bytes))
                 get_logger(__name__).warning(
                     f"Unknown side channel data received. Channel type: {channel_id}."
                 )
@@ -52,12 +72,25 @@ class SideChannelManager:
         Gathers the messages that the registered side channels will send to Unity
         and combines them into a single message ready to be sent.
         """
-        result = bytearray()
-        for channel_id, channel in self._side_channels_dict.items():
+        # Allocate the whole result at once and write the messages into it.
+        header_size = _CHANNEL_ID_SIZE + _MESSAGE_LENGTH.size
+        result = bytearray(
+            sum(
+                header_size + len(message)
+                for channel in self._side_channels_dict.values()
+                for message in channel.message_queue
+            )
+        )
+        offset = 0
+        for channel_id_bytes, channel in self._side_channels_by_id_bytes.items():
             for message in channel.message_queue:
-                result += channel_id.bytes_le
-                result += struct.pack("<i", len(message))
-                result += message
+                result[offset : offset + _CHANNEL_ID_SIZE] = channel_id_bytes
+                _MESSAGE_LENGTH.pack_into(
+                    result, offset + _CHANNEL_ID_SIZE, len(message)
+                )
+                offset += header_size
+                result[offset : offset + len(message)] = message
+                offset += len(message)
             channel.message_queue = []
         return result
 
@@ -1,5 +1,6 @@
 import os
 from unittest import mock
+from unittest.mock import ANY
 import pytest
 
 from mlagents_envs.environment import UnityEnvironment
@@ -66,6 +67,25 @@ def test_log_file_path_is_set(mock_communicator, mock_launcher):
     env.close()
 
 
+@mock.patch("mlagents_envs.env_utils.launch_executable")
+@mock.patch("mlagents_envs.environment.UnityEnvironment._get_communicator")
+def test_socket_path_is_set(mock_communicator, mock_launcher):
+    mock_communicator.return_value = MockCommunicator()
+    env = UnityEnvironment(file_name="myfile", worker_id=2, socket_path="/tmp/a.sock")
+    mock_communicator.assert_called_with(2, ANY, ANY, "/tmp/a.sock")
+    args = env._executable_args()
+    assert args[args.index("--mlagents-socket") + 1] == "/tmp/a.sock"
+    assert "--mlagents-port" not in args
+    env.close()
+
+
+@mock.patch("mlagents_envs.environment.UnityEnvironment._get_communicator")
+def test_socket_path_requires_executable(mock_communicator):
+    mock_communicator.return_value = MockCommunicator()
+    with pytest.raises(UnityEnvironmentException):
+        UnityEnvironment(file_name=None, socket_path="/tmp/a.sock")
+
+
 @mock.patch("mlagents_envs.env_utils.launch_executable")
 @mock.patch("mlagents_envs.environment.UnityEnvironment._get_communicator")
 def test_reset(mock_communicator, mock_launcher):
@@ -122,6 +142,62 @@ def test_step(mock_communicator, mock_launcher):
     assert 2 in terminal_steps
 
 
+@mock.patch("mlagents_envs.env_utils.launch_executable")
+@mock.patch("mlagents_envs.environment.UnityEnvironment._get_communicator")
+def test_begin_end_step(mock_communicator, mock_launcher):
+    communicator = MockCommunicator(discrete_action=False, visual_inputs=0)
+    mock_communicator.return_value = communicator
+    env = UnityEnvironment(" ")
+    env.step()
+    with mock.patch.object(
+        communicator, "exchange", wraps=communicator.exchange
+    ) as exchange:
+        env.begin_step()
+        # The output is only waited for in end_step.
+        exchange.assert_not_called()
+        env.end_step()
+        exchange.assert_called_once()
+        # Without a pending step, end_step does nothing.
+        env.end_step()
+        exchange.assert_called_once()
+    decision_steps, terminal_steps = env.get_steps("RealFakeBrain")
+    assert 0 in decision_steps
+    assert 2 in terminal_steps
+    env.close()
+
+
+@pytest.mark.parametrize("hybrid_actions", [False, True])
+@mock.patch("mlagents_envs.env_utils.launch_executable")
+@mock.patch("mlagents_envs.environment.UnityEnvironment._get_communicator")
+def test_generate_step_input(mock_communicator, mock_launcher, hybrid_actions):
+    mock_communicator.return_value = MockCommunicator(
+        discrete_action=False, visual_inputs=0
+    )
+    env = UnityEnvironment(" ")
+    env.academy_capabilities.hybridActions = hybrid_actions
+    spec = env.behavior_specs["RealFakeBrain"]
+    env.step()
+    n_agents = len(env.get_steps("RealFakeBrain")[0])
+    action = spec.action_spec.random_action(n_agents)
+    # The protos are reused between steps, so generate the input twice.
+    for _ in range(2):
+        step_input = env._generate_step_input({"RealFakeBrain": action})
+    agent_actions = step_input.rl_input.agent_actions["RealFakeBrain"].value
+    assert len(agent_actions) == n_agents
+    for i, agent_action in enumerate(agent_actions):
+        assert list(agent_action.continuous_actions) == action.continuous[i].tolist()
+        assert list(agent_action.discrete_actions) == action.discrete[i].tolist()
+        expected_deprecated = (
+            []
+            if hybrid_actions
+            else action.continuous[i].tolist() + action.discrete[i].tolist()
+        )
+        assert list(agent_action.vector_actions_deprecated) == expected_deprecated
+    step_input = env._generate_step_input({})
+    assert "RealFakeBrain" not in step_input.rl_input.agent_actions
+    env.close()
+
+
 @mock.patch("mlagents_envs.env_utils.launch_executable")
 @mock.patch("mlagents_envs.environment.UnityEnvironment._get_communicator")
 def test_close(mock_communicator, mock_launcher):
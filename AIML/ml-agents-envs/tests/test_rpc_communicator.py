@@ -1,4 +1,7 @@
 from unittest.mock import Mock
+import os
+import sys
+import threading
 
 import pytest
 from unittest import mock
@@ -6,12 +9,13 @@ from unittest import mock
 import grpc
 
 import mlagents_envs.rpc_communicator
-from mlagents_envs.rpc_communicator import RpcCommunicator
+from mlagents_envs.rpc_communicator import RpcCommunicator, in_process_pipe
 from mlagents_envs.exception import (
     UnityWorkerInUseException,
     UnityTimeOutException,
     UnityEnvironmentException,
 )
+from mlagents_envs.communicator_objects.command_pb2 import RESET
 from mlagents_envs.communicator_objects.unity_input_pb2 import UnityInputProto
 
 
@@ -94,3 +98,88 @@ def test_rpc_communicator_initialize_callback(
     with pytest.raises(UnityEnvironmentException):
         comm.initialize(input, poll_callback=callback)
     comm.unity_to_external.parent_conn.poll.assert_called()
+
+
+@pytest.mark.parametrize("n_ports", [1])
+@mock.patch.object(grpc, "server")
+@mock.patch.object(
+    mlagents_envs.rpc_communicator, "UnityToExternalServicerImplementation"
+)
+def test_rpc_communicator_exchange_reuses_message(
+    mock_impl: Mock, mock_grpc_server: Mock, base_port: int
+) -> None:
+    comm = RpcCommunicator(base_port=base_port, timeout_wait=0.25)
+    parent_conn = comm.unity_to_external.parent_conn
+    parent_conn.poll.return_value = True
+    parent_conn.recv.return_value.header.status = 200
+
+    inputs = comm.get_input_buffer()
+    assert comm.get_input_buffer() is inputs
+    inputs.rl_input.command = RESET
+    comm.exchange(inputs)
+    first_message = parent_conn.send.call_args[0][0]
+    # The input buffer is sent as is.
+    assert first_message.header.status == 200
+    assert first_message.unity_input is inputs
+
+    # Other inputs are copied into the same message.
+    other_inputs = UnityInputProto()
+    other_inputs.rl_input.side_channel = b"data"
+    comm.exchange(other_inputs)
+    assert parent_conn.send.call_args[0][0] is first_message
+    assert first_message.unity_input == other_inputs
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain sockets only.")
+def test_rpc_communicator_unix_socket(tmp_path) -> None:
+    socket_path = str(tmp_path / "worker-0.sock")
+    # A socket file nobody listens on is left over from a previous run.
+    open(socket_path, "w").close()
+    first_comm = RpcCommunicator(socket_path=socket_path)
+    assert os.path.exists(socket_path)
+    with pytest.raises(UnityWorkerInUseException):
+        second_comm = RpcCommunicator(socket_path=socket_path)
+        second_comm.close()
+    first_comm.close()
+    assert not os.path.exists(socket_path)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Unix domain sockets only.")
+def test_rpc_communicator_unix_socket_of_other_user(tmp_path) -> None:
+    socket_path = str(tmp_path / "worker-0.sock")
+    open(socket_path, "w").close()
+    # The socket file left over by another user can't be removed.
+    with mock.patch("os.remove", side_effect=PermissionError(socket_path)):
+        with pytest.raises(UnityWorkerInUseException):
+            RpcCommunicator(socket_path=socket_path)
+    assert os.path.exists(socket_path)
+
+
+def test_in_process_pipe() -> None:
+    parent_conn, child_conn = in_process_pipe()
+    assert not parent_conn.poll(0.01)
+
+    message = UnityInputProto()
+
+    def _respond():
+        # Messages are passed by reference, not copied.
+        assert child_conn.recv() is message
+        child_conn.send(message)
+
+    responder = threading.Thread(target=_respond)
+    responder.start()
+    parent_conn.send(message)
+    assert parent_conn.poll(5)
+    assert parent_conn.recv() is message
+    responder.join()
+
+    child_conn.send("last")
+    parent_conn.close()
+    # Pending messages can still be received after closing, then recv fails.
+    assert parent_conn.poll()
+    assert parent_conn.recv() == "last"
+    assert parent_conn.poll()
+    with pytest.raises(EOFError):
+        parent_conn.recv()
+    with pytest.raises(BrokenPipeError):
+        child_conn.send("late")
@@ -21,6 +21,7 @@ from mlagents_envs.base_env import (
     TerminalSteps,
 )
 from mlagents_envs.exception import UnityObservationException
+from mlagents_envs import rpc_utils
 from mlagents_envs.rpc_utils import (
     behavior_spec_from_proto,
     process_pixels,
@@ -276,6 +277,34 @@ def test_vector_observation():
         assert np.allclose(arr, 0.1, atol=0.01)
 
 
+@pytest.mark.parametrize("shape", [(5,), (3, 4)])
+def test_packed_float_observation(shape):
+    in_arrays = np.random.rand(4, *shape).astype(np.float32)
+    float_list, packed_list = [], []
+    for in_array in in_arrays:
+        float_ap = AgentInfoProto()
+        float_ap.observations.extend([generate_uncompressed_proto_obs(in_array)])
+        float_list.append(float_ap)
+        packed_ap = AgentInfoProto()
+        packed_ap.observations.extend(
+            [
+                ObservationProto(
+                    shape=in_array.shape,
+                    compression_type=NONE,
+                    packed_float_data=in_array.astype("<f4").tobytes(),
+                )
+            ]
+        )
+        packed_list.append(packed_ap)
+    obs_spec = create_observation_specs_with_shapes([shape])[0]
+    for ap_list in [float_list, packed_list]:
+        arr = _process_rank_one_or_two_observation(0, obs_spec, ap_list)
+        assert arr.dtype == np.float32
+        assert np.array_equal(arr, in_arrays)
+        # The observations can be modified in place.
+        arr += 1
+
+
 def test_process_visual_observation():
     shape = (3, 128, 64)
     in_array_1 = np.random.rand(*shape)
@@ -341,6 +370,56 @@ def test_process_visual_observation_padded_channels():
     assert np.allclose(arr[0, :, :, :], expected_out_array_1, atol=0.01)
 
 
+@pytest.mark.parametrize("decode_threads", [1, 4])
+def test_process_visual_observation_batch(decode_threads, monkeypatch):
+    monkeypatch.setattr(rpc_utils, "IMAGE_DECODE_THREADS", decode_threads)
+    shape = (7, 32, 16)
+    in_arrays = np.random.rand(5, *shape)
+    ap_list = []
+    for in_array in in_arrays:
+        ap = AgentInfoProto()
+        ap.observations.extend([generate_compressed_proto_obs(in_array)])
+        ap_list.append(ap)
+    obs_spec = create_observation_specs_with_shapes([shape])[0]
+    arr = _process_maybe_compressed_observation(0, obs_spec, ap_list)
+    assert arr.shape == (5,) + shape
+    assert arr.dtype == np.float32
+    assert np.allclose(arr, in_arrays, atol=0.01)
+
+
+@pytest.mark.parametrize("mapping", [[0, 1, 2], [0, 0, 0], [0, 1, -1]])
+def test_process_visual_observation_uint8(mapping):
+    in_arrays = np.random.rand(2, 3, 32, 16)
+    ap_list = []
+    for in_array in in_arrays:
+        ap = AgentInfoProto()
+        ap.observations.extend(
+            [generate_compressed_proto_obs_with_mapping(in_array, mapping)]
+        )
+        ap_list.append(ap)
+    shape = tuple(ap_list[0].observations[0].shape)
+    obs_spec = create_observation_specs_with_shapes([shape])[0]
+    float_arr = _process_maybe_compressed_observation(0, obs_spec, ap_list)
+    uint8_arr = _process_maybe_compressed_observation(
+        0, obs_spec, ap_list, uint8_visual_observations=True
+    )
+    assert uint8_arr.dtype == np.uint8
+    assert uint8_arr.shape == float_arr.shape
+    assert np.allclose(uint8_arr / 255.0, float_arr, atol=0.5 / 255)
+
+
+def test_process_visual_observation_uint8_uncompressed():
+    in_array = np.random.rand(3, 8, 4)
+    ap = AgentInfoProto()
+    ap.observations.extend([generate_uncompressed_proto_obs(in_array)])
+    obs_spec = create_observation_specs_with_shapes([in_array.shape])[0]
+    arr = _process_maybe_compressed_observation(
+        0, obs_spec, [ap], uint8_visual_observations=True
+    )
+    assert arr.dtype == np.float32
+    assert np.allclose(arr[0], in_array)
+
+
 def test_process_visual_observation_bad_shape():
     in_array_1 = np.random.rand(128, 64, 3)
     proto_obs_1 = generate_compressed_proto_obs(in_array_1)
@@ -450,6 +529,23 @@ def test_action_masking_discrete_2():
     assert masks[0][0, 0]
 
 
+def test_action_masking_discrete_partial_masks():
+    n_agents = 10
+    shapes = [(3,), (4,)]
+    behavior_spec = BehaviorSpec(
+        create_observation_specs_with_shapes(shapes), ActionSpec.create_discrete((7, 3))
+    )
+    ap_list = generate_list_agent_proto(n_agents, shapes)
+    # Masks that don't cover all the branches are ignored.
+    del ap_list[1].action_mask[:]
+    ap_list[3].action_mask.append(True)
+    decision_steps, _ = steps_from_proto(ap_list, behavior_spec)
+    masks = np.concatenate(decision_steps.action_mask, axis=1)
+    assert not masks[0].any()
+    assert not masks[1].any()
+    np.testing.assert_array_equal(masks[2], [True, False] * 5)
+
+
 def test_action_masking_continuous():
     n_agents = 10
     shapes = [(3,), (4,)]
@@ -502,3 +598,15 @@ def test_batched_step_result_from_proto_raises_on_nan():
     ap_list = generate_list_agent_proto(n_agents, shapes, nan_observations=True)
     with pytest.raises(RuntimeError):
         steps_from_proto(ap_list, behavior_spec)
+
+
+def test_batched_step_result_from_proto_raises_on_nan_group_reward():
+    n_agents = 10
+    shapes = [(3,), (4,)]
+    behavior_spec = BehaviorSpec(
+        create_observation_specs_with_shapes(shapes), ActionSpec.create_continuous(3)
+    )
+    ap_list = generate_list_agent_proto(n_agents, shapes)
+    ap_list[3].group_reward = float("nan")
+    with pytest.raises(RuntimeError, match="group_rewards"):
+        steps_from_proto(ap_list, behavior_spec)
@@ -18,6 +18,7 @@ from mlagents_envs.side_channel.stats_side_channel import (
 from mlagents_envs.exception import (
     UnitySideChannelException,
     UnityCommunicationException,
+    UnityEnvironmentException,
 )
 
 
@@ -256,3 +257,50 @@ def test_stats_channel():
     val, method = stats["stats-1"][0]
     assert val - 42.0 < 1e-8
     assert method == StatsAggregationMethod.MOST_RECENT
+
+
+def test_side_channel_manager_messages():
+    int_channel = IntChannel()
+    stats_channel = StatsSideChannel()
+    unknown_channel = RawBytesChannel(uuid.uuid4())
+    int_channel.send_int(3)
+    unknown_channel.send_raw_data(b"ignored")
+    int_channel.send_int(4)
+    data = SideChannelManager(
+        [int_channel, unknown_channel]
+    ).generate_side_channel_messages()
+    assert len(data) == 3 * (16 + 4) + 4 + len(b"ignored") + 4
+    assert int_channel.message_queue == []
+
+    message = OutgoingMessage()
+    message.write_string("stats-1")
+    message.write_float32(1.0)
+    message.write_int32(0)
+    stats_data = bytes(
+        stats_channel.channel_id.bytes_le
+        + len(message.buffer).to_bytes(4, "little")
+        + message.buffer
+    )
+    receiver = IntChannel()
+    # Messages for unknown channels are skipped.
+    SideChannelManager([receiver, stats_channel]).process_side_channel_message(
+        bytes(data) + stats_data
+    )
+    assert receiver.list_int == [3, 4]
+    assert stats_channel.get_and_reset_stats()["stats-1"] == [
+        (1.0, StatsAggregationMethod.AVERAGE)
+    ]
+
+    # The messages are read from views of the received data, and still give their
+    # buffer as bytes.
+    raw_receiver = RawBytesChannel(unknown_channel.channel_id)
+    received = []
+    raw_receiver.on_message_received = received.append
+    SideChannelManager([raw_receiver]).process_side_channel_message(bytes(data))
+    assert isinstance(received[0].view, memoryview)
+    assert received[0].get_raw_bytes() == b"ignored"
+    assert isinstance(received[0].buffer, bytes)
+    assert received[0].buffer.decode("ascii") == "ignored"
+
+    with pytest.raises(UnityEnvironmentException):
+        SideChannelManager([receiver]).process_side_channel_message(bytes(data)[:-2])
@@ -1,8 +1,12 @@
 import sys
 import numpy as np
-from typing import List, Dict, TypeVar, Generic, Tuple, Any, Union
+from typing import List, Dict, TypeVar, Generic, Tuple, Any, Union, Optional
 from collections import defaultdict, Counter
+import multiprocessing
+import multiprocessing.queues
+import multiprocessing.sharedctypes
 import queue
+import cloudpickle
 from mlagents.torch_utils import torch
 
 from mlagents_envs.base_env import (
@@ -17,7 +21,12 @@ from mlagents_envs.side_channel.stats_side_channel import (
     EnvironmentStats,
 )
 from mlagents.trainers.exception import UnityTrainerException
-from mlagents.trainers.trajectory import AgentStatus, Trajectory, AgentExperience
+from mlagents.trainers.trajectory import (
+    AgentStatus,
+    Trajectory,
+    AgentExperience,
+    ColumnarTrajectory,
+)
 from mlagents.trainers.policy import Policy
 from mlagents.trainers.action_info import ActionInfo, ActionInfoOutputs
 from mlagents.trainers.stats import StatsReporter
@@ -101,14 +110,7 @@ class AgentProcessor:
         :param previous_action: The outputs of the Policy's get_action method.
         """
         take_action_outputs = previous_action.outputs
-        if take_action_outputs:
-            try:
-                for _entropy in take_action_outputs["entropy"]:
-                    if isinstance(_entropy, torch.Tensor):
-                        _entropy = ModelUtils.to_numpy(_entropy)
-                    self._stats_reporter.add_stat("Policy/Entropy", _entropy)
-            except KeyError:
-                pass
+        self._add_action_stats(take_action_outputs)
 
         # Make unique agent_ids that are global across workers
         action_global_agent_ids = [
@@ -156,6 +158,21 @@ class AgentProcessor:
                         [_gid], take_action_outputs["action"]
                     )
 
+    def _add_action_stats(self, take_action_outputs: ActionInfoOutputs) -> None:
+        if take_action_outputs:
+            try:
+                for _entropy in take_action_outputs["entropy"]:
+                    if isinstance(_entropy, torch.Tensor):
+                        _entropy = ModelUtils.to_numpy(_entropy)
+                    self._stats_reporter.add_stat("Policy/Entropy", _entropy)
+            except KeyError:
+                pass
+            # Only present on the first actions of a new quantized policy.
+            for _divergence in take_action_outputs.get("quantization_divergence", []):
+                self._stats_reporter.add_stat(
+                    "Policy/Quantization Divergence", _divergence
+                )
+
     def _add_group_status_and_obs(
         self, step: Union[TerminalStep, DecisionStep], worker_id: int
     ) -> None:
@@ -298,8 +315,7 @@ class AgentProcessor:
                     next_group_obs=next_group_obs,
                     behavior_id=self._behavior_id,
                 )
-                for traj_queue in self._trajectory_queues:
-                    traj_queue.put(trajectory)
+                self.publish_trajectory(trajectory)
                 self._experience_buffers[global_agent_id] = []
             if terminated:
                 # Record episode length.
@@ -329,6 +345,19 @@ class AgentProcessor:
         if key in my_dictionary:
             del my_dictionary[key]
 
+    @property
+    def max_trajectory_length(self) -> int:
+        return self._max_trajectory_length
+
+    def publish_trajectory(self, trajectory: Trajectory) -> None:
+        """
+        Puts a Trajectory on all the trajectory queues of this AgentProcessor. This is also
+        used for trajectories assembled elsewhere, e.g. in environment worker processes.
+        :param trajectory: Trajectory to publish.
+        """
+        for traj_queue in self._trajectory_queues:
+            traj_queue.put(trajectory)
+
     def publish_trajectory_queue(
         self, trajectory_queue: "AgentManagerQueue[Trajectory]"
     ) -> None:
@@ -349,11 +378,357 @@ class AgentProcessor:
             self._clean_agent_data(_gid)
 
 
+class _ExperienceTable:
+    """
+    Experience data of the agents of a behavior, with one array per field and a row per
+    step. A row is allocated when an agent makes a decision, and freed once the trajectory
+    it is part of is published. The arrays are created on the first write to a field, and
+    grow when no row is free.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.columns: Dict[str, np.ndarray] = {}
+        # Stack of the free rows, the first num_free entries are valid.
+        self._free_rows = np.arange(capacity - 1, -1, -1)
+        self._num_free = capacity
+
+    def allocate(self, num_rows: int) -> np.ndarray:
+        while self._num_free < num_rows:
+            self._grow()
+        self._num_free -= num_rows
+        return self._free_rows[self._num_free : self._num_free + num_rows].copy()
+
+    def free(self, rows: np.ndarray) -> None:
+        self._free_rows[self._num_free : self._num_free + len(rows)] = rows
+        self._num_free += len(rows)
+
+    def write(self, name: str, rows: np.ndarray, values: np.ndarray) -> None:
+        values = np.asarray(values)
+        column = self.columns.get(name)
+        if column is None:
+            column = np.zeros((self.capacity,) + values.shape[1:], dtype=values.dtype)
+            self.columns[name] = column
+        column[rows] = values
+
+    def _grow(self) -> None:
+        old_capacity = self.capacity
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros((self.capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:old_capacity] = column
+            self.columns[name] = grown
+        free_rows = np.empty(self.capacity, dtype=self._free_rows.dtype)
+        free_rows[: self._num_free] = self._free_rows[: self._num_free]
+        free_rows[self._num_free : self._num_free + old_capacity] = np.arange(
+            self.capacity - 1, old_capacity - 1, -1
+        )
+        self._free_rows = free_rows
+        self._num_free += old_capacity
+
+
+class ColumnarAgentProcessor(AgentProcessor):
+    """
+    AgentProcessor that ingests the DecisionSteps and TerminalSteps as arrays. Each agent
+    gets a slot in arrays that hold its state, and the experiences of all the agents of a
+    step are written to an _ExperienceTable at once. The trajectories are published as
+    ColumnarTrajectories gathered from the table, without creating an AgentExperience per
+    step. Agent groups are not supported.
+    """
+
+    def __init__(
+        self,
+        policy: Policy,
+        behavior_id: str,
+        stats_reporter: StatsReporter,
+        max_trajectory_length: int = sys.maxsize,
+    ):
+        super().__init__(policy, behavior_id, stats_reporter, max_trajectory_length)
+        self._table = _ExperienceTable()
+        self._num_obs = 0
+        self._num_action_mask_branches = 0
+        # Slot of each agent, by worker id and agent id.
+        self._agent_slots: Dict[int, Dict[int, int]] = defaultdict(dict)
+        self._slot_global_ids: List[GlobalAgentId] = []
+        self._free_slots: List[int] = []
+        self._slot_capacity = 0
+        self._trajectory_capacity = 0
+        # Row of the last decision of each agent, -1 once it is part of the trajectory.
+        self._pending_rows = np.zeros(0, dtype=np.int64)
+        # Whether the action of the pending decision was stored.
+        self._has_action = np.zeros(0, dtype=bool)
+        self._slot_episode_rewards = np.zeros(0, dtype=np.float64)
+        self._slot_episode_steps = np.zeros(0, dtype=np.int64)
+        self._trajectory_lengths = np.zeros(0, dtype=np.int64)
+        self._trajectory_rows = np.zeros((0, 0), dtype=np.int64)
+
+    def add_experiences(
+        self,
+        decision_steps: DecisionSteps,
+        terminal_steps: TerminalSteps,
+        worker_id: int,
+        previous_action: ActionInfo,
+    ) -> None:
+        """
+        Adds the experiences of all the agents of a step.
+        :param decision_steps: current DecisionSteps.
+        :param terminal_steps: current TerminalSteps.
+        :param previous_action: The outputs of the Policy's get_action method.
+        """
+        take_action_outputs = previous_action.outputs
+        self._add_action_stats(take_action_outputs)
+        for steps in (decision_steps, terminal_steps):
+            if np.any(steps.group_id > 0):
+                raise UnityTrainerException(
+                    f"Behavior {self._behavior_id} has agent groups, which the columnar "
+                    "agent processor doesn't support. Disable columnar_agent_processor."
+                )
+
+        agent_slots = self._agent_slots[worker_id]
+        action_agent_ids = np.asarray(previous_action.agent_ids).tolist()
+        if action_agent_ids and "action" in take_action_outputs:
+            self._store_actions(
+                take_action_outputs,
+                np.array([agent_slots.get(a, -1) for a in action_agent_ids]),
+            )
+
+        self._process_steps(terminal_steps, worker_id, terminated=True)
+        self._process_steps(decision_steps, worker_id, terminated=False)
+
+        if action_agent_ids and "action" in take_action_outputs:
+            # Agents that just reset don't store their action.
+            positions = [i for i, a in enumerate(action_agent_ids) if a in agent_slots]
+            if positions:
+                self.policy.save_previous_action(
+                    [
+                        self._slot_global_ids[agent_slots[action_agent_ids[i]]]
+                        for i in positions
+                    ],
+                    ActionTuple(
+                        discrete=take_action_outputs["action"].discrete[positions]
+                    ),
+                )
+
+    def _store_actions(
+        self, take_action_outputs: ActionInfoOutputs, action_slots: np.ndarray
+    ) -> None:
+        """
+        Writes the actions taken to the rows of the pending decisions of the agents.
+        :param action_slots: Slot of the agent of each action, -1 if the agent just reset.
+        """
+        positions = np.nonzero(action_slots >= 0)[0]
+        if len(positions) == 0:
+            return
+        slots = action_slots[positions]
+        rows = self._pending_rows[slots]
+        actions = take_action_outputs["action"]
+        self._table.write("continuous_action", rows, actions.continuous[positions])
+        self._table.write("discrete_action", rows, actions.discrete[positions])
+        try:
+            log_probs = take_action_outputs["log_probs"]
+            if not isinstance(log_probs, LogProbsTuple):
+                log_probs = log_probs.to_log_probs_tuple()
+            continuous_log_probs = log_probs.continuous[positions]
+            discrete_log_probs = log_probs.discrete[positions]
+        except KeyError:
+            continuous_log_probs = np.zeros((len(positions), 0), dtype=np.float32)
+            discrete_log_probs = np.zeros((len(positions), 0), dtype=np.float32)
+        self._table.write("continuous_log_probs", rows, continuous_log_probs)
+        self._table.write("discrete_log_probs", rows, discrete_log_probs)
+        self._has_action[slots] = True
+
+    def _process_steps(
+        self,
+        steps: Union[DecisionSteps, TerminalSteps],
+        worker_id: int,
+        terminated: bool,
+    ) -> None:
+        num_agents = len(steps)
+        if num_agents == 0:
+            return
+        agent_ids = steps.agent_id.tolist()
+        agent_slots = self._agent_slots[worker_id]
+        slots = np.array([agent_slots.get(a, -1) for a in agent_ids], dtype=np.int64)
+        known = slots >= 0
+        has_experience = known.copy()
+        has_experience[known] = self._has_action[slots[known]]
+        positions = np.nonzero(has_experience)[0]
+        exp_slots = slots[positions]
+
+        # This step is the consequence of the actions taken on the pending decisions.
+        if len(positions) > 0:
+            rows = self._pending_rows[exp_slots]
+            rewards = steps.reward[positions]
+            self._table.write("reward", rows, rewards)
+            self._table.write("group_reward", rows, steps.group_reward[positions])
+            self._table.write("done", rows, np.full(len(rows), terminated))
+            self._table.write(
+                "interrupted",
+                rows,
+                steps.interrupted[positions]
+                if terminated
+                else np.zeros(len(rows), dtype=bool),
+            )
+            global_ids = [self._slot_global_ids[slot] for slot in exp_slots]
+            if self.policy.use_recurrent:
+                self._table.write(
+                    "memory", rows, self.policy.retrieve_previous_memories(global_ids)
+                )
+            self._table.write(
+                "prev_action", rows, self.policy.retrieve_previous_action(global_ids)
+            )
+            self._has_action[exp_slots] = False
+            self._pending_rows[exp_slots] = -1
+            self._append_to_trajectories(exp_slots, rows)
+            self._slot_episode_rewards[exp_slots] += rewards
+            if not terminated:
+                self._slot_episode_steps[exp_slots] += 1
+
+        if not terminated:
+            for i in np.nonzero(~known)[0]:
+                slots[i] = self._add_slot(worker_id, agent_ids[i])
+            # The decisions whose action wasn't taken are replaced in their row.
+            without_row = slots[self._pending_rows[slots] < 0]
+            self._pending_rows[without_row] = self._table.allocate(len(without_row))
+            rows = self._pending_rows[slots]
+            self._num_obs = len(steps.obs)
+            for i, obs in enumerate(steps.obs):
+                self._table.write(f"obs_{i}", rows, obs)
+            if steps.action_mask is not None:
+                self._num_action_mask_branches = len(steps.action_mask)
+                for i, mask in enumerate(steps.action_mask):
+                    self._table.write(f"action_mask_{i}", rows, mask)
+
+        # Publish the trajectories that are done or have reached the time horizon.
+        if terminated:
+            publish = np.ones(len(positions), dtype=bool)
+        else:
+            publish = self._trajectory_lengths[exp_slots] >= self._max_trajectory_length
+        for position, slot in zip(positions[publish], exp_slots[publish]):
+            self._publish_slot(slot, [obs[position] for obs in steps.obs])
+        if terminated:
+            for slot in exp_slots:
+                self._stats_reporter.add_stat(
+                    "Environment/Episode Length", self._slot_episode_steps[slot]
+                )
+            # All the agents that are done are removed, also the ones without a stored
+            # action, whose experiences can't be completed.
+            self._remove_slots(worker_id, [agent_ids[i] for i in np.nonzero(known)[0]])
+
+    def _append_to_trajectories(self, slots: np.ndarray, rows: np.ndarray) -> None:
+        lengths = self._trajectory_lengths[slots]
+        if len(lengths) > 0 and lengths.max() >= self._trajectory_capacity:
+            self._grow_trajectories()
+        self._trajectory_rows[slots, lengths] = rows
+        self._trajectory_lengths[slots] = lengths + 1
+
+    def _publish_slot(self, slot: int, next_obs: List[np.ndarray]) -> None:
+        """
+        Publishes the trajectory of an agent and frees its rows.
+        """
+        rows = self._trajectory_rows[slot, : self._trajectory_lengths[slot]]
+        columns = self._table.columns
+        action_masks: Optional[List[np.ndarray]] = None
+        if self._num_action_mask_branches > 0:
+            action_masks = [
+                columns[f"action_mask_{i}"][rows]
+                for i in range(self._num_action_mask_branches)
+            ]
+        trajectory = ColumnarTrajectory(
+            obs=[columns[f"obs_{i}"][rows] for i in range(self._num_obs)],
+            next_obs=next_obs,
+            rewards=columns["reward"][rows],
+            group_rewards=columns["group_reward"][rows],
+            dones=columns["done"][rows],
+            interrupted_steps=columns["interrupted"][rows],
+            continuous_actions=columns["continuous_action"][rows],
+            discrete_actions=columns["discrete_action"][rows],
+            continuous_log_probs=columns["continuous_log_probs"][rows],
+            discrete_log_probs=columns["discrete_log_probs"][rows],
+            action_masks=action_masks,
+            prev_actions=columns["prev_action"][rows],
+            memories=columns["memory"][rows] if "memory" in columns else None,
+            agent_id=self._slot_global_ids[slot],
+            behavior_id=self._behavior_id,
+        )
+        self._table.free(rows)
+        self._trajectory_lengths[slot] = 0
+        self.publish_trajectory(trajectory)
+
+    def _add_slot(self, worker_id: int, agent_id: int) -> int:
+        if not self._free_slots:
+            self._grow_slots()
+        slot = self._free_slots.pop()
+        self._agent_slots[worker_id][agent_id] = slot
+        self._slot_global_ids[slot] = get_global_agent_id(worker_id, agent_id)
+        return slot
+
+    def _remove_slots(self, worker_id: int, agent_ids: List[int]) -> None:
+        """
+        Removes the data of agents and frees their slots.
+        """
+        if not agent_ids:
+            return
+        agent_slots = self._agent_slots[worker_id]
+        slots = np.array([agent_slots.pop(a) for a in agent_ids], dtype=np.int64)
+        global_ids = [self._slot_global_ids[slot] for slot in slots]
+        pending_rows = self._pending_rows[slots]
+        self._table.free(pending_rows[pending_rows >= 0])
+        for slot in slots:
+            self._table.free(
+                self._trajectory_rows[slot, : self._trajectory_lengths[slot]]
+            )
+        self._pending_rows[slots] = -1
+        self._has_action[slots] = False
+        self._slot_episode_rewards[slots] = 0.0
+        self._slot_episode_steps[slots] = 0
+        self._trajectory_lengths[slots] = 0
+        self._free_slots.extend(slots.tolist())
+        self.policy.remove_previous_action(global_ids)
+        self.policy.remove_memories(global_ids)
+
+    def _grow_slots(self) -> None:
+        old_capacity = self._slot_capacity
+        self._slot_capacity = max(2 * old_capacity, 64)
+        added = self._slot_capacity - old_capacity
+
+        def _grow(array: np.ndarray, fill: Any) -> np.ndarray:
+            return np.concatenate(
+                [array, np.full((added,) + array.shape[1:], fill, dtype=array.dtype)]
+            )
+
+        self._pending_rows = _grow(self._pending_rows, -1)
+        self._has_action = _grow(self._has_action, False)
+        self._slot_episode_rewards = _grow(self._slot_episode_rewards, 0.0)
+        self._slot_episode_steps = _grow(self._slot_episode_steps, 0)
+        self._trajectory_lengths = _grow(self._trajectory_lengths, 0)
+        self._trajectory_rows = _grow(self._trajectory_rows, 0)
+        self._slot_global_ids.extend([""] * added)
+        self._free_slots.extend(range(self._slot_capacity - 1, old_capacity - 1, -1))
+
+    def _grow_trajectories(self) -> None:
+        self._trajectory_capacity = min(
+            max(2 * self._trajectory_capacity, 64), self._max_trajectory_length
+        )
+        trajectory_rows = np.zeros(
+            (self._slot_capacity, self._trajectory_capacity), dtype=np.int64
+        )
+        trajectory_rows[:, : self._trajectory_rows.shape[1]] = self._trajectory_rows
+        self._trajectory_rows = trajectory_rows
+
+    def end_episode(self) -> None:
+        """
+        Ends the episode, dropping the current trajectories of all the agents.
+        """
+        for worker_id, agent_slots in self._agent_slots.items():
+            self._remove_slots(worker_id, list(agent_slots))
+
+
 class AgentManagerQueue(Generic[T]):
     """
     Queue used by the AgentManager. Note that we make our own class here because in most implementations
-    deque is sufficient and faster. However, if we want to switch to multiprocessing, we'll need to change
-    out this implementation.
+    deque is sufficient and faster. A process-safe queue is used instead when the consumer or producer
+    runs in another process, e.g. a Trainer with learner_process enabled.
     """
 
     class Empty(Exception):
@@ -363,13 +738,26 @@ class AgentManagerQueue(Generic[T]):
 
         pass
 
-    def __init__(self, behavior_id: str, maxlen: int = 0):
+    def __init__(self, behavior_id: str, maxlen: int = 0, process_safe: bool = False):
         """
         Initializes an AgentManagerQueue. Note that we can give it a behavior_id so that it can be identified
         separately from an AgentManager.
+        :param process_safe: Whether the queue is shared with another process. Items are then pickled
+            as soon as they are put on the queue, so that later changes to them (e.g. a Policy that keeps
+            training) don't leak into the copy received by the other process.
         """
         self._maxlen: int = maxlen
-        self._queue: queue.Queue = queue.Queue(maxsize=maxlen)
+        self._process_safe = process_safe
+        self._queue: Union[queue.Queue, multiprocessing.queues.Queue] = (
+            multiprocessing.Queue(maxsize=maxlen)
+            if process_safe
+            else queue.Queue(maxsize=maxlen)
+        )
+        # multiprocessing.Queue.qsize isn't implemented on macOS, so the size of a
+        # process-safe queue is counted on the side.
+        self._size: Optional[multiprocessing.sharedctypes.Synchronized] = (
+            multiprocessing.Value("i", 0) if process_safe else None
+        )
         self._behavior_id = behavior_id
 
     @property
@@ -393,6 +781,8 @@ class AgentManagerQueue(Generic[T]):
         Returns the approximate size of the queue. Note that values may differ
         depending on the underlying queue implementation.
         """
+        if self._size is not None:
+            return self._size.value
         return self._queue.qsize()
 
     def empty(self) -> bool:
@@ -404,12 +794,29 @@ class AgentManagerQueue(Generic[T]):
         if the queue is empty.
         """
         try:
-            return self._queue.get_nowait()
+            item = self._queue.get_nowait()
         except queue.Empty:
             raise self.Empty("The AgentManagerQueue is empty.")
+        if self._size is not None:
+            with self._size.get_lock():
+                self._size.value -= 1
+        return cloudpickle.loads(item) if self._process_safe else item
 
     def put(self, item: T) -> None:
-        self._queue.put(item)
+        if self._size is not None:
+            # Counted before the item is put, so that the count never goes below zero.
+            with self._size.get_lock():
+                self._size.value += 1
+        self._queue.put(cloudpickle.dumps(item) if self._process_safe else item)
+
+    def close(self) -> None:
+        """
+        Releases a process-safe queue, without waiting for the other process to consume the
+        items still in it.
+        """
+        if self._process_safe:
+            self._queue.cancel_join_thread()
+            self._queue.close()
 
 
 class AgentManager(AgentProcessor):
@@ -425,16 +832,17 @@ class AgentManager(AgentProcessor):
         stats_reporter: StatsReporter,
         max_trajectory_length: int = sys.maxsize,
         threaded: bool = True,
+        process_safe: bool = False,
     ):
         super().__init__(policy, behavior_id, stats_reporter, max_trajectory_length)
         trajectory_queue_len = 20 if threaded else 0
         self.trajectory_queue: AgentManagerQueue[Trajectory] = AgentManagerQueue(
-            self._behavior_id, maxlen=trajectory_queue_len
+            self._behavior_id, maxlen=trajectory_queue_len, process_safe=process_safe
         )
         # NOTE: we make policy queues of infinite length to avoid lockups of the trainers.
         # In the environment manager, we make sure to empty the policy queue before continuing to produce steps.
         self.policy_queue: AgentManagerQueue[Policy] = AgentManagerQueue(
-            self._behavior_id, maxlen=0
+            self._behavior_id, maxlen=0, process_safe=process_safe
         )
         self.publish_trajectory_queue(self.trajectory_queue)
 
@@ -467,3 +875,11 @@ class AgentManager(AgentProcessor):
                     raise UnityTrainerException(
                         f"Unknown StatsAggregationMethod encountered. {agg_type}"
                     )
+
+
+class ColumnarAgentManager(AgentManager, ColumnarAgentProcessor):
+    """
+    AgentManager that processes the experiences with a ColumnarAgentProcessor.
+    """
+
+    pass
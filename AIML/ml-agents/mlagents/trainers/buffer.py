@@ -94,6 +94,18 @@ class RewardSignalUtil:
         return RewardSignalKeyPrefix.BASELINES, name
 
 
+def _padding_entry(last_entry: np.ndarray, padding_value: float) -> np.ndarray:
+    """
+    Returns the entry used to pad a sequence: its last entry multiplied by the padding value.
+    Visual observations kept as uint8 pixels are padded with uint8 entries, so that padding
+    doesn't turn the whole sequence into unnormalized floats.
+    """
+    padding = np.array(last_entry, dtype=np.float32) * padding_value
+    if getattr(last_entry, "dtype", None) == np.uint8:
+        return padding.astype(np.uint8)
+    return padding
+
+
 class AgentBufferField(list):
     """
     AgentBufferField is a list of numpy arrays, or List[np.ndarray] for group entries.
@@ -178,7 +190,7 @@ class AgentBufferField(list):
                     padding = []
                 else:
                     # We want to duplicate the last value in the array, multiplied by the padding_value.
-                    padding = np.array(self[-1], dtype=np.float32) * self.padding_value
+                    padding = _padding_entry(self[-1], self.padding_value)
                 return self[:] + [padding] * (training_length - leftover)
 
             else:
@@ -251,6 +263,338 @@ class AgentBufferField(list):
         return np.array(self)
 
 
+class ColumnarAgentBufferField:
+    """
+    ColumnarAgentBufferField stores all the entries of a field in a single preallocated numpy
+    array, instead of a list of per-step numpy arrays. The array grows geometrically as entries
+    are added. If max_length is set, the field behaves as a ring buffer: once it holds max_length
+    entries, new entries overwrite the oldest ones.
+    Group entries (List[np.ndarray]) are stored in a numpy array of dtype object.
+    A field can also be an index view on the storage of another field (see gather). The entries
+    of an index view are only gathered, with a single fancy-indexing operation, when it is
+    converted to an ndarray. Views are invalidated when the field they were taken from is modified,
+    but modifying a view never modifies the storage it was taken from.
+    """
+
+    MIN_CAPACITY = 64
+
+    def __init__(
+        self, data: Optional[List[BufferEntry]] = None, max_length: Optional[int] = None
+    ):
+        self.padding_value = 0
+        self.max_length = max_length
+        self._data: Optional[np.ndarray] = None
+        # Indices in _data of the entries, if this field is an index view.
+        self._indices: Optional[np.ndarray] = None
+        # Views don't own their storage, so it must not be written to.
+        self._owns_data = True
+        self._start = 0
+        self._length = 0
+        if data is not None:
+            self.extend(data)
+
+    @staticmethod
+    def from_array(
+        data: np.ndarray, padding_value: float = 0
+    ) -> "ColumnarAgentBufferField":
+        """
+        Creates a ColumnarAgentBufferField that uses data as its storage, without copying it.
+        The entries are copied the first time the field is modified.
+        :param data: The array of entries, with the first dimension being the entries.
+        :param padding_value: The value used to pad when get_batch is called.
+        """
+        field = ColumnarAgentBufferField()
+        field._data = data
+        field._owns_data = False
+        field._length = len(data)
+        field.padding_value = padding_value
+        return field
+
+    @staticmethod
+    def from_indices(
+        data: np.ndarray, indices: np.ndarray, padding_value: float = 0
+    ) -> "ColumnarAgentBufferField":
+        """
+        Creates a ColumnarAgentBufferField that is an index view on data. The entries are not
+        gathered until the field is converted to an ndarray or modified.
+        :param data: The array of entries, with the first dimension being the entries.
+        :param indices: The indices in data of the entries of the new field.
+        :param padding_value: The value used to pad when get_batch is called.
+        """
+        field = ColumnarAgentBufferField()
+        field._data = data
+        field._indices = indices
+        field._owns_data = False
+        field._length = len(indices)
+        field.padding_value = padding_value
+        return field
+
+    def __str__(self) -> str:
+        return f"ColumnarAgentBufferField: {self.to_ndarray()}"
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        return iter(self.to_ndarray())
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.to_ndarray()
+        return self.to_ndarray().astype(dtype, copy=False)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice) and self._indices is not None:
+            return ColumnarAgentBufferField.from_indices(
+                self._data, self._indices[index], self.padding_value
+            )
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                stop = max(start, stop)
+                if self._data is not None and self._start + stop <= len(self._data):
+                    # The entries are contiguous in memory, return a view on them.
+                    return ColumnarAgentBufferField.from_array(
+                        self._data[self._start + start : self._start + stop],
+                        self.padding_value,
+                    )
+            index = np.arange(start, stop, step)
+        if isinstance(index, (np.ndarray, list)):
+            return self.gather(np.asarray(index, dtype=np.int64))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ColumnarAgentBufferField index out of range")
+        return self._data[self._physical_indices(index)]
+
+    def gather(self, indices: np.ndarray) -> "ColumnarAgentBufferField":
+        """
+        Returns an index view that contains the entries at the given indices. No entries are
+        copied until the view is converted to an ndarray.
+        :param indices: Array of indices of the entries, relative to the oldest entry.
+        """
+        if self._data is None:
+            return ColumnarAgentBufferField()
+        return ColumnarAgentBufferField.from_indices(
+            self._data, self._physical_indices(indices), self.padding_value
+        )
+
+    def permute(self, indices: np.ndarray) -> None:
+        """
+        Reorders the entries of this field so that it contains the entries at the given indices.
+        Only the indices are stored, the entries are not moved.
+        :param indices: Array of indices of the entries, relative to the oldest entry.
+        """
+        if self._data is not None:
+            self._indices = self._physical_indices(indices)
+            self._start = 0
+            self._length = len(self._indices)
+
+    @property
+    def contains_lists(self) -> bool:
+        """
+        Checks whether this ColumnarAgentBufferField contains List[np.ndarray].
+        """
+        return self._length > 0 and self._data.dtype == object
+
+    def append(self, element: BufferEntry, padding_value: float = 0.0) -> None:
+        """
+        Adds an element to this field. Also lets you change the padding
+        type, so that it can be set on append (e.g. action_masks should
+        be padded with 1.)
+        :param element: The element to append to the field.
+        :param padding_value: The value used to pad when get_batch is called.
+        """
+        self._write(self._to_entries([element]))
+        self.padding_value = padding_value
+
+    def extend(self, data: Union[np.ndarray, List[BufferEntry]]) -> None:
+        """
+        Adds all the entries of data to this field.
+        :param data: An array, a list of BufferEntry or another field.
+        """
+        self._write(self._to_entries(data))
+
+    def set(self, data: Union[np.ndarray, List[BufferEntry]]) -> None:
+        """
+        Sets the content of this field to the input data. The storage is reused.
+        :param data: The entries to be set.
+        """
+        entries = self._to_entries(data)
+        self.reset_field()
+        self._write(entries)
+
+    def reset_field(self) -> None:
+        """
+        Resets the ColumnarAgentBufferField. The preallocated storage is kept for reuse.
+        """
+        if not self._owns_data:
+            self._data = None
+            self._owns_data = True
+        self._indices = None
+        self._start = 0
+        self._length = 0
+
+    def truncate(self, max_length: int) -> None:
+        """
+        Drops the oldest entries so that at most max_length entries remain. This does not
+        move any data.
+        :param max_length: The number of entries to keep.
+        """
+        if self._length > max_length and self._indices is not None:
+            self._indices = self._indices[self._length - max_length :]
+            self._length = max_length
+        elif self._length > max_length:
+            self._start = (self._start + self._length - max_length) % len(self._data)
+            self._length = max_length
+
+    def get_batch(
+        self,
+        batch_size: int = None,
+        training_length: Optional[int] = 1,
+        sequential: bool = True,
+    ) -> Union[np.ndarray, List[BufferEntry]]:
+        """
+        Retrieve the last batch_size elements of length training_length. See
+        AgentBufferField.get_batch. Unless the field contains lists or sequential is False, the
+        elements are returned as a single numpy array.
+        """
+        if self.contains_lists or not sequential:
+            return AgentBufferField(self).get_batch(
+                batch_size, training_length, sequential
+            )
+        if training_length is None:
+            training_length = 1
+        leftover = self._length % training_length
+        max_batch_size = self._length // training_length + 1 * (leftover != 0)
+        if batch_size is None:
+            batch_size = max_batch_size
+        if batch_size > max_batch_size:
+            raise BufferException(
+                "The batch size and training length requested for get_batch where"
+                " too large given the current number of data points."
+            )
+        if batch_size * training_length > self._length:
+            # We want to duplicate the last value in the array, multiplied by the padding_value.
+            padding = _padding_entry(self[-1], self.padding_value)
+            num_padding = training_length - leftover
+            return np.concatenate(
+                (
+                    self.to_ndarray(),
+                    np.broadcast_to(padding, (num_padding,) + padding.shape),
+                )
+            )
+        return self.to_ndarray()[self._length - batch_size * training_length :]
+
+    def padded_to_batch(
+        self, pad_value: np.float = 0, dtype: np.dtype = np.float32
+    ) -> Union[np.ndarray, List[np.ndarray]]:
+        """
+        Converts this ColumnarAgentBufferField into a numpy array with first dimension equal to
+        the length of this field. See AgentBufferField.padded_to_batch.
+        """
+        if self._length == 0 or self.contains_lists:
+            return AgentBufferField(self).padded_to_batch(pad_value, dtype)
+        return self.to_ndarray().astype(dtype, copy=False)
+
+    def to_ndarray(self) -> np.ndarray:
+        """
+        Returns the entries of this field as an ndarray, from oldest to newest. This is a view on
+        the storage unless the entries wrap around the end of the ring buffer.
+        """
+        if self._data is None:
+            return np.array([])
+        if self._indices is not None:
+            return self._data[self._indices]
+        end = self._start + self._length
+        if end <= len(self._data):
+            return self._data[self._start : end]
+        return np.concatenate(
+            (self._data[self._start :], self._data[: end - len(self._data)])
+        )
+
+    def _physical_indices(self, indices):
+        if self._indices is not None:
+            return self._indices[indices]
+        return (self._start + indices) % len(self._data)
+
+    def _materialize(self) -> None:
+        """
+        Turns a view into a field that owns its storage, so that it can be modified.
+        """
+        if self._owns_data and self._indices is None:
+            return
+        if self._indices is not None:
+            self._data = self._data[self._indices]
+        elif not self._owns_data and self._data is not None:
+            self._data = self.to_ndarray().copy()
+        self._indices = None
+        self._owns_data = True
+        self._start = 0
+
+    def _to_entries(self, data: Union[np.ndarray, List[BufferEntry]]) -> np.ndarray:
+        if isinstance(data, ColumnarAgentBufferField):
+            return data.to_ndarray()
+        if isinstance(data, np.ndarray):
+            return data
+        if len(data) > 0 and isinstance(data[0], list):
+            # Group entries have a variable number of elements, keep them as objects.
+            entries = np.empty(len(data), dtype=object)
+            for i, entry in enumerate(data):
+                entries[i] = entry
+            return entries
+        return np.asarray(data)
+
+    def _reserve(self, entries: np.ndarray) -> None:
+        """
+        Makes sure the storage can hold the current entries plus the new ones, growing it
+        (up to max_length) or promoting its dtype if needed.
+        """
+        required = self._length + len(entries)
+        if self.max_length is not None:
+            required = min(required, self.max_length)
+        if self._data is None:
+            capacity = max(required, self.MIN_CAPACITY)
+            if self.max_length is not None:
+                capacity = min(capacity, self.max_length)
+            self._data = np.empty((capacity,) + entries.shape[1:], dtype=entries.dtype)
+            self._start = 0
+            return
+        dtype = self._data.dtype
+        if not np.can_cast(entries.dtype, dtype):
+            dtype = np.result_type(dtype, entries.dtype)
+        capacity = len(self._data)
+        if required <= capacity and dtype == self._data.dtype:
+            return
+        if required > capacity:
+            capacity = max(required, 2 * capacity)
+            if self.max_length is not None:
+                capacity = min(capacity, self.max_length)
+        new_data = np.empty((capacity,) + self._data.shape[1:], dtype=dtype)
+        new_data[: self._length] = self.to_ndarray()
+        self._data = new_data
+        self._start = 0
+
+    def _write(self, entries: np.ndarray) -> None:
+        num_entries = len(entries)
+        if num_entries == 0:
+            return
+        self._materialize()
+        if self.max_length is not None and num_entries > self.max_length:
+            entries = entries[num_entries - self.max_length :]
+            num_entries = self.max_length
+        self._reserve(entries)
+        capacity = len(self._data)
+        # When the ring buffer is full, the oldest entries are overwritten.
+        overwritten = max(0, self._length + num_entries - capacity)
+        end = (self._start + self._length) % capacity
+        first_part = min(num_entries, capacity - end)
+        self._data[end : end + first_part] = entries[:first_part]
+        self._data[: num_entries - first_part] = entries[first_part:]
+        self._length += num_entries - overwritten
+        self._start = (self._start + overwritten) % capacity
+
+
 class AgentBuffer(MutableMapping):
     """
     AgentBuffer contains a dictionary of AgentBufferFields. Each agent has his own AgentBuffer.
@@ -519,3 +863,102 @@ class AgentBuffer(MutableMapping):
             return len(next(iter(self.values())))
         else:
             return 0
+
+
+class ColumnarAgentBuffer(AgentBuffer):
+    """
+    ColumnarAgentBuffer is an AgentBuffer whose fields are ColumnarAgentBufferFields, i.e. each
+    field is kept in one contiguous numpy array. Shuffling, mini-batching, sampling and truncation
+    operate on whole arrays instead of lists of per-step entries.
+    If max_length is set, every field is a ring buffer that only keeps the most recent max_length
+    experiences. max_length should then be a multiple of the sequence length used for training.
+    """
+
+    def __init__(self, max_length: Optional[int] = None):
+        super().__init__()
+        self.max_length = max_length
+        self._fields: DefaultDict[  # type: ignore
+            AgentBufferKey, ColumnarAgentBufferField
+        ] = defaultdict(self._create_field)
+
+    def _create_field(self) -> ColumnarAgentBufferField:
+        return ColumnarAgentBufferField(max_length=self.max_length)
+
+    def shuffle(
+        self, sequence_length: int, key_list: List[AgentBufferKey] = None
+    ) -> None:
+        """
+        Shuffles the fields in key_list in a consistent way: The reordering will
+        be the same across fields.
+        :param key_list: The fields that must be shuffled.
+        """
+        if key_list is None:
+            key_list = list(self._fields.keys())
+        if not self.check_length(key_list):
+            raise BufferException(
+                "Unable to shuffle if the fields are not of same length"
+            )
+        s = np.arange(len(self[key_list[0]]) // sequence_length)
+        np.random.shuffle(s)
+        sequence_starts = s * sequence_length
+        indices = (sequence_starts[:, None] + np.arange(sequence_length)).ravel()
+        # Only the permutation is computed here. The entries are gathered when
+        # mini-batches are converted to tensors.
+        for key in key_list:
+            self[key].permute(indices)
+
+    def make_mini_batch(self, start: int, end: int) -> "AgentBuffer":
+        """
+        Creates a mini-batch from buffer. The fields of the mini-batch are views on the fields
+        of this buffer, so no entries are copied until they are converted to ndarrays.
+        :param start: Starting index of buffer.
+        :param end: Ending index of buffer.
+        :return: Dict of mini batch.
+        """
+        mini_batch = ColumnarAgentBuffer()
+        for key, field in self._fields.items():
+            mini_batch[key] = field[start:end]
+        return mini_batch
+
+    def sample_mini_batch(
+        self, batch_size: int, sequence_length: int = 1
+    ) -> "AgentBuffer":
+        """
+        Creates a mini-batch from a random start and end. The fields of the mini-batch are
+        index views on the fields of this buffer.
+        :param batch_size: number of elements to withdraw.
+        :param sequence_length: Length of sequences to sample.
+            Number of sequences to sample will be batch_size/sequence_length.
+        """
+        num_seq_to_sample = batch_size // sequence_length
+        num_sequences_in_buffer = self.num_experiences // sequence_length
+        start_idxes = (
+            np.random.randint(num_sequences_in_buffer, size=num_seq_to_sample)
+            * sequence_length
+        )  # Sample random sequence starts
+        indices = (start_idxes[:, None] + np.arange(sequence_length)).ravel()
+        mini_batch = ColumnarAgentBuffer()
+        for key, field in self._fields.items():
+            mini_batch[key] = field.gather(indices)
+        return mini_batch
+
+    def load_from_file(self, file_object: BinaryIO) -> None:
+        """
+        Loads the AgentBuffer from a file-like object.
+        """
+        with h5py.File(file_object, "r") as read_file:
+            for key in list(read_file.keys()):
+                decoded_key = self._decode_key(key)
+                self[decoded_key] = self._create_field()
+                self[decoded_key].extend(read_file[key][()])
+
+    def truncate(self, max_length: int, sequence_length: int = 1) -> None:
+        """
+        Truncates the buffer to a certain length. This only moves the start of each field.
+        Note that we must truncate an integer number of sequence_lengths
+        param: max_length: The length at which to truncate the buffer.
+        """
+        max_length -= max_length % sequence_length
+        if self.num_experiences > max_length:
+            for field in self._fields.values():
+                field.truncate(max_length)
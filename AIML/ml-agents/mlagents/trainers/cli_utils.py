@@ -214,6 +214,89 @@ def _create_parser() -> argparse.ArgumentParser:
         help="The period of time --restarts-rate-limit-n applies to.",
         action=DetectDefault,
     )
+    argparser.add_argument(
+        "--shared-memory-steps",
+        default=False,
+        action=DetectDefaultStoreTrue,
+        help="Whether environment workers should return their step results through shared memory "
+        "instead of pickling them through a queue. This reduces the load on the trainer process "
+        "when running many environments with visual observations.",
+    )
+    argparser.add_argument(
+        "--batch-inference",
+        default=False,
+        action=DetectDefaultStoreTrue,
+        help="Whether to decide the actions of all the environments that are ready with a single "
+        "policy evaluation per behavior, instead of one evaluation per environment.",
+    )
+    argparser.add_argument(
+        "--batch-inference-wait-s",
+        default=0.0,
+        type=float,
+        help="With --batch-inference, how long to wait for more environments to finish their step "
+        "once the first one has, so that they can be batched together.",
+        action=DetectDefault,
+    )
+    argparser.add_argument(
+        "--min-ready-envs",
+        default=1,
+        type=int,
+        help="The number of environments that must have finished their step before their results "
+        "are processed. Higher values give larger batches at the cost of latency.",
+        action=DetectDefault,
+    )
+    argparser.add_argument(
+        "--worker-inference",
+        default=False,
+        action=DetectDefaultStoreTrue,
+        help="Whether each environment process should hold a CPU copy of the policies, decide its "
+        "own actions and send back completed trajectories. The policies' weights are sent to the "
+        "environment processes whenever a trainer updates them. --batch-inference is ignored in "
+        "this mode.",
+    )
+    argparser.add_argument(
+        "--uint8-visual-observations",
+        default=False,
+        action=DetectDefaultStoreTrue,
+        help="Whether to keep compressed visual observations as uint8 pixels from their decoding "
+        "through the trajectories and the update buffers. They are only converted to floats by the "
+        "visual encoders, which uses a quarter of the memory for camera observations.",
+    )
+    argparser.add_argument(
+        "--envs-per-worker",
+        default=1,
+        type=int,
+        help="The number of environments hosted by each environment process. The environments "
+        "of a process are stepped at the same time and their results are sent back together, "
+        "which saves the memory and the context switches of one Python process per environment.",
+        action=DetectDefault,
+    )
+    argparser.add_argument(
+        "--unix-socket",
+        default=False,
+        action=DetectDefaultStoreTrue,
+        help="Whether to communicate with the environment executables over Unix domain sockets "
+        "named after the run id and the worker id instead of TCP ports, which avoids the loopback "
+        "network stack and port collisions between runs. Not supported on Windows or in the Editor.",
+    )
+    argparser.add_argument(
+        "--incremental-reset",
+        default=False,
+        action=DetectDefaultStoreTrue,
+        help="Whether training should resume as soon as min_ready_envs environments have reset, "
+        "instead of waiting for all of them. The environments that reset later join the training "
+        "when they are done.",
+    )
+    argparser.add_argument(
+        "--spare-workers",
+        default=0,
+        type=int,
+        help="The number of environment workers started ahead of time, which take the place "
+        "of the workers whose environment exits so that training resumes without waiting for "
+        "a new environment to start. The restarts are still limited by max_lifetime_restarts "
+        "and the rate limits.",
+        action=DetectDefault,
+    )
     argparser.add_argument(
         "--torch",
         default=False,
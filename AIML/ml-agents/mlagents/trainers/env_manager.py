@@ -43,6 +43,14 @@ class EnvManager(ABC):
         self.first_step_infos: List[EnvironmentStep] = []
 
     def set_policy(self, brain_name: BehaviorName, policy: Policy) -> None:
+        current_policy = self.policies.get(brain_name)
+        if current_policy is not None and current_policy is not policy:
+            # A trainer in another process sends a new copy of its policy. Its weights
+            # are loaded into the current policy, which keeps the memories and previous
+            # actions of the agents that are acting.
+            current_policy.load_weights(policy.get_weights())
+            return
+        policy.refresh_inference()
         self.policies[brain_name] = policy
         if brain_name in self.agent_managers:
             self.agent_managers[brain_name].policy = policy
@@ -3,6 +3,9 @@ from mlagents import torch_utils
 import yaml
 
 import os
+import hashlib
+import re
+import tempfile
 import numpy as np
 import json
 
@@ -94,8 +97,11 @@ def run_training(run_seed: int, options: RunOptions, num_areas: int) -> None:
         for sw in stats_writers:
             StatsReporter.add_writer(sw)
 
+        socket_path_prefix: Optional[str] = None
         if env_settings.env_path is None:
             port = None
+        elif env_settings.unix_socket:
+            socket_path_prefix = get_socket_path_prefix(checkpoint_settings.run_id)
         env_factory = create_environment_factory(
             env_settings.env_path,
             engine_settings.no_graphics,
@@ -106,6 +112,8 @@ def run_training(run_seed: int, options: RunOptions, num_areas: int) -> None:
             port,
             env_settings.env_args,
             os.path.abspath(run_logs_dir),  # Unity environment requires absolute path
+            env_settings.uint8_visual_observations,
+            socket_path_prefix,
         )
 
         env_manager = SubprocessEnvManager(env_factory, options, env_settings.num_envs)
@@ -182,12 +190,17 @@ def create_environment_factory(
     start_port: Optional[int],
     env_args: Optional[List[str]],
     log_folder: str,
+    uint8_visual_observations: bool = False,
+    socket_path_prefix: Optional[str] = None,
 ) -> Callable[[int, List[SideChannel]], BaseEnv]:
     def create_unity_environment(
         worker_id: int, side_channels: List[SideChannel]
     ) -> UnityEnvironment:
         # Make sure that each environment gets a different seed
         env_seed = seed + worker_id
+        socket_path: Optional[str] = None
+        if socket_path_prefix is not None:
+            socket_path = f"{socket_path_prefix}-{worker_id}.sock"
         return UnityEnvironment(
             file_name=env_path,
             worker_id=worker_id,
@@ -200,11 +213,25 @@ def create_environment_factory(
             side_channels=side_channels,
             log_folder=log_folder,
             timeout_wait=timeout_wait,
+            uint8_visual_observations=uint8_visual_observations,
+            socket_path=socket_path,
         )
 
     return create_unity_environment
 
 
+def get_socket_path_prefix(run_id: str) -> str:
+    """
+    Returns the prefix of the Unix domain socket paths of the environments of a run, in the
+    temporary directory. Long run ids are hashed since socket paths are limited to about a
+    hundred characters, and so are the ones with characters that aren't safe in a file name.
+    """
+    name = f"mlagents-{run_id}"
+    if len(name) > 32 or not re.fullmatch(r"[A-Za-z0-9_.-]+", run_id):
+        name = "mlagents-" + hashlib.sha1(run_id.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), name)
+
+
 def run_cli(options: RunOptions) -> None:
     try:
         print(
@@ -169,9 +169,9 @@ class TorchOptimizer(Optimizer):
 
         # Convert to tensors
         current_obs = [
-            ModelUtils.list_to_tensor(obs) for obs in ObsUtil.from_buffer(batch, n_obs)
+            ModelUtils.obs_to_tensor(obs) for obs in ObsUtil.from_buffer(batch, n_obs)
         ]
-        next_obs = [ModelUtils.list_to_tensor(obs) for obs in next_obs]
+        next_obs = [ModelUtils.obs_to_tensor(obs) for obs in next_obs]
 
         next_obs = [obs.unsqueeze(0) for obs in next_obs]
 
@@ -266,7 +266,7 @@ class TorchPOCAOptimizer(TorchOptimizer):
         n_obs = len(self.policy.behavior_spec.observation_specs)
         current_obs = ObsUtil.from_buffer(batch, n_obs)
         # Convert to tensors
-        current_obs = [ModelUtils.list_to_tensor(obs) for obs in current_obs]
+        current_obs = [ModelUtils.obs_to_tensor(obs) for obs in current_obs]
         groupmate_obs = GroupObsUtil.from_buffer(batch, n_obs)
         groupmate_obs = [
             [ModelUtils.list_to_tensor(obs) for obs in _groupmate_obs]
@@ -581,7 +581,7 @@ class TorchPOCAOptimizer(TorchOptimizer):
         current_obs = ObsUtil.from_buffer(batch, n_obs)
         groupmate_obs = GroupObsUtil.from_buffer(batch, n_obs)
 
-        current_obs = [ModelUtils.list_to_tensor(obs) for obs in current_obs]
+        current_obs = [ModelUtils.obs_to_tensor(obs) for obs in current_obs]
         groupmate_obs = [
             [ModelUtils.list_to_tensor(obs) for obs in _groupmate_obs]
             for _groupmate_obs in groupmate_obs
@@ -589,11 +589,11 @@ class TorchPOCAOptimizer(TorchOptimizer):
 
         groupmate_actions = AgentAction.group_from_buffer(batch)
 
-        next_obs = [ModelUtils.list_to_tensor(obs) for obs in next_obs]
+        next_obs = [ModelUtils.obs_to_tensor(obs) for obs in next_obs]
         next_obs = [obs.unsqueeze(0) for obs in next_obs]
 
         next_groupmate_obs = [
-            ModelUtils.list_to_tensor_list(_list_obs)
+            [ModelUtils.obs_to_tensor(obs) for obs in _list_obs]
             for _list_obs in next_groupmate_obs
         ]
         # Expand dimensions of next critic obs
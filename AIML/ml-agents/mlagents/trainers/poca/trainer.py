@@ -76,7 +76,7 @@ class POCATrainer(OnPolicyTrainer):
         super()._process_trajectory(trajectory)
         agent_id = trajectory.agent_id  # All the agents should have the same ID
 
-        agent_buffer_trajectory = trajectory.to_agentbuffer()
+        agent_buffer_trajectory = self._trajectory_to_agentbuffer(trajectory)
         # Update the normalization
         if self.is_training:
             self.policy.actor.update_normalization(agent_buffer_trajectory)
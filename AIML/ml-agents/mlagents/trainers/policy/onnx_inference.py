@@ -0,0 +1,196 @@
+import copy
+import io
+import threading
+import warnings
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from mlagents.torch_utils import torch, nn
+from mlagents_envs.logging_util import get_logger
+from mlagents.trainers.policy.policy import UnityPolicyException
+from mlagents.trainers.torch_entities.model_serialization import (
+    TensorNames,
+    onnx_export_kwargs,
+    onnx_export_lock,
+)
+
+logger = get_logger(__name__)
+
+
+class OnnxActingModel:
+    """
+    Runs the acting graph of a policy with ONNX Runtime on the CPU. The graph is exported
+    for each batch size it is run with. When the weights of the policy change, the graph
+    is exported again from a copy of it in a background thread, and the new models
+    replace the current ones once they are all ready.
+    """
+
+    OUTPUT_NAMES = [
+        TensorNames.continuous_action_output,
+        "env_continuous_actions",
+        TensorNames.discrete_action_output,
+        "continuous_log_probs",
+        "discrete_log_probs",
+        "entropy",
+        TensorNames.recurrent_output,
+    ]
+    # The policy models are exported with an older opset for Sentis. With it, the
+    # gathers computing the discrete log probs aren't exported correctly.
+    OPSET_VERSION = 15
+
+    def __init__(self, acting_graph: nn.Module, num_obs: int):
+        """
+        :param acting_graph: Module taking the list of observations, the action masks and
+            the memories, and returning the tensors named in OUTPUT_NAMES.
+        :param num_obs: Number of observations of the policy.
+        """
+        try:
+            import onnxruntime  # noqa F401
+        except ImportError:
+            raise UnityPolicyException(
+                "onnx_inference requires the onnxruntime package. "
+                "Install it with `pip install mlagents[onnxruntime]`."
+            )
+        self.acting_graph = acting_graph
+        self.input_names = [TensorNames.get_observation_name(i) for i in range(num_obs)]
+        self.input_names += [
+            TensorNames.action_mask_placeholder,
+            TensorNames.recurrent_in_placeholder,
+        ]
+        self._init_sessions()
+
+    def _init_sessions(self) -> None:
+        # Session of each batch size, with the names of the inputs it takes.
+        self._sessions: Dict[int, Tuple[Any, List[str]]] = {}
+        # Zeroed inputs of each batch size, to export the graph again.
+        self._example_inputs: Dict[int, List[torch.Tensor]] = {}
+        self._lock = threading.Lock()
+        self._export_thread: Optional[threading.Thread] = None
+        self._pending_graph: Optional[nn.Module] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sessions and threads can't be pickled. The models are exported again when
+        # needed.
+        return {
+            "acting_graph": self.acting_graph,
+            "input_names": self.input_names,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_sessions()
+
+    def run(self, inputs: List[torch.Tensor]) -> List[np.ndarray]:
+        """
+        :param inputs: The observations, action masks and memories, in that order.
+        :return: The outputs named in OUTPUT_NAMES.
+        """
+        batch_size = inputs[0].shape[0]
+        with self._lock:
+            session = self._sessions.get(batch_size)
+        if session is None:
+            session = self._create_session(self.acting_graph, inputs)
+            with self._lock:
+                self._sessions[batch_size] = session
+                self._example_inputs[batch_size] = [
+                    torch.zeros_like(value) for value in inputs
+                ]
+        session, session_inputs = session
+        feed = {
+            name: value.cpu().numpy()
+            for name, value in zip(self.input_names, inputs)
+            if name in session_inputs
+        }
+        return session.run(None, feed)
+
+    def refresh(self) -> None:
+        """
+        Exports the current acting graph again for every batch size already run, in a
+        background thread.
+        """
+        with self._lock:
+            if not self._sessions:
+                return
+            self._pending_graph = copy.deepcopy(self.acting_graph)
+            if self._export_thread is None:
+                self._export_thread = threading.Thread(
+                    target=self._export_pending_graphs, daemon=True
+                )
+                self._export_thread.start()
+
+    def wait_for_refresh(self, timeout: Optional[float] = None) -> None:
+        """
+        Waits until the models being exported replace the current ones.
+        """
+        thread = self._export_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _export_pending_graphs(self) -> None:
+        while True:
+            with self._lock:
+                acting_graph = self._pending_graph
+                self._pending_graph = None
+                if acting_graph is None:
+                    self._export_thread = None
+                    return
+                example_inputs = dict(self._example_inputs)
+            try:
+                sessions = {
+                    batch_size: self._create_session(acting_graph, inputs)
+                    for batch_size, inputs in example_inputs.items()
+                }
+            except Exception as e:
+                logger.warning(f"Could not export the acting graph to ONNX: {e}")
+                continue
+            with self._lock:
+                self._sessions.update(sessions)
+
+    def _create_session(
+        self, acting_graph: nn.Module, inputs: List[torch.Tensor]
+    ) -> Tuple[Any, List[str]]:
+        import onnxruntime
+
+        model = io.BytesIO()
+        # Exports hold the same lock as the exports of the policy models, but without
+        # the export flag so that the layout of the memories is the one of the trainer.
+        with onnx_export_lock(), torch.no_grad(), warnings.catch_warnings():
+            # nn.LSTM checks the shapes of its inputs in Python, and each model is only
+            # run with the batch size it is exported with.
+            warnings.filterwarnings(
+                "ignore",
+                category=torch.jit.TracerWarning,
+                module=r"torch\.nn\.modules\.rnn",
+            )
+            warnings.filterwarnings(
+                "ignore",
+                message="Exporting a model to ONNX with a batch_size other than 1",
+                category=UserWarning,
+            )
+            # The TorchScript-based exporter is selected by onnx_export_kwargs.
+            warnings.filterwarnings(
+                "ignore",
+                message="You are using the legacy TorchScript-based ONNX export",
+                category=DeprecationWarning,
+            )
+            warnings.filterwarnings(
+                "ignore", category=DeprecationWarning, module=r"torch\.onnx"
+            )
+            torch.onnx.export(
+                acting_graph,
+                (list(inputs[:-2]), inputs[-2], inputs[-1]),
+                model,
+                opset_version=self.OPSET_VERSION,
+                input_names=self.input_names,
+                output_names=self.OUTPUT_NAMES,
+                **onnx_export_kwargs(),
+            )
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        session = onnxruntime.InferenceSession(
+            model.getvalue(), options, providers=["CPUExecutionProvider"]
+        )
+        # Empty inputs, such as the memories of a policy without memory, are removed
+        # from the exported graph.
+        return session, [value.name for value in session.get_inputs()]
@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 
 from mlagents_envs.base_env import ActionTuple, BehaviorSpec, DecisionSteps
@@ -18,6 +18,96 @@ class UnityPolicyException(UnityException):
     pass
 
 
+class AgentSlotTable:
+    """
+    Maps global agent ids to rows of preallocated arrays, so that the values of many
+    agents are read and written with a single fancy-indexing operation. The rows of
+    removed agents are zeroed and reused, and the arrays double in size when they run
+    out of rows.
+    """
+
+    def __init__(
+        self, columns: Dict[str, Tuple[int, type]], initial_capacity: int = 16
+    ):
+        """
+        :param columns: Width and dtype of each column of the table.
+        :param initial_capacity: Number of rows allocated up front.
+        """
+        self._capacity = initial_capacity
+        self._rows: Dict[GlobalAgentId, int] = {}
+        # Stack of free rows, lowest row on top.
+        self._free_rows: List[int] = list(range(initial_capacity - 1, -1, -1))
+        self.columns: Dict[str, np.ndarray] = {
+            name: np.zeros((initial_capacity, width), dtype=dtype)
+            for name, (width, dtype) in columns.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, agent_id: GlobalAgentId) -> bool:
+        return agent_id in self._rows
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def rows(self, agent_ids: Sequence[GlobalAgentId]) -> np.ndarray:
+        """
+        :return: The row of each agent, or -1 for the agents without one.
+        """
+        get_row = self._rows.get
+        return np.fromiter(
+            (get_row(agent_id, -1) for agent_id in agent_ids),
+            dtype=np.int64,
+            count=len(agent_ids),
+        )
+
+    def allocate(self, agent_ids: Sequence[GlobalAgentId]) -> np.ndarray:
+        """
+        :return: The row of each agent, allocating a zeroed row for the new agents.
+        """
+        rows = self.rows(agent_ids)
+        new_indices = np.flatnonzero(rows < 0)
+        if len(new_indices) > len(self._free_rows):
+            self._grow(len(self._rows) + len(new_indices))
+        for index in new_indices:
+            agent_id = agent_ids[index]
+            if agent_id not in self._rows:
+                self._rows[agent_id] = self._free_rows.pop()
+            rows[index] = self._rows[agent_id]
+        return rows
+
+    def gather(self, column: str, agent_ids: Sequence[GlobalAgentId]) -> np.ndarray:
+        """
+        :return: The values of the agents in the column, zeros for the agents without a
+            row.
+        """
+        rows = self.rows(agent_ids)
+        data = self.columns[column]
+        values = np.zeros((len(rows), data.shape[1]), dtype=data.dtype)
+        found = rows >= 0
+        values[found] = data[rows[found]]
+        return values
+
+    def free(self, agent_ids: Sequence[GlobalAgentId]) -> None:
+        rows = [self._rows.pop(agent_id) for agent_id in agent_ids if agent_id in self]
+        if rows:
+            for data in self.columns.values():
+                data[rows] = 0
+            self._free_rows.extend(rows)
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = max(2 * self._capacity, min_capacity)
+        for name, data in self.columns.items():
+            grown = np.zeros((capacity,) + data.shape[1:], dtype=data.dtype)
+            grown[: self._capacity] = data
+            self.columns[name] = grown
+        # The new rows go under the free ones, so that the lowest rows are reused first.
+        self._free_rows[:0] = range(capacity - 1, self._capacity - 1, -1)
+        self._capacity = capacity
+
+
 class Policy:
     def __init__(
         self,
@@ -28,9 +118,6 @@ class Policy:
         self.behavior_spec = behavior_spec
         self.network_settings: NetworkSettings = network_settings
         self.seed = seed
-        self.previous_action_dict: Dict[str, np.ndarray] = {}
-        self.previous_memory_dict: Dict[str, np.ndarray] = {}
-        self.memory_dict: Dict[str, np.ndarray] = {}
         self.normalize = network_settings.normalize
         self.use_recurrent = self.network_settings.memory is not None
         self.m_size = 0
@@ -38,6 +125,15 @@ class Policy:
         if self.use_recurrent:
             self.m_size = self.network_settings.memory.memory_size
             self.sequence_length = self.network_settings.memory.sequence_length
+        self.memory_slots = AgentSlotTable(
+            {
+                "memory": (self.m_size, np.float32),
+                "previous_memory": (self.m_size, np.float32),
+            }
+        )
+        self.previous_action_slots = AgentSlotTable(
+            {"previous_action": (behavior_spec.action_spec.discrete_size, np.int32)}
+        )
 
     def make_empty_memory(self, num_agents):
         """
@@ -53,34 +149,20 @@ class Policy:
         if memory_matrix is None:
             return
 
-        # Pass old memories into previous_memory_dict
-        for agent_id in agent_ids:
-            if agent_id in self.memory_dict:
-                self.previous_memory_dict[agent_id] = self.memory_dict[agent_id]
-
-        for index, agent_id in enumerate(agent_ids):
-            self.memory_dict[agent_id] = memory_matrix[index, :]
+        # Pass old memories into previous memories. New agents start from zeroed rows.
+        rows = self.memory_slots.allocate(agent_ids)
+        memories = self.memory_slots.columns
+        memories["previous_memory"][rows] = memories["memory"][rows]
+        memories["memory"][rows] = memory_matrix
 
     def retrieve_memories(self, agent_ids: List[GlobalAgentId]) -> np.ndarray:
-        memory_matrix = np.zeros((len(agent_ids), self.m_size), dtype=np.float32)
-        for index, agent_id in enumerate(agent_ids):
-            if agent_id in self.memory_dict:
-                memory_matrix[index, :] = self.memory_dict[agent_id]
-        return memory_matrix
+        return self.memory_slots.gather("memory", agent_ids)
 
     def retrieve_previous_memories(self, agent_ids: List[GlobalAgentId]) -> np.ndarray:
-        memory_matrix = np.zeros((len(agent_ids), self.m_size), dtype=np.float32)
-        for index, agent_id in enumerate(agent_ids):
-            if agent_id in self.previous_memory_dict:
-                memory_matrix[index, :] = self.previous_memory_dict[agent_id]
-        return memory_matrix
+        return self.memory_slots.gather("previous_memory", agent_ids)
 
     def remove_memories(self, agent_ids: List[GlobalAgentId]) -> None:
-        for agent_id in agent_ids:
-            if agent_id in self.memory_dict:
-                self.memory_dict.pop(agent_id)
-            if agent_id in self.previous_memory_dict:
-                self.previous_memory_dict.pop(agent_id)
+        self.memory_slots.free(agent_ids)
 
     def make_empty_previous_action(self, num_agents: int) -> np.ndarray:
         """
@@ -95,26 +177,44 @@ class Policy:
     def save_previous_action(
         self, agent_ids: List[GlobalAgentId], action_tuple: ActionTuple
     ) -> None:
-        for index, agent_id in enumerate(agent_ids):
-            self.previous_action_dict[agent_id] = action_tuple.discrete[index, :]
+        # The action of the agent at each index of agent_ids, as with the ActionTuple
+        # of a whole step.
+        rows = self.previous_action_slots.allocate(agent_ids)
+        previous_actions = self.previous_action_slots.columns["previous_action"]
+        previous_actions[rows] = action_tuple.discrete[: len(agent_ids)]
 
     def retrieve_previous_action(self, agent_ids: List[GlobalAgentId]) -> np.ndarray:
-        action_matrix = self.make_empty_previous_action(len(agent_ids))
-        for index, agent_id in enumerate(agent_ids):
-            if agent_id in self.previous_action_dict:
-                action_matrix[index, :] = self.previous_action_dict[agent_id]
-        return action_matrix
+        return self.previous_action_slots.gather("previous_action", agent_ids)
 
     def remove_previous_action(self, agent_ids: List[GlobalAgentId]) -> None:
-        for agent_id in agent_ids:
-            if agent_id in self.previous_action_dict:
-                self.previous_action_dict.pop(agent_id)
+        self.previous_action_slots.free(agent_ids)
 
     def get_action(
         self, decision_requests: DecisionSteps, worker_id: int = 0
     ) -> ActionInfo:
         raise NotImplementedError
 
+    def refresh_inference(self) -> None:
+        """
+        Called when a new version of the policy is received from its trainer, to update
+        anything derived from its weights for inference.
+        """
+        pass
+
+    def get_actions(
+        self, decision_requests: List[DecisionSteps], worker_ids: List[int]
+    ) -> List[ActionInfo]:
+        """
+        Decides actions for the DecisionSteps of several environment workers.
+        :param decision_requests: DecisionSteps of each worker.
+        :param worker_ids: Id of the worker each DecisionSteps comes from.
+        :return: An ActionInfo for each of the DecisionSteps.
+        """
+        return [
+            self.get_action(decision_steps, worker_id)
+            for decision_steps, worker_id in zip(decision_requests, worker_ids)
+        ]
+
     @staticmethod
     def check_nan_action(action: Optional[ActionTuple]) -> None:
         # Fast NaN check on the action
@@ -1,21 +1,73 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 import numpy as np
-from mlagents.torch_utils import torch, default_device
+from mlagents.torch_utils import torch, nn, default_device
 import copy
+import warnings
 
 from mlagents.trainers.action_info import ActionInfo
 from mlagents.trainers.behavior_id_utils import get_global_agent_id
 from mlagents.trainers.policy import Policy
-from mlagents_envs.base_env import DecisionSteps, BehaviorSpec
+from mlagents.trainers.policy.onnx_inference import OnnxActingModel
+from mlagents_envs.base_env import ActionTuple, DecisionSteps, BehaviorSpec
+from mlagents_envs.logging_util import get_logger
 from mlagents_envs.timers import timed
 
 from mlagents.trainers.settings import NetworkSettings
-from mlagents.trainers.torch_entities.networks import GlobalSteps
+from mlagents.trainers.torch_entities.action_log_probs import LogProbsTuple
+from mlagents.trainers.torch_entities.networks import GlobalSteps, SimpleActor
 
 from mlagents.trainers.torch_entities.utils import ModelUtils
 
 EPSILON = 1e-7  # Small value to avoid divide by zero
 
+logger = get_logger(__name__)
+
+
+class _ActingGraph(nn.Module):
+    """
+    The sampling of actions by a SimpleActor, with only tensors as outputs so that it can
+    be traced. Parts of the outputs that don't exist for the actor are empty tensors.
+    """
+
+    def __init__(self, actor: SimpleActor, use_masks: bool):
+        super().__init__()
+        self.actor = actor
+        self.use_masks = use_masks
+
+    def forward(
+        self, inputs: List[torch.Tensor], masks: torch.Tensor, memories: torch.Tensor
+    ) -> Tuple[torch.Tensor, ...]:
+        encoding, memories = self.actor.network_body(
+            inputs, memories=memories, sequence_length=1
+        )
+        action, log_probs, entropy = self.actor.action_model(
+            encoding, masks if self.use_masks else None
+        )
+        empty = torch.zeros((encoding.shape[0], 0))
+        continuous = empty
+        env_continuous = empty
+        continuous_log_probs = empty
+        if action.continuous_tensor is not None:
+            continuous = action.continuous_tensor
+            env_continuous = continuous
+            if self.actor.action_model.clip_action:
+                env_continuous = torch.clamp(continuous, -3, 3) / 3
+            continuous_log_probs = log_probs.continuous_tensor
+        discrete = empty
+        discrete_log_probs = empty
+        if action.discrete_list is not None:
+            discrete = action.discrete_tensor[:, 0, :]
+            discrete_log_probs = log_probs.discrete_tensor
+        return (
+            continuous,
+            env_continuous,
+            discrete,
+            continuous_log_probs,
+            discrete_log_probs,
+            entropy,
+            memories if memories is not None else empty,
+        )
+
 
 class TorchPolicy(Policy):
     def __init__(
@@ -60,6 +112,55 @@ class TorchPolicy(Policy):
 
         self.actor.to(default_device())
 
+        # Traced acting graphs, by batch size bucket.
+        self.jit_inference = network_settings.jit_inference
+        self._acting_graphs: Dict[int, torch.jit.ScriptModule] = {}
+        self._onnx_model: Optional[OnnxActingModel] = None
+        if network_settings.onnx_inference:
+            self._onnx_model = OnnxActingModel(
+                _ActingGraph(self.actor, behavior_spec.action_spec.discrete_size > 0),
+                len(behavior_spec.observation_specs),
+            )
+        # Acting copy of the actor with int8 linear layers, made again when the policy is
+        # updated. Not used with ONNX Runtime, which runs the exported float actor.
+        self.quantized_inference = (
+            network_settings.quantized_inference and self._onnx_model is None
+        )
+        self._quantized_actor: Optional[SimpleActor] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Traced graphs can't be pickled. They, and the quantized actor, are made again
+        # when needed.
+        state = self.__dict__.copy()
+        state["_acting_graphs"] = {}
+        state["_quantized_actor"] = None
+        return state
+
+    @property
+    def acting_actor(self) -> SimpleActor:
+        """
+        The actor that picks the actions, which is the quantized copy of the actor with
+        quantized_inference. Dynamic quantization only runs on the CPU, so the actor
+        itself is used when the policy runs on another device.
+        """
+        if (
+            self.quantized_inference
+            and self._quantized_actor is None
+            and default_device().type != "cpu"
+        ):
+            logger.warning(
+                "quantized_inference only runs on the CPU, the policy picks its actions "
+                f"with its unquantized actor on {default_device()}."
+            )
+            self.quantized_inference = False
+        if not self.quantized_inference:
+            return self.actor
+        if self._quantized_actor is None:
+            self._quantized_actor = torch.ao.quantization.quantize_dynamic(
+                copy.deepcopy(self.actor), {nn.Linear}, dtype=torch.qint8
+            )
+        return self._quantized_actor
+
     @property
     def export_memory_size(self) -> int:
         """
@@ -96,19 +197,167 @@ class TorchPolicy(Policy):
         memories = torch.as_tensor(self.retrieve_memories(global_agent_ids)).unsqueeze(
             0
         )
+        # Measure the divergence of each new quantized actor on its first agents.
+        divergence = None
+        if self.quantized_inference and self._quantized_actor is None:
+            divergence = self._quantization_divergence(tensor_obs, masks, memories)
+        if self._onnx_model is not None or self.jit_inference:
+            run_out = self._evaluate_acting_graph(tensor_obs, masks, memories)
+        else:
+            with torch.no_grad():
+                action, run_out, memories = self.acting_actor.get_action_and_stats(
+                    tensor_obs, masks=masks, memories=memories
+                )
+            run_out["action"] = action.to_action_tuple()
+            if "log_probs" in run_out:
+                run_out["log_probs"] = run_out["log_probs"].to_log_probs_tuple()
+            if "entropy" in run_out:
+                run_out["entropy"] = ModelUtils.to_numpy(run_out["entropy"])
+            if self.use_recurrent:
+                run_out["memory_out"] = ModelUtils.to_numpy(memories).squeeze(0)
+        if divergence is not None:
+            run_out["quantization_divergence"] = divergence
+        return run_out
+
+    def _quantization_divergence(
+        self,
+        tensor_obs: List[torch.Tensor],
+        masks: Optional[torch.Tensor],
+        memories: torch.Tensor,
+    ) -> Optional[np.ndarray]:
+        """
+        Computes the KL divergence of the action distributions of the quantized actor
+        from the ones of the actor, for each agent.
+        :return: The divergences, or None if the actor isn't quantized.
+        """
+        quantized_actor = self.acting_actor
+        if quantized_actor is self.actor:
+            return None
         with torch.no_grad():
-            action, run_out, memories = self.actor.get_action_and_stats(
-                tensor_obs, masks=masks, memories=memories
+            encoding, _ = self.actor.network_body(tensor_obs, memories=memories)
+            quantized_encoding, _ = quantized_actor.network_body(
+                tensor_obs, memories=memories
+            )
+            divergence = self.actor.action_model.kl_divergence(
+                encoding, masks, quantized_actor.action_model, quantized_encoding
+            )
+        return ModelUtils.to_numpy(divergence)
+
+    def _evaluate_acting_graph(
+        self,
+        tensor_obs: List[torch.Tensor],
+        masks: Optional[torch.Tensor],
+        memories: torch.Tensor,
+    ) -> Dict[str, Any]:
+        """
+        Evaluates the policy with an acting graph run with ONNX Runtime, or traced, for the
+        next power of two of the number of agents. The inputs are padded to that size,
+        with unmasked actions, and the outputs trimmed back.
+        """
+        num_agents = tensor_obs[0].shape[0]
+        bucket = 1 << (num_agents - 1).bit_length()
+        padding = bucket - num_agents
+        use_masks = masks is not None
+        if not use_masks:
+            masks = torch.zeros((num_agents, 0))
+        if padding > 0:
+            tensor_obs = [
+                torch.cat([obs, obs.new_zeros((padding,) + obs.shape[1:])])
+                for obs in tensor_obs
+            ]
+            masks = torch.cat([masks, masks.new_ones((padding, masks.shape[1]))])
+            memories = torch.cat(
+                [memories, memories.new_zeros((1, padding, memories.shape[2]))], dim=1
             )
-        run_out["action"] = action.to_action_tuple()
-        if "log_probs" in run_out:
-            run_out["log_probs"] = run_out["log_probs"].to_log_probs_tuple()
-        if "entropy" in run_out:
-            run_out["entropy"] = ModelUtils.to_numpy(run_out["entropy"])
+        if self._onnx_model is not None:
+            outputs = self._onnx_model.run(tensor_obs + [masks, memories])
+        else:
+            graph = self._acting_graphs.get(bucket)
+            if graph is None:
+                graph = self._trace_acting_graph(
+                    _ActingGraph(self.acting_actor, use_masks),
+                    (tensor_obs, masks, memories),
+                )
+                self._acting_graphs[bucket] = graph
+            with torch.inference_mode():
+                outputs = [
+                    ModelUtils.to_numpy(output)
+                    for output in graph(tensor_obs, masks, memories)
+                ]
+        (
+            continuous,
+            env_continuous,
+            discrete,
+            continuous_log_probs,
+            discrete_log_probs,
+            entropy,
+            memories,
+        ) = outputs
+        run_out: Dict[str, Any] = {
+            "action": ActionTuple(continuous[:num_agents], discrete[:num_agents]),
+            "env_action": ActionTuple(
+                env_continuous[:num_agents], discrete[:num_agents]
+            ),
+            "log_probs": LogProbsTuple(
+                continuous_log_probs[:num_agents], discrete_log_probs[:num_agents]
+            ),
+            "entropy": entropy[:num_agents],
+        }
         if self.use_recurrent:
-            run_out["memory_out"] = ModelUtils.to_numpy(memories).squeeze(0)
+            run_out["memory_out"] = memories[0, :num_agents]
         return run_out
 
+    def _trace_acting_graph(
+        self, acting_graph: _ActingGraph, example_inputs: Tuple[Any, ...]
+    ) -> torch.jit.ScriptModule:
+        """
+        Traces an acting graph. The trace is checked against the actor when the actions are
+        deterministic, random samples can't be compared. The warnings of the tracer are
+        logged once for the trace, except the ones of the input checks of nn.LSTM.
+        """
+        with torch.no_grad(), warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter("always", torch.jit.TracerWarning)
+            # nn.LSTM checks the shapes of its inputs in Python.
+            warnings.filterwarnings(
+                "ignore",
+                category=torch.jit.TracerWarning,
+                module=r"torch\.nn\.modules\.rnn",
+            )
+            graph = torch.jit.trace(
+                acting_graph,
+                example_inputs,
+                check_trace=self.network_settings.deterministic,
+            )
+        tracer_messages: List[str] = []
+        for caught in caught_warnings:
+            if not issubclass(caught.category, torch.jit.TracerWarning):
+                warnings.warn_explicit(
+                    caught.message, caught.category, caught.filename, caught.lineno
+                )
+            elif str(caught.message) not in tracer_messages:
+                tracer_messages.append(str(caught.message))
+        for message in tracer_messages:
+            logger.warning(f"Tracing the acting graph: {message}")
+        return graph
+
+    def refresh_inference(self) -> None:
+        """
+        Copies the current weights and normalization statistics of the actor into its
+        traced acting graphs, and exports its ONNX acting graphs again in the background.
+        The normalizers replace their tensors when updated, which the traced graphs would
+        otherwise not see. The quantized actor and its graphs are made again on next use.
+        """
+        if self._onnx_model is not None:
+            self._onnx_model.refresh()
+        if self.quantized_inference:
+            self._quantized_actor = None
+            self._acting_graphs = {}
+        elif self._acting_graphs:
+            state_dict = self.actor.state_dict()
+            with torch.no_grad():
+                for graph in self._acting_graphs.values():
+                    graph.actor.load_state_dict(state_dict)
+
     def get_action(
         self, decision_requests: DecisionSteps, worker_id: int = 0
     ) -> ActionInfo:
@@ -137,6 +386,88 @@ class TorchPolicy(Policy):
             agent_ids=list(decision_requests.agent_id),
         )
 
+    def get_actions(
+        self, decision_requests: List[DecisionSteps], worker_ids: List[int]
+    ) -> List[ActionInfo]:
+        """
+        Decides actions for the DecisionSteps of several environment workers with a single
+        forward pass over all of their agents.
+        :param decision_requests: DecisionSteps of each worker.
+        :param worker_ids: Id of the worker each DecisionSteps comes from.
+        :return: An ActionInfo for each of the DecisionSteps.
+        """
+        batched = [i for i, steps in enumerate(decision_requests) if len(steps) > 0]
+        if len(batched) <= 1:
+            return super().get_actions(decision_requests, worker_ids)
+
+        global_agent_ids = [
+            get_global_agent_id(worker_ids[i], int(agent_id))
+            for i in batched
+            for agent_id in decision_requests[i].agent_id
+        ]
+        run_out = self.evaluate(
+            self._concatenate_decision_steps([decision_requests[i] for i in batched]),
+            global_agent_ids,
+        )
+        self.save_memories(global_agent_ids, run_out.get("memory_out"))
+        self.check_nan_action(run_out.get("action"))
+
+        action_infos = [ActionInfo.empty() for _ in decision_requests]
+        start = 0
+        for i in batched:
+            end = start + len(decision_requests[i])
+            outputs = {
+                key: self._slice_output(value, start, end)
+                for key, value in run_out.items()
+            }
+            action_infos[i] = ActionInfo(
+                action=outputs.get("action"),
+                env_action=outputs.get("env_action"),
+                outputs=outputs,
+                agent_ids=list(decision_requests[i].agent_id),
+            )
+            start = end
+        return action_infos
+
+    def _concatenate_decision_steps(
+        self, decision_requests: List[DecisionSteps]
+    ) -> DecisionSteps:
+        action_mask = None
+        if any(steps.action_mask is not None for steps in decision_requests):
+            branches = self.behavior_spec.action_spec.discrete_branches
+            masks = [
+                steps.action_mask
+                if steps.action_mask is not None
+                else [np.zeros((len(steps), size), dtype=bool) for size in branches]
+                for steps in decision_requests
+            ]
+            action_mask = [
+                np.concatenate([mask[branch] for mask in masks])
+                for branch in range(len(branches))
+            ]
+        return DecisionSteps(
+            [
+                np.concatenate([steps.obs[i] for steps in decision_requests])
+                for i in range(len(decision_requests[0].obs))
+            ],
+            np.concatenate([steps.reward for steps in decision_requests]),
+            np.concatenate([steps.agent_id for steps in decision_requests]),
+            action_mask,
+            np.concatenate([steps.group_id for steps in decision_requests]),
+            np.concatenate([steps.group_reward for steps in decision_requests]),
+        )
+
+    @staticmethod
+    def _slice_output(value: Any, start: int, end: int) -> Any:
+        if isinstance(value, (ActionTuple, LogProbsTuple)):
+            return type(value)(
+                continuous=value.continuous[start:end],
+                discrete=value.discrete[start:end],
+            )
+        if isinstance(value, np.ndarray):
+            return value[start:end]
+        return value
+
     def get_current_step(self):
         """
         Gets current model step.
@@ -162,6 +493,7 @@ class TorchPolicy(Policy):
 
     def load_weights(self, values: List[np.ndarray]) -> None:
         self.actor.load_state_dict(values)
+        self.refresh_inference()
 
     def init_load_weights(self) -> None:
         pass
@@ -497,11 +497,11 @@ class TorchSACOptimizer(TorchOptimizer):
         n_obs = len(self.policy.behavior_spec.observation_specs)
         current_obs = ObsUtil.from_buffer(batch, n_obs)
         # Convert to tensors
-        current_obs = [ModelUtils.list_to_tensor(obs) for obs in current_obs]
+        current_obs = [ModelUtils.obs_to_tensor(obs) for obs in current_obs]
 
         next_obs = ObsUtil.from_buffer_next(batch, n_obs)
         # Convert to tensors
-        next_obs = [ModelUtils.list_to_tensor(obs) for obs in next_obs]
+        next_obs = [ModelUtils.obs_to_tensor(obs) for obs in next_obs]
 
         act_masks = ModelUtils.list_to_tensor(batch[BufferKey.ACTION_MASK])
         actions = AgentAction.from_buffer(batch)
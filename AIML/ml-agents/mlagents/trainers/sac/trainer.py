@@ -90,7 +90,7 @@ class SACTrainer(OffPolicyTrainer):
         last_step = trajectory.steps[-1]
         agent_id = trajectory.agent_id  # All the agents should have the same ID
 
-        agent_buffer_trajectory = trajectory.to_agentbuffer()
+        agent_buffer_trajectory = self._trajectory_to_agentbuffer(trajectory)
         # Check if we used group rewards, warn if so.
         self._warn_if_group_reward(agent_buffer_trajectory)
 
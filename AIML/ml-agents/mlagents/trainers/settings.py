@@ -1,5 +1,6 @@
 import os.path
 import warnings
+import sys
 
 import attr
 import cattr
@@ -114,6 +115,11 @@ class ConditioningType(Enum):
     NONE = "none"
 
 
+class BufferType(Enum):
+    LIST = "list"
+    COLUMNAR = "columnar"
+
+
 @attr.s(auto_attribs=True)
 class NetworkSettings:
     @attr.s
@@ -139,6 +145,9 @@ class NetworkSettings:
     memory: Optional[MemorySettings] = None
     goal_conditioning_type: ConditioningType = ConditioningType.HYPER
     deterministic: bool = parser.get_default("deterministic")
+    jit_inference: bool = False
+    onnx_inference: bool = False
+    quantized_inference: bool = False
 
 
 @attr.s(auto_attribs=True)
@@ -637,6 +646,9 @@ class TrainerSettings(ExportableSettings):
     time_horizon: int = 64
     summary_freq: int = 50000
     threaded: bool = False
+    learner_process: bool = attr.ib(default=False)
+    buffer_type: BufferType = BufferType.LIST
+    columnar_agent_processor: bool = False
     self_play: Optional[SelfPlaySettings] = None
     behavioral_cloning: Optional[BehavioralCloningSettings] = None
 
@@ -656,6 +668,14 @@ class TrainerSettings(ExportableSettings):
                     "When using memory, sequence length must be less than or equal to batch size. "
                 )
 
+    @learner_process.validator
+    def _check_learner_process(self, attribute, value):
+        if value and self.self_play is not None:
+            raise TrainerConfigError(
+                "learner_process can't be used with self-play, since the teams of a "
+                "behavior share their trainer."
+            )
+
     @checkpoint_interval.validator
     def _set_checkpoint_interval(self, attribute, value):
         if self.even_checkpoints:
@@ -824,6 +844,16 @@ class EnvironmentSettings:
     restarts_rate_limit_period_s: int = parser.get_default(
         "restarts_rate_limit_period_s"
     )
+    shared_memory_steps: bool = parser.get_default("shared_memory_steps")
+    batch_inference: bool = parser.get_default("batch_inference")
+    batch_inference_wait_s: float = parser.get_default("batch_inference_wait_s")
+    min_ready_envs: int = parser.get_default("min_ready_envs")
+    worker_inference: bool = parser.get_default("worker_inference")
+    uint8_visual_observations: bool = parser.get_default("uint8_visual_observations")
+    envs_per_worker: int = attr.ib(default=parser.get_default("envs_per_worker"))
+    unix_socket: bool = attr.ib(default=parser.get_default("unix_socket"))
+    incremental_reset: bool = parser.get_default("incremental_reset")
+    spare_workers: int = attr.ib(default=parser.get_default("spare_workers"))
 
     @num_envs.validator
     def validate_num_envs(self, attribute, value):
@@ -835,6 +865,26 @@ class EnvironmentSettings:
         if value <= 0:
             raise ValueError("num_areas must be set to a positive number >= 1.")
 
+    @envs_per_worker.validator
+    def validate_envs_per_worker(self, attribute, value):
+        if value <= 0:
+            raise ValueError("envs_per_worker must be set to a positive number >= 1.")
+
+    @spare_workers.validator
+    def validate_spare_workers(self, attribute, value):
+        if value < 0:
+            raise ValueError("spare_workers must be set to a positive number or 0.")
+        if value > 0 and self.envs_per_worker > 1:
+            raise ValueError(
+                "spare_workers can't be used with envs_per_worker, the environments "
+                "sharing a process are restarted in it."
+            )
+
+    @unix_socket.validator
+    def validate_unix_socket(self, attribute, value):
+        if value and sys.platform == "win32":
+            raise ValueError("unix_socket is not supported on Windows.")
+
 
 @attr.s(auto_attribs=True)
 class EngineSettings:
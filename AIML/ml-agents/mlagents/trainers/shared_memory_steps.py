@@ -0,0 +1,196 @@
+import os
+import sys
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from mlagents_envs.base_env import BehaviorName, DecisionSteps, TerminalSteps
+from mlagents.trainers.env_manager import AllStepResult
+
+# Offsets of the arrays in a slab are aligned to a cache line.
+SLAB_ALIGNMENT = 64
+MIN_SLAB_SIZE = 4096
+
+
+class ArraySlot(NamedTuple):
+    offset: int
+    shape: Tuple[int, ...]
+    dtype: str
+
+
+class StepsLayout(NamedTuple):
+    """
+    Location of the arrays of a DecisionSteps or TerminalSteps in a slab. action_mask is
+    only used for DecisionSteps and interrupted only for TerminalSteps.
+    """
+
+    obs: List[ArraySlot]
+    reward: ArraySlot
+    agent_id: ArraySlot
+    group_id: ArraySlot
+    group_reward: ArraySlot
+    action_mask: Optional[List[ArraySlot]] = None
+    interrupted: Optional[ArraySlot] = None
+
+
+class SharedStepResult(NamedTuple):
+    """
+    Descriptor sent from an environment worker in place of its AllStepResult. The arrays
+    themselves live in the shared memory segment shm_name.
+    """
+
+    shm_name: str
+    nbytes: int
+    layout: Dict[BehaviorName, Tuple[StepsLayout, StepsLayout]]
+
+
+class SharedStepResultWriter:
+    """
+    Owned by an environment worker process. Copies the arrays of every AllStepResult into
+    a shared memory slab. The slab is sized with headroom from the first step and replaced
+    by a larger one if a later step (e.g. with more agents) doesn't fit.
+    """
+
+    def __init__(self) -> None:
+        self._shm: Optional[SharedMemory] = None
+
+    def write(self, all_step_result: AllStepResult) -> SharedStepResult:
+        """
+        Writes the step result into the slab. The slab must not be written again before
+        the trainer has read the returned descriptor.
+        :param all_step_result: Step result of every behavior of the environment.
+        :return: Descriptor to send to the trainer.
+        """
+        arrays: List[Tuple[ArraySlot, np.ndarray]] = []
+        nbytes = 0
+
+        def _slot(array: np.ndarray) -> ArraySlot:
+            nonlocal nbytes
+            offset = -(-nbytes // SLAB_ALIGNMENT) * SLAB_ALIGNMENT
+            slot = ArraySlot(offset, array.shape, array.dtype.str)
+            arrays.append((slot, array))
+            nbytes = offset + array.nbytes
+            return slot
+
+        layout = {}
+        for behavior_name, (decision_steps, terminal_steps) in all_step_result.items():
+            decision_layout = StepsLayout(
+                obs=[_slot(obs) for obs in decision_steps.obs],
+                reward=_slot(decision_steps.reward),
+                agent_id=_slot(decision_steps.agent_id),
+                group_id=_slot(decision_steps.group_id),
+                group_reward=_slot(decision_steps.group_reward),
+                action_mask=None
+                if decision_steps.action_mask is None
+                else [_slot(mask) for mask in decision_steps.action_mask],
+            )
+            terminal_layout = StepsLayout(
+                obs=[_slot(obs) for obs in terminal_steps.obs],
+                reward=_slot(terminal_steps.reward),
+                agent_id=_slot(terminal_steps.agent_id),
+                group_id=_slot(terminal_steps.group_id),
+                group_reward=_slot(terminal_steps.group_reward),
+                interrupted=_slot(terminal_steps.interrupted),
+            )
+            layout[behavior_name] = (decision_layout, terminal_layout)
+
+        shm = self._reserve(nbytes)
+        for slot, array in arrays:
+            np.ndarray(
+                slot.shape, dtype=slot.dtype, buffer=shm.buf, offset=slot.offset
+            )[...] = array
+        return SharedStepResult(shm.name, nbytes, layout)
+
+    def close(self) -> None:
+        """
+        Releases and unlinks the slab.
+        """
+        if self._shm is not None:
+            if os.name == "posix":
+                # A trainer sharing the resource tracker of this process unregistered
+                # the slab when attaching to it, and unlinking unregisters it again.
+                resource_tracker.register(self._shm._name, "shared_memory")  # type: ignore
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _reserve(self, nbytes: int) -> SharedMemory:
+        if self._shm is None or self._shm.size < nbytes:
+            # The trainer has already read the previous step, so the old slab can go.
+            self.close()
+            self._shm = SharedMemory(create=True, size=max(2 * nbytes, MIN_SLAB_SIZE))
+        return self._shm
+
+
+class SharedStepResultReader:
+    """
+    Trainer-side counterpart of a worker's SharedStepResultWriter.
+    """
+
+    def __init__(self) -> None:
+        self._shm: Optional[SharedMemory] = None
+
+    def read(self, descriptor: SharedStepResult) -> AllStepResult:
+        """
+        Rebuilds the AllStepResult described by descriptor. The slab is copied out in a
+        single block, so the returned arrays stay valid after the worker's next step.
+        :param descriptor: Descriptor received from the worker.
+        :return: The worker's step result.
+        """
+        if self._shm is None or self._shm.name != descriptor.shm_name:
+            self.close()
+            self._shm = _attach_shared_memory(descriptor.shm_name)
+        data = np.frombuffer(
+            self._shm.buf, dtype=np.uint8, count=descriptor.nbytes
+        ).copy()
+
+        def _array(slot: ArraySlot) -> np.ndarray:
+            return np.ndarray(
+                slot.shape, dtype=slot.dtype, buffer=data, offset=slot.offset
+            )
+
+        all_step_result: AllStepResult = {}
+        for behavior_name, (decision, terminal) in descriptor.layout.items():
+            decision_steps = DecisionSteps(
+                [_array(slot) for slot in decision.obs],
+                _array(decision.reward),
+                _array(decision.agent_id),
+                None
+                if decision.action_mask is None
+                else [_array(slot) for slot in decision.action_mask],
+                _array(decision.group_id),
+                _array(decision.group_reward),
+            )
+            terminal_steps = TerminalSteps(
+                [_array(slot) for slot in terminal.obs],
+                _array(terminal.reward),
+                _array(terminal.interrupted),
+                _array(terminal.agent_id),
+                _array(terminal.group_id),
+                _array(terminal.group_reward),
+            )
+            all_step_result[behavior_name] = (decision_steps, terminal_steps)
+        return all_step_result
+
+    def close(self) -> None:
+        """
+        Detaches from the worker's slab. The worker remains responsible for unlinking it.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    # Attaching registers the segment with this process' resource tracker
+    # (https://bugs.python.org/issue39959), which would unlink it from under the
+    # worker that owns it when the trainer exits. The writer registers it again before
+    # unlinking it.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    shm = SharedMemory(name=name)
+    if os.name == "posix":
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+    return shm
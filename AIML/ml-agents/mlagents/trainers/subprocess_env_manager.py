@@ -1,5 +1,19 @@
+import copy
 import datetime
-from typing import Dict, NamedTuple, List, Any, Optional, Callable, Set
+from collections import defaultdict, deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 import cloudpickle
 import enum
 import time
@@ -12,12 +26,20 @@ from mlagents_envs.exception import (
     UnityCommunicatorStoppedException,
 )
 from multiprocessing import Process, Pipe, Queue
-from multiprocessing.connection import Connection
+from multiprocessing.connection import Connection, wait
 from queue import Empty as EmptyQueueException
-from mlagents_envs.base_env import BaseEnv, BehaviorName, BehaviorSpec
+from mlagents_envs.base_env import (
+    BaseEnv,
+    BehaviorName,
+    BehaviorSpec,
+    DecisionSteps,
+    TerminalSteps,
+)
 from mlagents_envs import logging_util
 from mlagents.trainers.env_manager import EnvManager, EnvironmentStep, AllStepResult
-from mlagents.trainers.settings import TrainerSettings
+from mlagents.trainers.settings import TrainerSettings, TorchSettings
+from mlagents.trainers.policy import Policy
+from mlagents.torch_utils import torch, set_torch_config
 from mlagents_envs.timers import (
     TimerNode,
     timed,
@@ -27,6 +49,16 @@ from mlagents_envs.timers import (
 )
 from mlagents.trainers.settings import ParameterRandomizationSettings, RunOptions
 from mlagents.trainers.action_info import ActionInfo
+from mlagents.trainers.shared_memory_steps import (
+    SharedStepResult,
+    SharedStepResultReader,
+    SharedStepResultWriter,
+)
+from mlagents.trainers.worker_actor import (
+    ActorPolicyUpdate,
+    ActorStepResult,
+    WorkerActors,
+)
 from mlagents_envs.side_channel.environment_parameters_channel import (
     EnvironmentParametersChannel,
 )
@@ -36,6 +68,7 @@ from mlagents_envs.side_channel.engine_configuration_channel import (
 )
 from mlagents_envs.side_channel.stats_side_channel import (
     EnvironmentStats,
+    StatsAggregationMethod,
     StatsSideChannel,
 )
 from mlagents.trainers.training_analytics_side_channel import (
@@ -57,6 +90,9 @@ class EnvironmentCommand(enum.Enum):
     ENV_EXITED = 6
     CLOSED = 7
     TRAINING_STARTED = 8
+    POLICY = 9
+    RESTART = 10
+    ACTIVATE = 11
 
 
 class EnvironmentRequest(NamedTuple):
@@ -74,10 +110,16 @@ class StepResponse(NamedTuple):
     all_step_result: AllStepResult
     timer_root: Optional[TimerNode]
     environment_stats: EnvironmentStats
+    actor_step_result: Optional[ActorStepResult] = None
 
 
 class UnityEnvWorker:
-    def __init__(self, process: Process, worker_id: int, conn: Connection):
+    def __init__(
+        self,
+        process: Process,
+        worker_id: int,
+        conn: Union[Connection, "EnvWorkerConnection"],
+    ):
         self.process = process
         self.worker_id = worker_id
         self.conn = conn
@@ -85,6 +127,7 @@ class UnityEnvWorker:
         self.previous_all_action_info: Dict[str, ActionInfo] = {}
         self.waiting = False
         self.closed = False
+        self.step_reader = SharedStepResultReader()
 
     def send(self, cmd: EnvironmentCommand, payload: Any = None) -> None:
         try:
@@ -103,6 +146,25 @@ class UnityEnvWorker:
         except (BrokenPipeError, EOFError):
             raise UnityCommunicationException("UnityEnvironment worker: recv failed.")
 
+    def poll(self) -> bool:
+        """
+        Whether recv can return without blocking. A closed connection counts as ready, so
+        that recv raises.
+        """
+        try:
+            return self.conn.poll()
+        except (BrokenPipeError, EOFError):
+            return True
+
+    @property
+    def connection(self) -> Connection:
+        """
+        The pipe of the process hosting the environment.
+        """
+        if isinstance(self.conn, EnvWorkerConnection):
+            return self.conn.multi_env_conn.conn
+        return self.conn
+
     def request_close(self):
         try:
             self.conn.send(EnvironmentRequest(EnvironmentCommand.CLOSE))
@@ -113,6 +175,295 @@ class UnityEnvWorker:
             pass
 
 
+class MultiEnvWorkerConnection:
+    """
+    Connection to a worker process that hosts several environments. The requests are sent
+    as lists of (worker_id, request) pairs. The STEP requests are held until flush_steps is
+    called, so that the process gets the actions of all its environments at once and steps
+    them together.
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self._pending_steps: List[Tuple[int, EnvironmentRequest]] = []
+        self._responses: Dict[int, Deque[EnvironmentResponse]] = defaultdict(deque)
+        # Environments being restarted, whose responses are dropped until the process
+        # acknowledges the restart.
+        self._restarting: Set[int] = set()
+
+    def send(self, worker_id: int, req: EnvironmentRequest) -> None:
+        if req.cmd == EnvironmentCommand.STEP:
+            self._pending_steps.append((worker_id, req))
+            return
+        self.flush_steps()
+        self.conn.send([(worker_id, req)])
+
+    def flush_steps(self) -> None:
+        if not self._pending_steps:
+            return
+        pending_steps, self._pending_steps = self._pending_steps, []
+        try:
+            self.conn.send(pending_steps)
+        except (BrokenPipeError, EOFError):
+            raise UnityCommunicationException("UnityEnvironment worker: send failed.")
+
+    def recv(self, worker_id: int) -> EnvironmentResponse:
+        """
+        Receives the next response of an environment. The responses of the other
+        environments that come first are kept until they are asked for.
+        """
+        while not self._responses[worker_id]:
+            self._receive()
+        return self._responses[worker_id].popleft()
+
+    def poll(self, worker_id: int) -> bool:
+        """
+        Whether there is a response for an environment, receiving what the process already
+        sent.
+        """
+        while not self._responses[worker_id] and self.conn.poll():
+            self._receive()
+        return bool(self._responses[worker_id])
+
+    def _receive(self) -> None:
+        response: EnvironmentResponse = self.conn.recv()
+        if response.worker_id in self._restarting:
+            # The old environment sent this before the process replaced it.
+            if response.cmd == EnvironmentCommand.RESTART:
+                self._restarting.discard(response.worker_id)
+            return
+        self._responses[response.worker_id].append(response)
+
+    def restart(self, worker_id: int) -> None:
+        """
+        Asks the process to replace an environment that exited, and drops the responses
+        that the old environment sent, including the ones still in the pipe.
+        """
+        self._responses.pop(worker_id, None)
+        self._restarting.add(worker_id)
+        self.send(worker_id, EnvironmentRequest(EnvironmentCommand.RESTART))
+
+    def for_env(self, worker_id: int) -> "EnvWorkerConnection":
+        return EnvWorkerConnection(self, worker_id)
+
+
+class EnvWorkerConnection:
+    """
+    The part of a MultiEnvWorkerConnection used by the UnityEnvWorker of one environment.
+    """
+
+    def __init__(self, multi_env_conn: MultiEnvWorkerConnection, worker_id: int):
+        self.multi_env_conn = multi_env_conn
+        self.worker_id = worker_id
+
+    def send(self, req: EnvironmentRequest) -> None:
+        self.multi_env_conn.send(self.worker_id, req)
+
+    def recv(self) -> EnvironmentResponse:
+        return self.multi_env_conn.recv(self.worker_id)
+
+    def poll(self) -> bool:
+        return self.multi_env_conn.poll(self.worker_id)
+
+
+def recv_responses(
+    env_workers: List[UnityEnvWorker],
+) -> Iterator[Tuple[UnityEnvWorker, EnvironmentResponse]]:
+    """
+    Receives one response from each of the workers, in the order in which they arrive
+    rather than one worker after the other.
+    :raises: The exception of a worker whose environment exited.
+    """
+    pending = list(env_workers)
+    while pending:
+        ready = [ew for ew in pending if ew.poll()]
+        if not ready:
+            wait(list({id(ew.connection): ew.connection for ew in pending}.values()))
+            continue
+        for env_worker in ready:
+            pending.remove(env_worker)
+            yield env_worker, env_worker.recv()
+
+
+def _queue_reset_response(step_queue: Queue, response: EnvironmentResponse) -> None:
+    """
+    Puts the result of a reset on the step queue, like the result of a step, for the
+    SubprocessEnvManager to take it when the environment is done resetting.
+    """
+    step_queue.put(response._replace(payload=StepResponse(response.payload, None, {})))
+
+
+class WorkerEnvironment:
+    """
+    An environment hosted by a worker process, with its side channels and what it keeps
+    between the requests of the SubprocessEnvManager.
+    """
+
+    def __init__(
+        self,
+        env_factory: Callable[[int, List[SideChannel]], UnityEnvironment],
+        worker_id: int,
+        run_options: RunOptions,
+    ):
+        self.worker_id = worker_id
+        self.env_parameters = EnvironmentParametersChannel()
+
+        engine_config = EngineConfig(
+            width=run_options.engine_settings.width,
+            height=run_options.engine_settings.height,
+            quality_level=run_options.engine_settings.quality_level,
+            time_scale=run_options.engine_settings.time_scale,
+            target_frame_rate=run_options.engine_settings.target_frame_rate,
+            capture_frame_rate=run_options.engine_settings.capture_frame_rate,
+        )
+        engine_configuration_channel = EngineConfigurationChannel()
+        engine_configuration_channel.set_configuration(engine_config)
+
+        self.stats_channel = StatsSideChannel()
+        self.training_analytics_channel: Optional[TrainingAnalyticsSideChannel] = None
+        if worker_id == 0:
+            self.training_analytics_channel = TrainingAnalyticsSideChannel()
+        side_channels: List[SideChannel] = [
+            self.env_parameters,
+            engine_configuration_channel,
+            self.stats_channel,
+        ]
+        if self.training_analytics_channel is not None:
+            side_channels.append(self.training_analytics_channel)
+
+        self.env: UnityEnvironment = env_factory(worker_id, side_channels)
+        if (
+            not self.env.academy_capabilities
+            or not self.env.academy_capabilities.trainingAnalytics
+        ):
+            # Make sure we don't try to send training analytics if the environment doesn't know how to process
+            # them. This wouldn't be catastrophic, but would result in unknown SideChannel UUIDs being used.
+            self.training_analytics_channel = None
+        if self.training_analytics_channel:
+            self.training_analytics_channel.environment_initialized(run_options)
+
+        self.step_writer: Optional[SharedStepResultWriter] = None
+        if run_options.env_settings.shared_memory_steps:
+            self.step_writer = SharedStepResultWriter()
+        self.actors: Optional[WorkerActors] = None
+        if run_options.env_settings.worker_inference:
+            self.actors = WorkerActors(worker_id)
+        self.last_step_result: Optional[AllStepResult] = None
+        self.all_action_info: Dict[BehaviorName, ActionInfo] = {}
+
+    def begin_step(self, all_action_info: Dict[BehaviorName, ActionInfo]) -> None:
+        """
+        Sets the actions of the agents and starts stepping the environment.
+        :param all_action_info: The actions sent by the trainer, unused when the worker
+            decides the actions itself.
+        """
+        if self.actors is not None:
+            all_action_info = self.actors.get_actions(self.last_step_result or {})
+        self.all_action_info = all_action_info
+        for brain_name, action_info in all_action_info.items():
+            if len(action_info.agent_ids) > 0:
+                self.env.set_actions(brain_name, action_info.env_action)
+        if isinstance(self.env, UnityEnvironment):
+            self.env.begin_step()
+        else:
+            self.env.step()
+
+    def end_step(self) -> StepResponse:
+        """
+        Waits for the environment to finish the step started by begin_step.
+        :return: The results of the step, without the timers of the process.
+        """
+        if isinstance(self.env, UnityEnvironment):
+            self.env.end_step()
+        all_step_result = self._generate_all_results()
+        self.last_step_result = all_step_result
+        actor_step_result: Optional[ActorStepResult] = None
+        if self.actors is not None:
+            self.actors.add_experiences(all_step_result, self.all_action_info)
+            actor_step_result = self.actors.get_and_reset_results()
+            # Observations stay in the worker, the trainer only gets trajectories.
+            all_step_result = self._generate_empty_results()
+        env_stats = self.stats_channel.get_and_reset_stats()
+        if self.step_writer is not None:
+            # Only a small descriptor goes through the queue, the arrays are
+            # read from shared memory by the trainer.
+            all_step_result = self.step_writer.write(all_step_result)
+        return StepResponse(all_step_result, None, env_stats, actor_step_result)
+
+    def handle(self, req: EnvironmentRequest) -> Optional[EnvironmentResponse]:
+        """
+        Handles a request other than STEP and CLOSE.
+        :return: The response to send back to the SubprocessEnvManager, if there is one.
+        """
+        if req.cmd == EnvironmentCommand.BEHAVIOR_SPECS:
+            return EnvironmentResponse(
+                EnvironmentCommand.BEHAVIOR_SPECS,
+                self.worker_id,
+                self.env.behavior_specs,
+            )
+        elif req.cmd == EnvironmentCommand.ENVIRONMENT_PARAMETERS:
+            for k, v in req.payload.items():
+                if isinstance(v, ParameterRandomizationSettings):
+                    v.apply(k, self.env_parameters)
+        elif req.cmd == EnvironmentCommand.TRAINING_STARTED:
+            behavior_name, trainer_config = req.payload
+            if self.training_analytics_channel:
+                self.training_analytics_channel.training_started(
+                    behavior_name, trainer_config
+                )
+        elif req.cmd == EnvironmentCommand.POLICY:
+            if self.actors is not None:
+                self.actors.update_policy(req.payload, self.last_step_result)
+        elif req.cmd == EnvironmentCommand.RESET:
+            if self.actors is not None:
+                self.actors.end_episode()
+            self.env.reset()
+            all_step_result = self._generate_all_results()
+            self.last_step_result = all_step_result
+            if self.actors is not None:
+                self.actors.add_experiences(all_step_result, {})
+                # Like the steps, the reset observations stay in the worker. Otherwise the
+                # AgentProcessors of the trainer would keep the agents of the reset, which
+                # are never updated.
+                all_step_result = self._generate_empty_results()
+            return EnvironmentResponse(
+                EnvironmentCommand.RESET, self.worker_id, all_step_result
+            )
+        return None
+
+    def set_worker_id(self, worker_id: int) -> None:
+        """
+        Makes a spare environment take the place of a worker that exited. The environment
+        keeps the port it was started with.
+        """
+        self.worker_id = worker_id
+        if self.actors is not None:
+            self.actors.worker_id = worker_id
+
+    def close(self) -> None:
+        self.env.close()
+        if self.step_writer is not None:
+            self.step_writer.close()
+
+    def _generate_all_results(self) -> AllStepResult:
+        all_step_result: AllStepResult = {}
+        for brain_name in self.env.behavior_specs:
+            all_step_result[brain_name] = self.env.get_steps(brain_name)
+        return all_step_result
+
+    def _generate_empty_results(self) -> AllStepResult:
+        return {
+            brain_name: (DecisionSteps.empty(spec), TerminalSteps.empty(spec))
+            for brain_name, spec in self.env.behavior_specs.items()
+        }
+
+
+def _set_actor_torch_config() -> None:
+    # Many workers act in parallel, so each one runs its policies on a single CPU thread.
+    set_torch_config(TorchSettings(device="cpu"))
+    torch.set_num_threads(1)
+
+
 def worker(
     parent_conn: Connection,
     step_queue: Queue,
@@ -120,28 +471,19 @@ def worker(
     worker_id: int,
     run_options: RunOptions,
     log_level: int = logging_util.INFO,
+    spare: bool = False,
 ) -> None:
+    """
+    Worker process hosting one environment. A spare worker starts its environment and waits
+    to be activated in place of a worker that exited. Until then, it only reports on its pipe,
+    and nothing it does reaches the step queue.
+    """
     env_factory: Callable[
         [int, List[SideChannel]], UnityEnvironment
     ] = cloudpickle.loads(pickled_env_factory)
-    env_parameters = EnvironmentParametersChannel()
-
-    engine_config = EngineConfig(
-        width=run_options.engine_settings.width,
-        height=run_options.engine_settings.height,
-        quality_level=run_options.engine_settings.quality_level,
-        time_scale=run_options.engine_settings.time_scale,
-        target_frame_rate=run_options.engine_settings.target_frame_rate,
-        capture_frame_rate=run_options.engine_settings.capture_frame_rate,
-    )
-    engine_configuration_channel = EngineConfigurationChannel()
-    engine_configuration_channel.set_configuration(engine_config)
-
-    stats_channel = StatsSideChannel()
-    training_analytics_channel: Optional[TrainingAnalyticsSideChannel] = None
-    if worker_id == 0:
-        training_analytics_channel = TrainingAnalyticsSideChannel()
-    env: UnityEnvironment = None
+    if run_options.env_settings.worker_inference:
+        _set_actor_torch_config()
+    worker_env: Optional[WorkerEnvironment] = None
     # Set log level. On some platforms, the logger isn't common with the
     # main process, so we need to set it again.
     logging_util.set_log_level(log_level)
@@ -149,70 +491,44 @@ def worker(
     def _send_response(cmd_name: EnvironmentCommand, payload: Any) -> None:
         parent_conn.send(EnvironmentResponse(cmd_name, worker_id, payload))
 
-    def _generate_all_results() -> AllStepResult:
-        all_step_result: AllStepResult = {}
-        for brain_name in env.behavior_specs:
-            all_step_result[brain_name] = env.get_steps(brain_name)
-        return all_step_result
-
     try:
-        side_channels = [env_parameters, engine_configuration_channel, stats_channel]
-        if training_analytics_channel is not None:
-            side_channels.append(training_analytics_channel)
-
-        env = env_factory(worker_id, side_channels)
-        if (
-            not env.academy_capabilities
-            or not env.academy_capabilities.trainingAnalytics
-        ):
-            # Make sure we don't try to send training analytics if the environment doesn't know how to process
-            # them. This wouldn't be catastrophic, but would result in unknown SideChannel UUIDs being used.
-            training_analytics_channel = None
-        if training_analytics_channel:
-            training_analytics_channel.environment_initialized(run_options)
-
+        worker_env = WorkerEnvironment(env_factory, worker_id, run_options)
         while True:
             req: EnvironmentRequest = parent_conn.recv()
             if req.cmd == EnvironmentCommand.STEP:
-                all_action_info = req.payload
-                for brain_name, action_info in all_action_info.items():
-                    if len(action_info.agent_ids) > 0:
-                        env.set_actions(brain_name, action_info.env_action)
-                env.step()
-                all_step_result = _generate_all_results()
+                worker_env.begin_step(req.payload)
+                step_response = worker_env.end_step()
                 # The timers in this process are independent from all the processes and the "main" process
                 # So after we send back the root timer, we can safely clear them.
                 # Note that we could randomly return timers a fraction of the time if we wanted to reduce
                 # the data transferred.
                 # TODO get gauges from the workers and merge them in the main process too.
-                env_stats = stats_channel.get_and_reset_stats()
-                step_response = StepResponse(
-                    all_step_result, get_timer_root(), env_stats
-                )
                 step_queue.put(
                     EnvironmentResponse(
-                        EnvironmentCommand.STEP, worker_id, step_response
+                        EnvironmentCommand.STEP,
+                        worker_id,
+                        step_response._replace(timer_root=get_timer_root()),
                     )
                 )
                 reset_timers()
-            elif req.cmd == EnvironmentCommand.BEHAVIOR_SPECS:
-                _send_response(EnvironmentCommand.BEHAVIOR_SPECS, env.behavior_specs)
-            elif req.cmd == EnvironmentCommand.ENVIRONMENT_PARAMETERS:
-                for k, v in req.payload.items():
-                    if isinstance(v, ParameterRandomizationSettings):
-                        v.apply(k, env_parameters)
-            elif req.cmd == EnvironmentCommand.TRAINING_STARTED:
-                behavior_name, trainer_config = req.payload
-                if training_analytics_channel:
-                    training_analytics_channel.training_started(
-                        behavior_name, trainer_config
-                    )
-            elif req.cmd == EnvironmentCommand.RESET:
-                env.reset()
-                all_step_result = _generate_all_results()
-                _send_response(EnvironmentCommand.RESET, all_step_result)
             elif req.cmd == EnvironmentCommand.CLOSE:
                 break
+            elif req.cmd == EnvironmentCommand.ACTIVATE:
+                worker_id = req.payload
+                worker_env.set_worker_id(worker_id)
+                spare = False
+                _send_response(EnvironmentCommand.ACTIVATE, None)
+            else:
+                response = worker_env.handle(req)
+                if response is None:
+                    pass
+                elif (
+                    response.cmd == EnvironmentCommand.RESET
+                    and run_options.env_settings.incremental_reset
+                ):
+                    _queue_reset_response(step_queue, response)
+                else:
+                    parent_conn.send(response)
     except (
         KeyboardInterrupt,
         UnityCommunicationException,
@@ -221,25 +537,177 @@ def worker(
         UnityCommunicatorStoppedException,
     ) as ex:
         logger.debug(f"UnityEnvironment worker {worker_id}: environment stopping.")
-        step_queue.put(
-            EnvironmentResponse(EnvironmentCommand.ENV_EXITED, worker_id, ex)
-        )
+        if not spare:
+            step_queue.put(
+                EnvironmentResponse(EnvironmentCommand.ENV_EXITED, worker_id, ex)
+            )
         _send_response(EnvironmentCommand.ENV_EXITED, ex)
     except Exception as ex:
         logger.exception(
             f"UnityEnvironment worker {worker_id}: environment raised an unexpected exception."
         )
-        step_queue.put(
-            EnvironmentResponse(EnvironmentCommand.ENV_EXITED, worker_id, ex)
-        )
+        if not spare:
+            step_queue.put(
+                EnvironmentResponse(EnvironmentCommand.ENV_EXITED, worker_id, ex)
+            )
         _send_response(EnvironmentCommand.ENV_EXITED, ex)
     finally:
         logger.debug(f"UnityEnvironment worker {worker_id} closing.")
-        if env is not None:
-            env.close()
+        if worker_env is not None:
+            worker_env.close()
         logger.debug(f"UnityEnvironment worker {worker_id} done.")
         parent_conn.close()
+        if not spare:
+            step_queue.put(
+                EnvironmentResponse(EnvironmentCommand.CLOSED, worker_id, None)
+            )
+        step_queue.close()
+
+
+def multi_env_worker(
+    parent_conn: Connection,
+    step_queue: Queue,
+    pickled_env_factory: str,
+    worker_ids: List[int],
+    run_options: RunOptions,
+    log_level: int = logging_util.INFO,
+) -> None:
+    """
+    Worker process hosting several environments. It receives lists of (worker_id, request)
+    pairs from a MultiEnvWorkerConnection. The environments with a STEP request in the same
+    list are all sent their actions before waiting for any of them, and their results are
+    put on the step queue as a single list. An environment that exits is reported like with
+    one environment per process, and the others keep running until it is restarted.
+    """
+    env_factory: Callable[
+        [int, List[SideChannel]], UnityEnvironment
+    ] = cloudpickle.loads(pickled_env_factory)
+    if run_options.env_settings.worker_inference:
+        _set_actor_torch_config()
+    worker_envs: Dict[int, WorkerEnvironment] = {}
+    open_worker_ids = set(worker_ids)
+    logging_util.set_log_level(log_level)
+
+    def _env_exited(worker_id: int, ex: BaseException) -> None:
+        logger.debug(f"UnityEnvironment worker {worker_id}: environment stopping.")
+        step_queue.put(
+            EnvironmentResponse(EnvironmentCommand.ENV_EXITED, worker_id, ex)
+        )
+        parent_conn.send(
+            EnvironmentResponse(EnvironmentCommand.ENV_EXITED, worker_id, ex)
+        )
+        _close_env(worker_id)
+
+    def _close_env(worker_id: int) -> None:
+        worker_env = worker_envs.pop(worker_id, None)
+        if worker_env is not None:
+            worker_env.close()
+        # The SubprocessEnvManager stops waiting for an environment once it is closed.
         step_queue.put(EnvironmentResponse(EnvironmentCommand.CLOSED, worker_id, None))
+
+    def _handle_exception(worker_id: int, ex: Exception) -> None:
+        if not isinstance(
+            ex,
+            (
+                UnityCommunicationException,
+                UnityTimeOutException,
+                UnityEnvironmentException,
+                UnityCommunicatorStoppedException,
+            ),
+        ):
+            logger.exception(
+                f"UnityEnvironment worker {worker_id}: environment raised an unexpected exception."
+            )
+        _env_exited(worker_id, ex)
+
+    def _start_env(worker_id: int) -> None:
+        try:
+            worker_envs[worker_id] = WorkerEnvironment(
+                env_factory, worker_id, run_options
+            )
+        except Exception as ex:
+            _handle_exception(worker_id, ex)
+
+    try:
+        for worker_id in worker_ids:
+            _start_env(worker_id)
+        while open_worker_ids:
+            requests: List[Tuple[int, EnvironmentRequest]] = parent_conn.recv()
+            stepping_envs: List[WorkerEnvironment] = []
+            for worker_id, req in requests:
+                if req.cmd == EnvironmentCommand.CLOSE:
+                    open_worker_ids.discard(worker_id)
+                    _close_env(worker_id)
+                    continue
+                if req.cmd == EnvironmentCommand.RESTART:
+                    # The responses sent after this one come from the new environment.
+                    parent_conn.send(
+                        EnvironmentResponse(EnvironmentCommand.RESTART, worker_id, None)
+                    )
+                    _start_env(worker_id)
+                    continue
+                worker_env = worker_envs.get(worker_id)
+                if worker_env is None:
+                    # The environment exited and wasn't restarted yet.
+                    continue
+                try:
+                    if req.cmd == EnvironmentCommand.STEP:
+                        worker_env.begin_step(req.payload)
+                        stepping_envs.append(worker_env)
+                    else:
+                        response = worker_env.handle(req)
+                        if response is None:
+                            pass
+                        elif (
+                            response.cmd == EnvironmentCommand.RESET
+                            and run_options.env_settings.incremental_reset
+                        ):
+                            _queue_reset_response(step_queue, response)
+                        else:
+                            parent_conn.send(response)
+                except Exception as ex:
+                    _handle_exception(worker_id, ex)
+            # All the environments are stepping, now collect their results.
+            step_responses: List[EnvironmentResponse] = []
+            for worker_env in stepping_envs:
+                try:
+                    step_responses.append(
+                        EnvironmentResponse(
+                            EnvironmentCommand.STEP,
+                            worker_env.worker_id,
+                            worker_env.end_step(),
+                        )
+                    )
+                except Exception as ex:
+                    _handle_exception(worker_env.worker_id, ex)
+            if step_responses:
+                # The timers are shared by the environments of the process, they are only
+                # sent with the first response.
+                first_response = step_responses[0]
+                step_responses[0] = first_response._replace(
+                    payload=first_response.payload._replace(timer_root=get_timer_root())
+                )
+                step_queue.put(step_responses)
+                reset_timers()
+    except KeyboardInterrupt as ex:
+        for worker_id in list(worker_envs):
+            _env_exited(worker_id, ex)
+    except Exception as ex:
+        logger.exception(
+            f"UnityEnvironment workers {worker_ids}: worker raised an unexpected exception."
+        )
+        for worker_id in list(worker_envs):
+            _env_exited(worker_id, ex)
+    finally:
+        logger.debug(f"UnityEnvironment workers {worker_ids} closing.")
+        for worker_id in list(worker_envs):
+            worker_envs.pop(worker_id).close()
+        for worker_id in open_worker_ids:
+            step_queue.put(
+                EnvironmentResponse(EnvironmentCommand.CLOSED, worker_id, None)
+            )
+        logger.debug(f"UnityEnvironment workers {worker_ids} done.")
+        parent_conn.close()
         step_queue.close()
 
 
@@ -262,13 +730,43 @@ class SubprocessEnvManager(EnvManager):
             [] for _ in range(n_env)
         ]
         self.restart_counts: List[int] = [0] * n_env
-        for worker_idx in range(n_env):
-            self.env_workers.append(
-                self.create_worker(
-                    worker_idx, self.step_queue, env_factory, run_options
+        # Version of the latest policy of each behavior sent to the workers, when they act.
+        self.actor_policy_versions: Dict[BehaviorName, int] = {}
+        self._pending_actor_step_results: List[Tuple[int, ActorStepResult]] = []
+        # Responses of workers hosting several environments that were received together.
+        self._queued_responses: Deque[EnvironmentResponse] = deque()
+        self.multi_env_connections: List[MultiEnvWorkerConnection] = []
+        # Workers with their environment already started, that replace the workers that exit.
+        # They get worker ids after the ones of the workers they can replace, so that their
+        # environments get their own ports.
+        self.spare_workers: Deque[UnityEnvWorker] = deque()
+        self._next_spare_worker_id = n_env
+        envs_per_worker = run_options.env_settings.envs_per_worker
+        if envs_per_worker > 1:
+            for first_worker_idx in range(0, n_env, envs_per_worker):
+                multi_env_conn, env_workers = self.create_multi_env_worker(
+                    list(
+                        range(
+                            first_worker_idx,
+                            min(first_worker_idx + envs_per_worker, n_env),
+                        )
+                    ),
+                    self.step_queue,
+                    env_factory,
+                    run_options,
                 )
-            )
-            self.workers_alive += 1
+                self.multi_env_connections.append(multi_env_conn)
+                self.env_workers.extend(env_workers)
+                self.workers_alive += len(env_workers)
+        else:
+            for worker_idx in range(n_env):
+                self.env_workers.append(
+                    self.create_worker(
+                        worker_idx, self.step_queue, env_factory, run_options
+                    )
+                )
+                self.workers_alive += 1
+        self._fill_spare_workers()
 
     @staticmethod
     def create_worker(
@@ -276,6 +774,7 @@ class SubprocessEnvManager(EnvManager):
         step_queue: Queue,
         env_factory: Callable[[int, List[SideChannel]], BaseEnv],
         run_options: RunOptions,
+        spare: bool = False,
     ) -> UnityEnvWorker:
         parent_conn, child_conn = Pipe()
 
@@ -291,18 +790,107 @@ class SubprocessEnvManager(EnvManager):
                 worker_id,
                 run_options,
                 logger.level,
+                spare,
             ),
         )
         child_process.start()
         return UnityEnvWorker(child_process, worker_id, parent_conn)
 
+    @staticmethod
+    def create_multi_env_worker(
+        worker_ids: List[int],
+        step_queue: Queue,
+        env_factory: Callable[[int, List[SideChannel]], BaseEnv],
+        run_options: RunOptions,
+    ) -> Tuple[MultiEnvWorkerConnection, List[UnityEnvWorker]]:
+        """
+        Starts a process hosting the environments of several workers.
+        :return: The connection to the process and the UnityEnvWorker of each environment.
+        """
+        parent_conn, child_conn = Pipe()
+        pickled_env_factory = cloudpickle.dumps(env_factory)
+        child_process = Process(
+            target=multi_env_worker,
+            args=(
+                child_conn,
+                step_queue,
+                pickled_env_factory,
+                worker_ids,
+                run_options,
+                logger.level,
+            ),
+        )
+        child_process.start()
+        multi_env_conn = MultiEnvWorkerConnection(parent_conn)
+        return (
+            multi_env_conn,
+            [
+                UnityEnvWorker(
+                    child_process, worker_id, multi_env_conn.for_env(worker_id)
+                )
+                for worker_id in worker_ids
+            ],
+        )
+
+    def set_policy(self, brain_name: BehaviorName, policy: Policy) -> None:
+        super().set_policy(brain_name, policy)
+        if self.run_options.env_settings.worker_inference:
+            first_update = brain_name not in self.actor_policy_versions
+            self.actor_policy_versions[brain_name] = (
+                self.actor_policy_versions.get(brain_name, 0) + 1
+            )
+            if first_update:
+                update = self._actor_policy_update(brain_name)
+            else:
+                update = ActorPolicyUpdate(
+                    brain_name,
+                    self.actor_policy_versions[brain_name],
+                    self._max_trajectory_length(brain_name),
+                    weights={
+                        name: tensor.cpu()
+                        for name, tensor in policy.get_weights().items()
+                    },
+                )
+            for env_worker in self.env_workers:
+                env_worker.send(EnvironmentCommand.POLICY, update)
+
+    def _actor_policy_update(self, brain_name: BehaviorName) -> ActorPolicyUpdate:
+        """
+        Creates an update with a CPU copy of the whole current policy of a behavior.
+        """
+        policy = copy.deepcopy(self.policies[brain_name])
+        policy.actor.to("cpu")
+        return ActorPolicyUpdate(
+            brain_name,
+            self.actor_policy_versions[brain_name],
+            self._max_trajectory_length(brain_name),
+            policy=policy,
+        )
+
+    def _max_trajectory_length(self, brain_name: BehaviorName) -> int:
+        return self.agent_managers[brain_name].max_trajectory_length
+
     def _queue_steps(self) -> None:
-        for env_worker in self.env_workers:
-            if not env_worker.waiting:
-                env_action_info = self._take_step(env_worker.previous_step)
-                env_worker.previous_all_action_info = env_action_info
-                env_worker.send(EnvironmentCommand.STEP, env_action_info)
-                env_worker.waiting = True
+        ready_workers = [ew for ew in self.env_workers if not ew.waiting]
+        if self.run_options.env_settings.worker_inference:
+            # The workers decide their actions themselves.
+            all_action_info: List[Dict[BehaviorName, ActionInfo]] = [
+                {} for _ in ready_workers
+            ]
+        elif self.run_options.env_settings.batch_inference:
+            all_action_info = self._take_batched_step(
+                [ew.previous_step for ew in ready_workers]
+            )
+        else:
+            all_action_info = [
+                self._take_step(ew.previous_step) for ew in ready_workers
+            ]
+        for env_worker, env_action_info in zip(ready_workers, all_action_info):
+            env_worker.previous_all_action_info = env_action_info
+            env_worker.send(EnvironmentCommand.STEP, env_action_info)
+            env_worker.waiting = True
+        for multi_env_conn in self.multi_env_connections:
+            multi_env_conn.flush_steps()
 
     def _restart_failed_workers(self, first_failure: EnvironmentResponse) -> None:
         if first_failure.cmd != EnvironmentCommand.ENV_EXITED:
@@ -320,13 +908,63 @@ class SubprocessEnvManager(EnvManager):
             logger.warning(f"Restarting worker[{worker_id}] after '{ex}'")
             self.recent_restart_timestamps[worker_id].append(datetime.datetime.now())
             self.restart_counts[worker_id] += 1
-            self.env_workers[worker_id] = self.create_worker(
-                worker_id, self.step_queue, self.env_factory, self.run_options
-            )
+            failed_worker = self.env_workers[worker_id]
+            failed_worker.step_reader.close()
+            if isinstance(failed_worker.conn, EnvWorkerConnection):
+                # The other environments of the process keep running, only this one is
+                # replaced.
+                failed_worker.conn.multi_env_conn.restart(worker_id)
+                self.env_workers[worker_id] = UnityEnvWorker(
+                    failed_worker.process, worker_id, failed_worker.conn
+                )
+            else:
+                self.env_workers[worker_id] = self._replace_worker(worker_id)
+            for brain_name in self.actor_policy_versions:
+                self.env_workers[worker_id].send(
+                    EnvironmentCommand.POLICY, self._actor_policy_update(brain_name)
+                )
         # The restarts were successful, clear all the existing training trajectories so we don't use corrupted or
         # outdated data.
         self.reset(self.env_parameters)
 
+    def _replace_worker(self, worker_id: int) -> UnityEnvWorker:
+        """
+        Creates the worker that takes the place of one that exited. A spare worker is used
+        if one is ready, and a new spare is started in the background to keep the pool full.
+        """
+        replacement: Optional[UnityEnvWorker] = None
+        while self.spare_workers and replacement is None:
+            spare_worker = self.spare_workers.popleft()
+            try:
+                spare_worker.send(EnvironmentCommand.ACTIVATE, worker_id)
+                # Only waits if the spare environment didn't finish starting yet.
+                spare_worker.recv()
+            except Exception as ex:
+                logger.warning(f"Spare worker[{spare_worker.worker_id}] exited: '{ex}'")
+                spare_worker.step_reader.close()
+                continue
+            spare_worker.worker_id = worker_id
+            replacement = spare_worker
+        self._fill_spare_workers()
+        if replacement is None:
+            replacement = self.create_worker(
+                worker_id, self.step_queue, self.env_factory, self.run_options
+            )
+        return replacement
+
+    def _fill_spare_workers(self) -> None:
+        while len(self.spare_workers) < self.run_options.env_settings.spare_workers:
+            self.spare_workers.append(
+                self.create_worker(
+                    self._next_spare_worker_id,
+                    self.step_queue,
+                    self.env_factory,
+                    self.run_options,
+                    spare=True,
+                )
+            )
+            self._next_spare_worker_id += 1
+
     def _drain_step_queue(self) -> Dict[int, Exception]:
         """
         Drains all steps out of the step queue and returns all exceptions from crashed workers.
@@ -337,14 +975,15 @@ class SubprocessEnvManager(EnvManager):
         deadline = datetime.datetime.now() + datetime.timedelta(minutes=1)
         while workers_still_pending and deadline > datetime.datetime.now():
             try:
-                while True:
-                    step: EnvironmentResponse = self.step_queue.get_nowait()
-                    if step.cmd == EnvironmentCommand.ENV_EXITED:
-                        workers_still_pending.add(step.worker_id)
-                        all_failures[step.worker_id] = step.payload
-                    else:
-                        workers_still_pending.remove(step.worker_id)
-                        self.env_workers[step.worker_id].waiting = False
+                step: EnvironmentResponse = self._get_step_response(
+                    timeout=(deadline - datetime.datetime.now()).total_seconds()
+                )
+                if step.cmd == EnvironmentCommand.ENV_EXITED:
+                    workers_still_pending.add(step.worker_id)
+                    all_failures[step.worker_id] = step.payload
+                else:
+                    workers_still_pending.remove(step.worker_id)
+                    self.env_workers[step.worker_id].waiting = False
             except EmptyQueueException:
                 pass
         if deadline < datetime.datetime.now():
@@ -409,43 +1048,102 @@ class SubprocessEnvManager(EnvManager):
 
         worker_steps: List[EnvironmentResponse] = []
         step_workers: Set[int] = set()
-        # Poll the step queue for completed steps from environment workers until we retrieve
-        # 1 or more, which we will then return as StepInfos
-        while len(worker_steps) < 1:
+        min_ready_envs = self._num_ready_envs_to_wait_for()
+        batch_deadline: Optional[float] = None
+        # Block on the step queue until min_ready_envs environment workers have completed
+        # their step, then take whatever else is already available, which we will then
+        # return as StepInfos. With batched inference, keep collecting the workers that
+        # finish within the wait window so that their next actions are computed together.
+        while True:
+            timeout: Optional[float] = None
+            if len(worker_steps) >= min_ready_envs:
+                if batch_deadline is None:
+                    batch_deadline = time.monotonic()
+                    if self.run_options.env_settings.batch_inference:
+                        batch_deadline += (
+                            self.run_options.env_settings.batch_inference_wait_s
+                        )
+                if not any(ew.waiting for ew in self.env_workers):
+                    break
+                timeout = max(batch_deadline - time.monotonic(), 0.0)
             try:
-                while True:
-                    step: EnvironmentResponse = self.step_queue.get_nowait()
-                    if step.cmd == EnvironmentCommand.ENV_EXITED:
-                        # If even one env exits try to restart all envs that failed.
-                        self._restart_failed_workers(step)
-                        # Clear state and restart this function.
-                        worker_steps.clear()
-                        step_workers.clear()
-                        self._queue_steps()
-                    elif step.worker_id not in step_workers:
-                        self.env_workers[step.worker_id].waiting = False
-                        worker_steps.append(step)
-                        step_workers.add(step.worker_id)
+                step: EnvironmentResponse = self._get_step_response(timeout=timeout)
             except EmptyQueueException:
-                pass
+                if timeout is None:
+                    continue
+                break
+            if step.cmd == EnvironmentCommand.ENV_EXITED:
+                # If even one env exits try to restart all envs that failed.
+                self._restart_failed_workers(step)
+                # Clear state and restart this function.
+                worker_steps.clear()
+                step_workers.clear()
+                batch_deadline = None
+                self._queue_steps()
+                min_ready_envs = self._num_ready_envs_to_wait_for()
+            elif step.worker_id not in step_workers:
+                self.env_workers[step.worker_id].waiting = False
+                worker_steps.append(step)
+                step_workers.add(step.worker_id)
         step_infos = self._postprocess_steps(worker_steps)
         return step_infos
 
+    def _get_step_response(
+        self, timeout: Optional[float] = None
+    ) -> EnvironmentResponse:
+        """
+        Gets the next response from the step queue. The workers hosting several environments
+        put the step responses of their environments on the queue as a single list.
+        :raises EmptyQueueException: if no response arrives within the timeout.
+        """
+        if not self._queued_responses:
+            response = self.step_queue.get(timeout=timeout)
+            if not isinstance(response, list):
+                return response
+            self._queued_responses.extend(response)
+        return self._queued_responses.popleft()
+
+    def _num_ready_envs_to_wait_for(self) -> int:
+        num_waiting = sum(1 for ew in self.env_workers if ew.waiting)
+        return max(min(self.run_options.env_settings.min_ready_envs, num_waiting), 1)
+
     def _reset_env(self, config: Optional[Dict] = None) -> List[EnvironmentStep]:
         while any(ew.waiting for ew in self.env_workers):
-            if not self.step_queue.empty():
-                step = self.step_queue.get_nowait()
-                self.env_workers[step.worker_id].waiting = False
+            step = self._get_step_response()
+            self.env_workers[step.worker_id].waiting = False
         # Send config to environment
         self.set_env_parameters(config)
         # First enqueue reset commands for all workers so that they reset in parallel
         for ew in self.env_workers:
             ew.send(EnvironmentCommand.RESET, config)
-        # Next (synchronously) collect the reset observations from each worker in sequence
-        for ew in self.env_workers:
-            ew.previous_step = EnvironmentStep(ew.recv().payload, ew.worker_id, {}, {})
+            ew.previous_all_action_info = {}
+        if self.run_options.env_settings.incremental_reset:
+            return self._wait_for_first_resets()
+        # Next collect the reset observations as the workers finish resetting
+        for ew, response in recv_responses(self.env_workers):
+            ew.previous_step = EnvironmentStep(response.payload, ew.worker_id, {}, {})
         return list(map(lambda ew: ew.previous_step, self.env_workers))
 
+    def _wait_for_first_resets(self) -> List[EnvironmentStep]:
+        """
+        Waits for the first min_ready_envs workers to reset. The workers put their reset
+        results on the step queue, so the others are waited for like workers that are
+        stepping, and join the training in _step once they are done.
+        :return: The EnvironmentSteps of the workers that are done resetting.
+        """
+        for ew in self.env_workers:
+            ew.waiting = True
+        num_resets = self._num_ready_envs_to_wait_for()
+        reset_responses: List[EnvironmentResponse] = []
+        while len(reset_responses) < num_resets:
+            response = self._get_step_response()
+            if response.cmd == EnvironmentCommand.ENV_EXITED:
+                raise response.payload
+            if response.cmd == EnvironmentCommand.RESET:
+                self.env_workers[response.worker_id].waiting = False
+                reset_responses.append(response)
+        return self._postprocess_steps(reset_responses)
+
     def set_env_parameters(self, config: Dict = None) -> None:
         """
         Sends environment parameter settings to C# via the
@@ -472,21 +1170,31 @@ class SubprocessEnvManager(EnvManager):
 
     @property
     def training_behaviors(self) -> Dict[BehaviorName, BehaviorSpec]:
-        result: Dict[BehaviorName, BehaviorSpec] = {}
         for worker in self.env_workers:
             worker.send(EnvironmentCommand.BEHAVIOR_SPECS)
-            result.update(worker.recv().payload)
+        worker_specs: Dict[int, Dict[BehaviorName, BehaviorSpec]] = {
+            worker.worker_id: response.payload
+            for worker, response in recv_responses(self.env_workers)
+        }
+        result: Dict[BehaviorName, BehaviorSpec] = {}
+        for worker in self.env_workers:
+            result.update(worker_specs[worker.worker_id])
         return result
 
     def close(self) -> None:
         logger.debug("SubprocessEnvManager closing.")
         for env_worker in self.env_workers:
             env_worker.request_close()
+        # The spare workers don't report on the step queue, they are only joined.
+        for spare_worker in self.spare_workers:
+            spare_worker.request_close()
         # Pull messages out of the queue until every worker has CLOSED or we time out.
         deadline = time.time() + WORKER_SHUTDOWN_TIMEOUT_S
         while self.workers_alive > 0 and time.time() < deadline:
             try:
-                step: EnvironmentResponse = self.step_queue.get_nowait()
+                step: EnvironmentResponse = self._get_step_response(
+                    timeout=max(deadline - time.time(), 0.0)
+                )
                 env_worker = self.env_workers[step.worker_id]
                 if step.cmd == EnvironmentCommand.CLOSED and not env_worker.closed:
                     env_worker.closed = True
@@ -504,8 +1212,39 @@ class SubprocessEnvManager(EnvManager):
                     logger.error(
                         "A SubprocessEnvManager worker did not shut down correctly so it was forcefully terminated."
                     )
+        for spare_worker in self.spare_workers:
+            spare_worker.process.join(max(deadline - time.time(), 0.0))
+            if spare_worker.process.is_alive():
+                spare_worker.process.terminate()
+            spare_worker.step_reader.close()
+        for env_worker in self.env_workers:
+            env_worker.step_reader.close()
         self.step_queue.join_thread()
 
+    def _process_step_infos(self, step_infos: List[EnvironmentStep]) -> int:
+        num_step_infos = super()._process_step_infos(step_infos)
+        # Hand the trajectories assembled by the workers to the trainers.
+        for worker_id, actor_step_result in self._pending_actor_step_results:
+            for trajectory, policy_version in actor_step_result.trajectories:
+                if trajectory.behavior_id not in self.agent_managers:
+                    continue
+                self.agent_managers[trajectory.behavior_id].publish_trajectory(
+                    trajectory
+                )
+                version_lag = (
+                    self.actor_policy_versions[trajectory.behavior_id] - policy_version
+                )
+                actor_step_result.stats[trajectory.behavior_id].setdefault(
+                    "Policy/Actor Version Lag", []
+                ).append((version_lag, StatsAggregationMethod.AVERAGE))
+            for brain_name, stats in actor_step_result.stats.items():
+                if brain_name in self.agent_managers:
+                    self.agent_managers[brain_name].record_environment_stats(
+                        stats, worker_id
+                    )
+        self._pending_actor_step_results.clear()
+        return num_step_infos
+
     def _postprocess_steps(
         self, env_steps: List[EnvironmentResponse]
     ) -> List[EnvironmentStep]:
@@ -513,9 +1252,16 @@ class SubprocessEnvManager(EnvManager):
         timer_nodes = []
         for step in env_steps:
             payload: StepResponse = step.payload
+            if payload.actor_step_result is not None:
+                self._pending_actor_step_results.append(
+                    (step.worker_id, payload.actor_step_result)
+                )
             env_worker = self.env_workers[step.worker_id]
+            all_step_result = payload.all_step_result
+            if isinstance(all_step_result, SharedStepResult):
+                all_step_result = env_worker.step_reader.read(all_step_result)
             new_step = EnvironmentStep(
-                payload.all_step_result,
+                all_step_result,
                 step.worker_id,
                 env_worker.previous_all_action_info,
                 payload.environment_stats,
@@ -544,3 +1290,31 @@ class SubprocessEnvManager(EnvManager):
                     step_tuple[0], last_step.worker_id
                 )
         return all_action_info
+
+    @timed
+    def _take_batched_step(
+        self, last_steps: List[EnvironmentStep]
+    ) -> List[Dict[BehaviorName, ActionInfo]]:
+        """
+        Decides the actions of several workers at once, with a single policy evaluation
+        per behavior over the DecisionSteps of all the workers.
+        """
+        all_action_info: List[Dict[BehaviorName, ActionInfo]] = [{} for _ in last_steps]
+        for brain_name, policy in self.policies.items():
+            step_indices = [
+                i
+                for i, last_step in enumerate(last_steps)
+                if brain_name in last_step.current_all_step_result
+            ]
+            if not step_indices:
+                continue
+            action_infos = policy.get_actions(
+                [
+                    last_steps[i].current_all_step_result[brain_name][0]
+                    for i in step_indices
+                ],
+                [last_steps[i].worker_id for i in step_indices],
+            )
+            for i, action_info in zip(step_indices, action_infos):
+                all_action_info[i][brain_name] = action_info
+        return all_action_info
@@ -1,4 +1,5 @@
 from unittest import mock
+import time
 import pytest
 from typing import List
 import mlagents.trainers.tests.mock_brain as mb
@@ -7,6 +8,8 @@ from mlagents.trainers.agent_processor import (
     AgentProcessor,
     AgentManager,
     AgentManagerQueue,
+    ColumnarAgentProcessor,
+    ColumnarAgentManager,
 )
 from mlagents.trainers.action_info import ActionInfo
 from mlagents.trainers.torch_entities.action_log_probs import LogProbsTuple
@@ -15,7 +18,13 @@ from mlagents.trainers.stats import StatsReporter, StatsSummary
 from mlagents.trainers.behavior_id_utils import get_global_agent_id
 from mlagents_envs.side_channel.stats_side_channel import StatsAggregationMethod
 from mlagents.trainers.tests.dummy_config import create_observation_specs_with_shapes
-from mlagents_envs.base_env import ActionSpec, ActionTuple
+from mlagents.trainers.exception import UnityTrainerException
+from mlagents_envs.base_env import (
+    ActionSpec,
+    ActionTuple,
+    DecisionSteps,
+    TerminalSteps,
+)
 
 
 def create_mock_policy():
@@ -108,6 +117,36 @@ def test_agentprocessor(num_vis_obs):
     assert len(processor._experience_buffers[0]) == 0
 
 
+def test_agentprocessor_quantization_divergence_stat():
+    policy = create_mock_policy()
+    stats_reporter = StatsReporter("testcat_quantization")
+    processor = AgentProcessor(
+        policy,
+        "test_brain_name",
+        max_trajectory_length=5,
+        stats_reporter=stats_reporter,
+    )
+    mock_decision_steps, mock_terminal_steps = mb.create_mock_steps(
+        num_agents=2,
+        observation_specs=create_observation_specs_with_shapes([(8,)]),
+        action_spec=ActionSpec.create_continuous(2),
+    )
+    fake_action_info = _create_action_info(2, mock_decision_steps.agent_id)
+    processor.add_experiences(
+        mock_decision_steps, mock_terminal_steps, 0, fake_action_info
+    )
+    assert stats_reporter.get_stats_summaries("Policy/Quantization Divergence").num == 0
+    fake_action_info.outputs["quantization_divergence"] = np.array(
+        [0.01, 0.03], dtype=np.float32
+    )
+    processor.add_experiences(
+        mock_decision_steps, mock_terminal_steps, 0, fake_action_info
+    )
+    summary = stats_reporter.get_stats_summaries("Policy/Quantization Divergence")
+    assert summary.num == 2
+    assert summary.mean == pytest.approx(0.02)
+
+
 def test_group_statuses():
     policy = create_mock_policy()
     tqueue = mock.Mock()
@@ -322,6 +361,151 @@ def test_end_episode():
     assert len(processor._episode_rewards.keys()) == 0
 
 
+def _create_columnar_test_steps(step: int, agent_ids: List[int], done: bool = False):
+    """
+    Creates steps whose values depend on the step and the agent, with a vector and a visual
+    observation and two discrete branches.
+    """
+    ids = np.array(agent_ids, dtype=np.int32)
+    values = (10 * step + ids).astype(np.float32)
+    obs = [
+        np.repeat(values[:, None], 8, axis=1),
+        np.ones((len(ids), 4, 4, 3), dtype=np.float32) * values[:, None, None, None],
+    ]
+    no_groups = np.zeros(len(ids), dtype=np.int32)
+    if done:
+        return TerminalSteps(
+            obs, values, np.array([step % 2 == 0] * len(ids)), ids, no_groups, values
+        )
+    action_mask = [
+        np.array([[step % 2 == 0, False]] * len(ids)),
+        np.array([[False, step % 3 == 0, False]] * len(ids)),
+    ]
+    return DecisionSteps(obs, values, ids, action_mask, no_groups, values)
+
+
+def _create_columnar_test_action_info(step: int, agent_ids: List[int]) -> ActionInfo:
+    ids = np.array(agent_ids, dtype=np.float32)
+    continuous = (step + ids[:, None] / 10).astype(np.float32)
+    discrete = np.stack([ids % 2, (ids + step) % 3], axis=1).astype(np.int32)
+    action = ActionTuple(continuous=continuous, discrete=discrete)
+    outputs = {
+        "action": action,
+        "entropy": np.array([1.0], dtype=np.float32),
+        "log_probs": LogProbsTuple(continuous=-continuous, discrete=-discrete),
+    }
+    return ActionInfo(action, action, outputs, agent_ids)
+
+
+def test_columnar_agentprocessor_matches_agentprocessor():
+    processors = [
+        processor_type(
+            create_mock_policy(),
+            "test_brain_name",
+            max_trajectory_length=4,
+            stats_reporter=StatsReporter("testcat"),
+        )
+        for processor_type in (AgentProcessor, ColumnarAgentProcessor)
+    ]
+    queues = [mock.Mock(), mock.Mock()]
+    for processor, tqueue in zip(processors, queues):
+        processor.publish_trajectory_queue(tqueue)
+
+    # Agent 2 joins on step 3, agent 1 is done on step 6 and starts over. The actions are
+    # the ones of the previous decisions.
+    action_ids: List[int] = []
+    for step in range(10):
+        decision_ids = [0, 1, 2] if step >= 3 else [0, 1]
+        terminal_ids = []
+        if step == 6:
+            decision_ids, terminal_ids = [0, 2], [1]
+        decision_steps = _create_columnar_test_steps(step, decision_ids)
+        terminal_steps = _create_columnar_test_steps(step, terminal_ids, done=True)
+        action_info = (
+            _create_columnar_test_action_info(step, action_ids)
+            if action_ids
+            else ActionInfo.empty()
+        )
+        for processor in processors:
+            processor.add_experiences(decision_steps, terminal_steps, 0, action_info)
+        action_ids = decision_ids
+
+    trajectories, columnar_trajectories = [
+        [put_call[0][0] for put_call in tqueue.put.call_args_list] for tqueue in queues
+    ]
+    assert len(columnar_trajectories) == len(trajectories) == 5
+    for trajectory, columnar_trajectory in zip(trajectories, columnar_trajectories):
+        assert columnar_trajectory.agent_id == trajectory.agent_id
+        assert len(columnar_trajectory.steps) == len(trajectory.steps)
+        assert columnar_trajectory.done_reached == trajectory.done_reached
+        assert columnar_trajectory.interrupted == trajectory.interrupted
+        assert columnar_trajectory.steps[-1].reward == trajectory.steps[-1].reward
+        for to_buffer in ("to_columnar_agentbuffer", "to_agentbuffer"):
+            buffer = getattr(trajectory, to_buffer)()
+            columnar_buffer = getattr(columnar_trajectory, to_buffer)()
+            assert set(columnar_buffer.keys()) == set(buffer.keys())
+            for key in buffer.keys():
+                np.testing.assert_array_equal(
+                    np.asarray(columnar_buffer[key].get_batch()),
+                    np.asarray(buffer[key].get_batch()),
+                )
+
+    # The agents left are removed at the end of the episode.
+    processors[1].end_episode()
+    assert not any(processors[1]._agent_slots.values())
+    assert all(processors[1]._pending_rows == -1)
+
+
+def test_columnar_agentprocessor_removes_done_agent_without_action():
+    policy = create_mock_policy()
+    processor = ColumnarAgentProcessor(
+        policy, "test_brain_name", StatsReporter("testcat"), max_trajectory_length=4
+    )
+    tqueue = mock.Mock()
+    processor.publish_trajectory_queue(tqueue)
+    processor.add_experiences(
+        _create_columnar_test_steps(0, [0, 1]),
+        _create_columnar_test_steps(0, [], done=True),
+        0,
+        ActionInfo.empty(),
+    )
+    processor.add_experiences(
+        _create_columnar_test_steps(1, [0, 1]),
+        _create_columnar_test_steps(1, [], done=True),
+        0,
+        _create_columnar_test_action_info(0, [0, 1]),
+    )
+    # Agent 1 is done, but the action of its last decision wasn't stored.
+    processor.add_experiences(
+        _create_columnar_test_steps(2, [0]),
+        _create_columnar_test_steps(2, [1], done=True),
+        0,
+        _create_columnar_test_action_info(1, [0]),
+    )
+    assert list(processor._agent_slots[0]) == [0]
+    assert processor._trajectory_lengths.sum() == 2
+    removed_id = get_global_agent_id(0, 1)
+    policy.remove_memories.assert_called_with([removed_id])
+    policy.remove_previous_action.assert_called_with([removed_id])
+    assert not tqueue.put.called
+
+
+def test_columnar_agentprocessor_rejects_groups():
+    processor = ColumnarAgentProcessor(
+        create_mock_policy(), "test_brain_name", StatsReporter("testcat")
+    )
+    mock_decision_steps, mock_terminal_steps = mb.create_mock_steps(
+        num_agents=2,
+        observation_specs=create_observation_specs_with_shapes([(8,)]),
+        action_spec=ActionSpec.create_continuous(2),
+        grouped=True,
+    )
+    with pytest.raises(UnityTrainerException):
+        processor.add_experiences(
+            mock_decision_steps, mock_terminal_steps, 0, ActionInfo.empty()
+        )
+
+
 def test_agent_manager():
     policy = create_mock_policy()
     name_behavior_id = "test_brain_name"
@@ -333,6 +517,13 @@ def test_agent_manager():
     )
     assert len(manager._trajectory_queues) == 1
     assert isinstance(manager._trajectory_queues[0], AgentManagerQueue)
+    columnar_manager = ColumnarAgentManager(
+        policy,
+        name_behavior_id,
+        max_trajectory_length=5,
+        stats_reporter=StatsReporter("testcat"),
+    )
+    assert columnar_manager._trajectory_queues == [columnar_manager.trajectory_queue]
 
 
 def test_agent_manager_queue():
@@ -346,6 +537,40 @@ def test_agent_manager_queue():
     assert queue.empty()
 
 
+def test_process_safe_agent_manager_queue():
+    queue = AgentManagerQueue(behavior_id="testbehavior", process_safe=True)
+    item = {"weights": np.zeros(3)}
+    queue.put(item)
+    # The item is copied when it is put on the queue.
+    item["weights"] += 1
+    for _ in range(100):
+        try:
+            queue_item = queue.get_nowait()
+            break
+        except AgentManagerQueue.Empty:
+            time.sleep(0.01)
+    np.testing.assert_array_equal(queue_item["weights"], np.zeros(3))
+    queue.close()
+
+
+def test_process_safe_agent_manager_queue_size():
+    queue = AgentManagerQueue(behavior_id="testbehavior", process_safe=True)
+    # multiprocessing.Queue.qsize raises NotImplementedError on macOS.
+    queue._queue.qsize = mock.Mock(side_effect=NotImplementedError)
+    for i in range(3):
+        queue.put(i)
+    assert queue.qsize() == 3
+    items = []
+    while len(items) < 2:
+        try:
+            items.append(queue.get_nowait())
+        except AgentManagerQueue.Empty:
+            time.sleep(0.01)
+    assert items == [0, 1]
+    assert queue.qsize() == 1
+    queue.close()
+
+
 def test_agent_manager_stats():
     policy = mock.Mock()
     stats_reporter = StatsReporter("FakeCategory")
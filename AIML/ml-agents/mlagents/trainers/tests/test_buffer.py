@@ -3,10 +3,12 @@ from mlagents.trainers.buffer import (
     AgentBuffer,
     AgentBufferField,
     BufferKey,
+    ColumnarAgentBuffer,
+    ColumnarAgentBufferField,
     ObservationKeyPrefix,
     RewardSignalKeyPrefix,
 )
-from mlagents.trainers.trajectory import ObsUtil
+from mlagents.trainers.trajectory import GroupObsUtil, ObsUtil
 
 
 def assert_array(a, b):
@@ -17,8 +19,8 @@ def assert_array(a, b):
         assert la[i] == lb[i]
 
 
-def construct_fake_buffer(fake_agent_id):
-    b = AgentBuffer()
+def construct_fake_buffer(fake_agent_id, buffer_class=AgentBuffer):
+    b = buffer_class()
     for step in range(9):
         b[ObsUtil.get_name_at(0)].append(
             np.array(
@@ -280,3 +282,167 @@ def test_buffer_save_load():
     assert len(original) == len(loaded)
     for k in original.keys():
         assert np.allclose(original[k], loaded[k])
+
+
+def test_columnar_buffer():
+    update_buffer = ColumnarAgentBuffer()
+    list_buffer = AgentBuffer()
+    for fake_agent_id in range(1, 4):
+        agent_buffer = construct_fake_buffer(fake_agent_id)
+        agent_buffer.resequence_and_append(
+            update_buffer, batch_size=None, training_length=2
+        )
+        agent_buffer.resequence_and_append(
+            list_buffer, batch_size=None, training_length=2
+        )
+    assert update_buffer.num_experiences == list_buffer.num_experiences == 30
+    for key in list_buffer.keys():
+        assert isinstance(update_buffer[key], ColumnarAgentBufferField)
+    key = BufferKey.CONTINUOUS_ACTION
+    assert np.array_equal(np.asarray(update_buffer[key]), np.array(list_buffer[key]))
+    assert np.array_equal(
+        update_buffer[key].get_batch(batch_size=4), list_buffer[key].get_batch(4)
+    )
+    for training_length in [4, 7]:
+        assert np.array_equal(
+            update_buffer[key].get_batch(training_length=training_length),
+            np.array(list_buffer[key].get_batch(training_length=training_length)),
+        )
+    assert update_buffer[BufferKey.GROUP_CONTINUOUS_ACTION].contains_lists
+    padded = update_buffer[BufferKey.GROUP_CONTINUOUS_ACTION].padded_to_batch()
+    assert len(padded) == 3 and padded[0].shape == (30, 2)
+
+    c = update_buffer.make_mini_batch(start=2, end=6)
+    assert c.keys() == update_buffer.keys()
+    assert np.array_equal(np.asarray(c[key]), np.array(list_buffer[key][2:6]))
+
+    # Shuffling must keep the fields consistent with each other
+    update_buffer.shuffle(sequence_length=2)
+    obs = np.asarray(update_buffer[ObsUtil.get_name_at(0)])
+    actions = np.asarray(update_buffer[key])
+    # Padding entries are 0 in both fields
+    assert np.array_equal((obs[:, 2] + 1) * (obs[:, 2] != 0), actions[:, 0])
+
+    mb = update_buffer.sample_mini_batch(batch_size=4, sequence_length=2)
+    assert np.asarray(mb[key]).shape == (4, 2)
+
+    update_buffer.truncate(4, sequence_length=3)
+    assert update_buffer.num_experiences == 3
+    assert np.array_equal(np.asarray(update_buffer[key]), actions[-3:])
+
+
+def test_columnar_buffer_mini_batch_copy_on_write():
+    update_buffer = construct_fake_buffer(1, ColumnarAgentBuffer)
+    key = BufferKey.CONTINUOUS_ACTION
+    actions = np.asarray(update_buffer[key]).copy()
+    new_actions = np.arange(8, dtype=np.float32).reshape(4, 2)
+    # Modifying a mini-batch leaves the buffer it was taken from unchanged.
+    mb = update_buffer.make_mini_batch(0, 4)
+    mb[key].set(new_actions)
+    assert np.array_equal(np.asarray(mb[key]), new_actions)
+    mb = update_buffer.make_mini_batch(0, 4)
+    mb[key].extend(new_actions[:2])
+    assert np.array_equal(
+        np.asarray(mb[key]), np.concatenate([actions[:4], new_actions[:2]])
+    )
+    assert np.array_equal(np.asarray(update_buffer[key]), actions)
+
+
+def test_columnar_buffer_ring():
+    update_buffer = ColumnarAgentBuffer(max_length=20)
+    for fake_agent_id in range(1, 4):
+        construct_fake_buffer(fake_agent_id).resequence_and_append(
+            update_buffer, batch_size=None, training_length=2
+        )
+    # Only the most recent 20 experiences are kept, in order.
+    assert update_buffer.num_experiences == 20
+    actions = np.asarray(update_buffer[BufferKey.CONTINUOUS_ACTION])
+    assert actions[0, 0] == 204
+    assert actions[-2, 0] == 384
+    assert np.array_equal(
+        np.asarray(update_buffer[BufferKey.CONTINUOUS_ACTION][-3:]), actions[-3:]
+    )
+    mb = update_buffer.sample_mini_batch(batch_size=10, sequence_length=2)
+    assert np.asarray(mb[BufferKey.CONTINUOUS_ACTION]).shape == (10, 2)
+
+
+def test_columnar_buffer_shuffle_keeps_ring():
+    update_buffer = ColumnarAgentBuffer(max_length=20)
+    key = BufferKey.CONTINUOUS_ACTION
+    construct_fake_buffer(1).resequence_and_append(
+        update_buffer, batch_size=None, training_length=2
+    )
+    field = update_buffer[key]
+    update_buffer.shuffle(sequence_length=2)
+    # The fields are shuffled in place and remain ring buffers.
+    assert update_buffer[key] is field
+    assert field.max_length == 20
+    for fake_agent_id in range(2, 5):
+        construct_fake_buffer(fake_agent_id).resequence_and_append(
+            update_buffer, batch_size=None, training_length=2
+        )
+    assert update_buffer.num_experiences == 20
+    assert np.asarray(field)[-2, 0] == 484
+
+
+def test_columnar_buffer_save_load():
+    original = construct_fake_buffer(3, ColumnarAgentBuffer)
+    import io
+
+    write_buffer = io.BytesIO()
+    del original[BufferKey.GROUP_CONTINUOUS_ACTION]
+    original.save_to_file(write_buffer)
+
+    loaded = ColumnarAgentBuffer(max_length=5)
+    loaded.load_from_file(write_buffer)
+
+    assert loaded.num_experiences == 5
+    for k in original.keys():
+        assert np.allclose(np.asarray(original[k])[-5:], loaded[k])
+
+
+def test_columnar_buffer_index_views():
+    update_buffer = ColumnarAgentBuffer()
+    for fake_agent_id in range(1, 4):
+        construct_fake_buffer(fake_agent_id).resequence_and_append(
+            update_buffer, batch_size=None, training_length=2
+        )
+    key = BufferKey.CONTINUOUS_ACTION
+    original = np.array(update_buffer[key])
+
+    np.random.seed(0)
+    update_buffer.shuffle(sequence_length=2)
+    np.random.seed(0)
+    permutation = np.arange(15)
+    np.random.shuffle(permutation)
+    expected = original.reshape(15, 2, 2)[permutation].reshape(30, 2)
+    assert np.array_equal(np.asarray(update_buffer[key]), expected)
+
+    mb = update_buffer.make_mini_batch(4, 10)
+    assert np.array_equal(np.asarray(mb[key]), expected[4:10])
+    assert np.array_equal(mb[key][1], expected[5])
+
+    # Modifying a shuffled field gathers its entries, and leaves the mini-batch intact.
+    update_buffer[key].append(np.array([1, 2], dtype=np.float32))
+    assert len(update_buffer[key]) == 31
+    assert np.array_equal(np.asarray(update_buffer[key])[:30], expected)
+    assert np.array_equal(np.asarray(mb[key]), expected[4:10])
+
+
+def test_uint8_observations():
+    for buffer_class in [AgentBuffer, ColumnarAgentBuffer]:
+        b = buffer_class()
+        for step in range(3):
+            b[ObsUtil.get_name_at(0)].append(np.full((2, 2, 1), step, dtype=np.uint8))
+            b[GroupObsUtil.get_name_at(0)].append(
+                [np.full((2, 2, 1), 255, dtype=np.uint8)] * step
+            )
+        padded = np.asanyarray(
+            b[ObsUtil.get_name_at(0)].get_batch(batch_size=2, training_length=2)
+        )
+        assert padded.dtype == np.uint8
+        assert np.array_equal(padded[:, 0, 0, 0], [0, 1, 2, 0])
+        group_obs = GroupObsUtil.from_buffer(b, 1)
+        assert len(group_obs) == 2
+        assert np.array_equal(group_obs[0][0][:, 0, 0, 0], [np.nan, 1, 1], True)
+        assert np.array_equal(group_obs[1][0][:, 0, 0, 0], [np.nan, np.nan, 1], True)
@@ -1,4 +1,5 @@
 import pytest
+import re
 import yaml
 from unittest.mock import MagicMock, patch, mock_open
 from mlagents.trainers import learn
@@ -114,6 +115,17 @@ def test_bad_env_path():
         factory(worker_id=-1, side_channels=[])
 
 
+def test_socket_path_prefix():
+    prefix = learn.get_socket_path_prefix("ppo")
+    assert os.path.basename(prefix) == "mlagents-ppo"
+    long_prefix = learn.get_socket_path_prefix("a_very_long_run_id" * 10)
+    assert len(os.path.basename(long_prefix)) <= 32
+    assert long_prefix != learn.get_socket_path_prefix("another_long_run_id" * 10)
+    unsafe_prefix = learn.get_socket_path_prefix("../ppo run")
+    assert os.path.dirname(unsafe_prefix) == os.path.dirname(prefix)
+    assert re.fullmatch(r"mlagents-[0-9a-f]{16}", os.path.basename(unsafe_prefix))
+
+
 @patch("builtins.open", new_callable=mock_open, read_data=MOCK_YAML)
 def test_commandline_args(mock_file):
     # No args raises
@@ -22,6 +22,7 @@ from mlagents.trainers.settings import (
     deep_update_dict,
     strict_to_cls,
     ScheduleType,
+    SelfPlaySettings,
 )
 from mlagents.trainers.ppo.trainer import PPOSettings, TRAINER_NAME as PPO_TRAINER_NAME
 from mlagents.trainers.sac.trainer import SACSettings, TRAINER_NAME as SAC_TRAINER_NAME
@@ -261,6 +262,12 @@ def test_memory_settings_validation():
         NetworkSettings.MemorySettings(sequence_length=128, memory_size=0)
 
 
+def test_learner_process_validation():
+    TrainerSettings(learner_process=True)
+    with pytest.raises(TrainerConfigError):
+        TrainerSettings(learner_process=True, self_play=SelfPlaySettings())
+
+
 def test_env_parameter_structure():
     """
     Tests the EnvironmentParameterSettings structure method and all validators.
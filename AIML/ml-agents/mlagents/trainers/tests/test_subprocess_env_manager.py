@@ -1,18 +1,35 @@
+from typing import List
 from unittest import mock
 from unittest.mock import Mock, MagicMock, call, ANY
 import unittest
 import pytest
+import numpy as np
 from queue import Empty as EmptyQueue
 
-from mlagents.trainers.settings import RunOptions
+from mlagents.trainers.settings import RunOptions, EnvironmentSettings
+from multiprocessing import Pipe
+
 from mlagents.trainers.subprocess_env_manager import (
     SubprocessEnvManager,
+    EnvironmentRequest,
     EnvironmentResponse,
     StepResponse,
     EnvironmentCommand,
+    MultiEnvWorkerConnection,
+    UnityEnvWorker,
+    recv_responses,
+    WorkerEnvironment,
 )
+from mlagents.trainers.worker_actor import ActorPolicyUpdate, WorkerActors
+from mlagents.trainers.policy.torch_policy import TorchPolicy
+from mlagents.trainers.settings import NetworkSettings
+from mlagents.trainers.torch_entities.networks import SimpleActor
 from mlagents.trainers.env_manager import EnvironmentStep
-from mlagents_envs.base_env import BaseEnv
+from mlagents.trainers.shared_memory_steps import (
+    SharedStepResultReader,
+    SharedStepResultWriter,
+)
+from mlagents_envs.base_env import BaseEnv, ActionSpec
 from mlagents_envs.side_channel.stats_side_channel import StatsAggregationMethod
 from mlagents_envs.exception import (
     UnityEnvironmentException,
@@ -28,7 +45,11 @@ from mlagents.trainers.tests.check_env_trains import (
     check_environment_trains,
     DebugWriter,
 )
-from mlagents.trainers.tests.dummy_config import ppo_dummy_config
+from mlagents.trainers.tests.dummy_config import (
+    ppo_dummy_config,
+    create_observation_specs_with_shapes,
+)
+from mlagents.trainers.tests.mock_brain import create_mock_steps
 
 
 def mock_env_factory(worker_id):
@@ -42,7 +63,9 @@ class MockEnvWorker:
         self.conn = None
         self.send = Mock()
         self.recv = Mock(return_value=resp)
+        self.poll = Mock(return_value=True)
         self.waiting = False
+        self.step_reader = Mock()
 
 
 def create_worker_mock(worker_id, step_queue, env_factor, engine_c):
@@ -98,6 +121,32 @@ class SubprocessEnvManagerTest(unittest.TestCase):
             )
         assert res == list(map(lambda ew: ew.previous_step, manager.env_workers))
 
+    @mock.patch(
+        "mlagents.trainers.subprocess_env_manager.SubprocessEnvManager.create_worker"
+    )
+    def test_incremental_reset_returns_first_resets(self, mock_create_worker):
+        mock_create_worker.side_effect = create_worker_mock
+        run_options = RunOptions(
+            env_settings=EnvironmentSettings(incremental_reset=True, min_ready_envs=2)
+        )
+        manager = SubprocessEnvManager(mock_env_factory, run_options, 4)
+        manager.step_queue = Mock()
+        manager.step_queue.get.side_effect = [
+            EnvironmentResponse(
+                EnvironmentCommand.RESET, worker_id, StepResponse(worker_id, None, {})
+            )
+            for worker_id in [2, 0]
+        ]
+
+        res = manager._reset_env({})
+        for env in manager.env_workers:
+            env.send.assert_called_with(EnvironmentCommand.RESET, {})
+            env.recv.assert_not_called()
+        # The workers that are still resetting are waited for like stepping workers.
+        assert [step.worker_id for step in res] == [2, 0]
+        assert [step.current_all_step_result for step in res] == [2, 0]
+        assert [ew.waiting for ew in manager.env_workers] == [False, True, False, True]
+
     @mock.patch(
         "mlagents.trainers.subprocess_env_manager.SubprocessEnvManager.create_worker"
     )
@@ -130,7 +179,7 @@ class SubprocessEnvManagerTest(unittest.TestCase):
         mock_create_worker.side_effect = create_worker_mock
         manager = SubprocessEnvManager(mock_env_factory, RunOptions(), 3)
         manager.step_queue = Mock()
-        manager.step_queue.get_nowait.side_effect = [
+        manager.step_queue.get.side_effect = [
             EnvironmentResponse(EnvironmentCommand.STEP, 0, StepResponse(0, None, {})),
             EnvironmentResponse(EnvironmentCommand.STEP, 1, StepResponse(1, None, {})),
             EmptyQueue(),
@@ -146,7 +195,7 @@ class SubprocessEnvManagerTest(unittest.TestCase):
         for i, env in enumerate(manager.env_workers):
             if i < 2:
                 env.send.assert_called_with(EnvironmentCommand.STEP, step_mock)
-                manager.step_queue.get_nowait.assert_called()
+                manager.step_queue.get.assert_called()
                 # Check that the "last steps" are set to the value returned for each step
                 self.assertEqual(
                     manager.env_workers[i].previous_step.current_all_step_result, i
@@ -156,6 +205,33 @@ class SubprocessEnvManagerTest(unittest.TestCase):
             manager.env_workers[1].previous_step,
         ]
 
+    @mock.patch(
+        "mlagents.trainers.subprocess_env_manager.SubprocessEnvManager.create_worker"
+    )
+    def test_step_waits_for_min_ready_envs(self, mock_create_worker):
+        mock_create_worker.side_effect = create_worker_mock
+        run_options = RunOptions(env_settings=EnvironmentSettings(min_ready_envs=2))
+        manager = SubprocessEnvManager(mock_env_factory, run_options, 3)
+        manager.step_queue = Mock()
+        manager.step_queue.get.side_effect = [
+            EnvironmentResponse(EnvironmentCommand.STEP, 2, StepResponse(2, None, {})),
+            EnvironmentResponse(EnvironmentCommand.STEP, 0, StepResponse(0, None, {})),
+            EmptyQueue(),
+        ]
+        for env_worker in manager.env_workers:
+            env_worker.previous_step = Mock()
+        manager._take_step = Mock(return_value=Mock())
+        res = manager._step()
+        # Blocks until two of the workers are done, then only takes what is available.
+        manager.step_queue.get.assert_has_calls(
+            [call(timeout=None), call(timeout=None), call(timeout=0.0)]
+        )
+        assert res == [
+            manager.env_workers[2].previous_step,
+            manager.env_workers[0].previous_step,
+        ]
+        assert manager.env_workers[1].waiting
+
     @mock.patch(
         "mlagents.trainers.subprocess_env_manager.SubprocessEnvManager.create_worker"
     )
@@ -176,7 +252,7 @@ class SubprocessEnvManagerTest(unittest.TestCase):
         ]
         manager = SubprocessEnvManager(mock_env_factory, RunOptions(), 2)
         manager.step_queue = Mock()
-        manager.step_queue.get_nowait.side_effect = [
+        manager.step_queue.get.side_effect = [
             EnvironmentResponse(
                 EnvironmentCommand.ENV_EXITED,
                 0,
@@ -261,13 +337,33 @@ class SubprocessEnvManagerTest(unittest.TestCase):
         assert agent_manager_mock.policy == mock_policy
 
 
+@pytest.mark.parametrize(
+    "env_settings",
+    [
+        EnvironmentSettings(),
+        EnvironmentSettings(shared_memory_steps=True),
+        EnvironmentSettings(batch_inference=True, batch_inference_wait_s=0.01),
+        EnvironmentSettings(worker_inference=True),
+        EnvironmentSettings(envs_per_worker=3, shared_memory_steps=True),
+        EnvironmentSettings(incremental_reset=True),
+    ],
+    ids=[
+        "default",
+        "shared_memory",
+        "batch_inference",
+        "worker_inference",
+        "envs_per_worker",
+        "incremental_reset",
+    ],
+)
 @pytest.mark.parametrize("num_envs", [1, 4])
-def test_subprocess_env_endtoend(num_envs):
+def test_subprocess_env_endtoend(num_envs, env_settings):
     def simple_env_factory(worker_id, config):
         env = SimpleEnvironment(["1D"], action_sizes=(0, 1))
         return env
 
-    env_manager = SubprocessEnvManager(simple_env_factory, RunOptions(), num_envs)
+    run_options = RunOptions(env_settings=env_settings)
+    env_manager = SubprocessEnvManager(simple_env_factory, run_options, num_envs)
     # Run PPO using env_manager
     check_environment_trains(
         simple_env_factory(0, []),
@@ -284,6 +380,120 @@ def test_subprocess_env_endtoend(num_envs):
     env_manager.close()
 
 
+def test_multi_env_worker_connection():
+    parent_conn, child_conn = Pipe()
+    multi_env_conn = MultiEnvWorkerConnection(parent_conn)
+    first_conn, second_conn = multi_env_conn.for_env(3), multi_env_conn.for_env(4)
+
+    # The steps are held until they are flushed, then sent together.
+    first_conn.send(EnvironmentRequest(EnvironmentCommand.STEP, "a"))
+    second_conn.send(EnvironmentRequest(EnvironmentCommand.STEP, "b"))
+    assert not child_conn.poll()
+    multi_env_conn.flush_steps()
+    assert child_conn.recv() == [
+        (3, EnvironmentRequest(EnvironmentCommand.STEP, "a")),
+        (4, EnvironmentRequest(EnvironmentCommand.STEP, "b")),
+    ]
+    # Other requests are sent right away.
+    second_conn.send(EnvironmentRequest(EnvironmentCommand.BEHAVIOR_SPECS))
+    assert child_conn.recv() == [
+        (4, EnvironmentRequest(EnvironmentCommand.BEHAVIOR_SPECS))
+    ]
+
+    # The responses go to the environment they are for, in order.
+    for worker_id, payload in [(4, 0), (3, 1), (4, 2)]:
+        child_conn.send(
+            EnvironmentResponse(EnvironmentCommand.RESET, worker_id, payload)
+        )
+    assert second_conn.recv().payload == 0
+    assert second_conn.recv().payload == 2
+    assert first_conn.recv().payload == 1
+
+    # Restarting an environment drops what the old one sent.
+    child_conn.send(EnvironmentResponse(EnvironmentCommand.ENV_EXITED, 3, None))
+    child_conn.send(EnvironmentResponse(EnvironmentCommand.RESET, 4, 3))
+    assert second_conn.recv().payload == 3
+    multi_env_conn.restart(3)
+    # So does restarting an environment whose exit is still in the pipe, until the
+    # process acknowledges the restart.
+    child_conn.send(EnvironmentResponse(EnvironmentCommand.ENV_EXITED, 3, None))
+    assert child_conn.recv() == [(3, EnvironmentRequest(EnvironmentCommand.RESTART))]
+    child_conn.send(EnvironmentResponse(EnvironmentCommand.RESTART, 3, None))
+    child_conn.send(EnvironmentResponse(EnvironmentCommand.RESET, 3, 4))
+    assert first_conn.recv().payload == 4
+    parent_conn.close()
+    child_conn.close()
+
+
+def test_recv_responses_in_arrival_order():
+    pipes = [Pipe() for _ in range(2)]
+    multi_env_conn = MultiEnvWorkerConnection(pipes[1][0])
+    env_workers = [
+        UnityEnvWorker(None, 0, pipes[0][0]),
+        UnityEnvWorker(None, 1, multi_env_conn.for_env(1)),
+        UnityEnvWorker(None, 2, multi_env_conn.for_env(2)),
+    ]
+    pipes[1][1].send(EnvironmentResponse(EnvironmentCommand.RESET, 2, "c"))
+    pipes[1][1].send(EnvironmentResponse(EnvironmentCommand.RESET, 1, "b"))
+    pipes[0][1].send(EnvironmentResponse(EnvironmentCommand.RESET, 0, "a"))
+    responses = recv_responses(env_workers)
+    assert [
+        (env_worker.worker_id, response.payload) for env_worker, response in responses
+    ] == [(0, "a"), (1, "b"), (2, "c")]
+
+    # A worker that doesn't respond yet doesn't hold back the others.
+    responses = recv_responses(env_workers[:2])
+    pipes[1][1].send(EnvironmentResponse(EnvironmentCommand.RESET, 1, "d"))
+    env_worker, response = next(responses)
+    assert (env_worker.worker_id, response.payload) == (1, "d")
+    pipes[0][1].close()
+    with pytest.raises(UnityCommunicationException):
+        next(responses)
+    for parent_conn, child_conn in pipes:
+        parent_conn.close()
+        child_conn.close()
+
+
+def test_shared_memory_step_result():
+    observation_specs = create_observation_specs_with_shapes([(3,), (84, 84, 3)])
+    writer = SharedStepResultWriter()
+    reader = SharedStepResultReader()
+    for num_agents in [2, 1, 20]:
+        all_step_result = {
+            "discrete": create_mock_steps(
+                num_agents, observation_specs, ActionSpec.create_discrete((2, 3))
+            ),
+            "continuous": create_mock_steps(
+                num_agents, observation_specs, ActionSpec.create_continuous(2), True
+            ),
+        }
+        all_step_result["discrete"][0].obs[0][:] = np.random.rand(num_agents, 3)
+        descriptor = writer.write(all_step_result)
+        result = reader.read(descriptor)
+        # Overwriting the slab must not change what has already been read.
+        writer.write(all_step_result)
+        assert result.keys() == all_step_result.keys()
+        for behavior_name, steps in all_step_result.items():
+            for expected, actual in zip(steps, result[behavior_name]):
+                assert type(actual) is type(expected)
+                for obs, expected_obs in zip(actual.obs, expected.obs):
+                    np.testing.assert_array_equal(obs, expected_obs)
+                    assert obs.dtype == expected_obs.dtype
+                for field in ["reward", "agent_id", "group_id", "group_reward"]:
+                    np.testing.assert_array_equal(
+                        getattr(actual, field), getattr(expected, field)
+                    )
+        masks = result["discrete"][0].action_mask
+        assert [mask.shape for mask in masks] == [(num_agents, 2), (num_agents, 3)]
+        assert result["continuous"][0].action_mask is None
+        np.testing.assert_array_equal(
+            result["continuous"][1].interrupted,
+            all_step_result["continuous"][1].interrupted,
+        )
+    reader.close()
+    writer.close()
+
+
 class CustomTestOnlyException(Exception):
     pass
 
@@ -308,8 +518,68 @@ def test_subprocess_failing_step(num_envs):
     env_manager.close()
 
 
+class StepFailingEnvironment(SimpleEnvironment):
+    def __init__(self, brain_names, fail_at_step):
+        super().__init__(brain_names, action_sizes=(0, 1))
+        self.fail_at_step = fail_at_step
+        self.num_steps = 0
+
+    def step(self) -> None:
+        self.num_steps += 1
+        if self.num_steps == self.fail_at_step:
+            raise UnityCommunicationException("Test msg")
+        super().step()
+
+
+def test_subprocess_env_restarts_on_spare_worker():
+    def failing_env_factory(worker_id, config):
+        # Only the first environment of worker 0 fails, the spare that replaces it doesn't.
+        return StepFailingEnvironment(["1D"], 20 if worker_id == 0 else None)
+
+    run_options = RunOptions(env_settings=EnvironmentSettings(spare_workers=1))
+    env_manager = SubprocessEnvManager(failing_env_factory, run_options, 2)
+    spare_process = env_manager.spare_workers[0].process
+    check_environment_trains(
+        failing_env_factory(1, []),
+        {"1D": ppo_dummy_config()},
+        env_manager=env_manager,
+        success_threshold=None,
+    )
+    assert env_manager.restart_counts == [1, 0]
+    assert env_manager.env_workers[0].process is spare_process
+    # A new spare was started to keep the pool full.
+    assert [ew.worker_id for ew in env_manager.spare_workers] == [3]
+    env_manager.close()
+
+
+def test_subprocess_env_restarts_env_sharing_a_worker():
+    created_envs: List[int] = []
+
+    def failing_env_factory(worker_id, config):
+        # Only the first environment of worker 0 fails, the one replacing it doesn't.
+        created_envs.append(worker_id)
+        fails = worker_id == 0 and created_envs.count(0) == 1
+        return StepFailingEnvironment(["1D"], 20 if fails else None)
+
+    run_options = RunOptions(env_settings=EnvironmentSettings(envs_per_worker=2))
+    env_manager = SubprocessEnvManager(failing_env_factory, run_options, 2)
+    process = env_manager.env_workers[0].process
+    check_environment_trains(
+        failing_env_factory(1, []),
+        {"1D": ppo_dummy_config()},
+        env_manager=env_manager,
+        success_threshold=None,
+    )
+    assert env_manager.restart_counts == [1, 0]
+    # The environment was replaced in the process it shared with the other one.
+    assert env_manager.env_workers[0].process is process
+    assert env_manager.env_workers[1].process is process
+    env_manager.close()
+
+
+@pytest.mark.parametrize("envs_per_worker", [1, 2])
 @pytest.mark.parametrize("num_envs", [1, 4])
-def test_subprocess_env_raises_errors(num_envs):
+def test_subprocess_env_raises_errors(num_envs, envs_per_worker):
     def failing_env_factory(worker_id, config):
         import time
 
@@ -319,7 +589,74 @@ def test_subprocess_env_raises_errors(num_envs):
         time.sleep(0.5)
         raise UnityEnvironmentException()
 
-    env_manager = SubprocessEnvManager(failing_env_factory, RunOptions(), num_envs)
+    run_options = RunOptions(
+        env_settings=EnvironmentSettings(envs_per_worker=envs_per_worker)
+    )
+    env_manager = SubprocessEnvManager(failing_env_factory, run_options, num_envs)
     with pytest.raises(UnityEnvironmentException):
         env_manager.reset()
     env_manager.close()
+
+
+def _actor_policy_update(env, version, max_trajectory_length=2):
+    policy = TorchPolicy(
+        0,
+        env.behavior_spec,
+        NetworkSettings(),
+        SimpleActor,
+        {"conditional_sigma": False, "tanh_squash": False},
+    )
+    return ActorPolicyUpdate("1D", version, max_trajectory_length, policy=policy)
+
+
+def test_worker_actor_trajectories_keep_their_policy_version():
+    env = SimpleEnvironment(["1D"], action_sizes=(0, 1))
+    actors = WorkerActors(0)
+    actors.update_policy(_actor_policy_update(env, 1), None)
+    policy = actors.actors["1D"].policy
+    env.reset()
+    all_step_result = {"1D": env.get_steps("1D")}
+    actors.add_experiences(all_step_result, {})
+
+    def act_until_trajectory():
+        nonlocal all_step_result
+        trajectory_queue = actors.actors["1D"].processor.versioned_trajectory_queue
+        while trajectory_queue.empty():
+            all_action_info = actors.get_actions(all_step_result)
+            env.set_actions("1D", all_action_info["1D"].env_action)
+            env.step()
+            all_step_result = {"1D": env.get_steps("1D")}
+            actors.add_experiences(all_step_result, all_action_info)
+
+    act_until_trajectory()
+    # The trajectories completed before an update keep the version they were made with,
+    # even when they are collected after it.
+    actors.update_policy(
+        ActorPolicyUpdate("1D", 2, 2, weights=policy.get_weights()), all_step_result
+    )
+    trajectories = actors.get_and_reset_results().trajectories
+    assert len(trajectories) > 0
+    assert all(version == 1 for _, version in trajectories)
+    act_until_trajectory()
+    trajectories = actors.get_and_reset_results().trajectories
+    assert len(trajectories) > 0
+    assert all(version == 2 for _, version in trajectories)
+
+
+def test_worker_inference_reset_observations_stay_in_worker():
+    env = SimpleEnvironment(["1D"], action_sizes=(0, 1))
+    worker_env = WorkerEnvironment(
+        lambda worker_id, side_channels: env,
+        0,
+        RunOptions(env_settings=EnvironmentSettings(worker_inference=True)),
+    )
+    worker_env.handle(
+        EnvironmentRequest(EnvironmentCommand.POLICY, _actor_policy_update(env, 1))
+    )
+    response = worker_env.handle(EnvironmentRequest(EnvironmentCommand.RESET))
+    # The actor starts its trajectories from the reset, but the trainer only gets empty
+    # steps, so that its AgentProcessor doesn't keep agents that are never updated.
+    assert len(worker_env.actors.actors["1D"].processor._last_step_result) == 1
+    decision_steps, terminal_steps = response.payload["1D"]
+    assert len(decision_steps) == 0
+    assert len(terminal_steps) == 0
@@ -0,0 +1,107 @@
+import time
+from unittest import mock
+
+import attr
+import numpy as np
+import pytest
+
+from mlagents.torch_utils import torch
+from mlagents.trainers.agent_processor import AgentManager
+from mlagents.trainers.behavior_id_utils import get_global_agent_id
+from mlagents.trainers.policy.torch_policy import TorchPolicy
+from mlagents.trainers.settings import NetworkSettings
+from mlagents.trainers.simple_env_manager import SimpleEnvManager
+from mlagents.trainers.stats import StatsPropertyType, StatsReporter
+from mlagents.trainers.tests.check_env_trains import check_environment_trains
+from mlagents.trainers.tests.dummy_config import ppo_dummy_config, sac_dummy_config
+from mlagents.trainers.tests.simple_test_envs import SimpleEnvironment
+from mlagents.trainers.torch_entities.networks import SimpleActor
+from mlagents.trainers.trainer_process import RecordingStatsReporter
+from mlagents_envs.side_channel.stats_side_channel import StatsAggregationMethod
+
+BRAIN_NAME = "1D"
+
+
+def test_recording_stats_reporter():
+    stats_reporter = RecordingStatsReporter("category")
+    stats_reporter.add_property(StatsPropertyType.HYPERPARAMETERS, {})
+    stats_reporter.add_stat("key", 1.0, StatsAggregationMethod.SUM)
+    stats_reporter.set_stat("other", 2.0)
+    stats_reporter.write_stats(10)
+    assert stats_reporter.get_and_reset_calls() == [
+        ("add_property", (StatsPropertyType.HYPERPARAMETERS, {})),
+        ("add_stat", ("key", 1.0, StatsAggregationMethod.SUM)),
+        ("set_stat", ("other", 2.0)),
+        ("write_stats", (10,)),
+    ]
+    assert stats_reporter.get_and_reset_calls() == []
+    # Nothing is recorded for the category in this process.
+    assert "category" not in StatsReporter.stats_dict
+
+
+def test_published_policy_keeps_memories():
+    env = SimpleEnvironment([BRAIN_NAME], action_sizes=(0, 1))
+    network_settings = NetworkSettings(
+        memory=NetworkSettings.MemorySettings(memory_size=16, sequence_length=4)
+    )
+    actor_kwargs = {"conditional_sigma": False, "tanh_squash": False}
+    policy = TorchPolicy(
+        0, env.behavior_spec, network_settings, SimpleActor, actor_kwargs
+    )
+    env_manager = SimpleEnvManager(env, mock.Mock())
+    agent_manager = AgentManager(
+        policy, BRAIN_NAME, StatsReporter("test"), process_safe=True
+    )
+    env_manager.set_agent_manager(BRAIN_NAME, agent_manager)
+    env_manager.set_policy(BRAIN_NAME, policy)
+    env_manager.reset()
+    # Act until the agent of the next decision has memories.
+    memories = np.zeros(0)
+    while not np.any(memories != 0):
+        env_manager.process_steps(env_manager.get_steps())
+        decision_steps, _ = env_manager.previous_step.current_all_step_result[
+            BRAIN_NAME
+        ]
+        memories = policy.retrieve_memories(
+            [get_global_agent_id(0, decision_steps.agent_id[0])]
+        )
+
+    # The trainer process publishes a new copy of its policy, with other weights.
+    trained_policy = TorchPolicy(
+        1, env.behavior_spec, network_settings, SimpleActor, actor_kwargs
+    )
+    agent_manager.policy_queue.put(trained_policy)
+    while agent_manager.policy_queue.empty():
+        time.sleep(0.01)
+    retrieved_memories = []
+
+    def _retrieve_memories(agent_ids):
+        retrieved_memories.append(TorchPolicy.retrieve_memories(policy, agent_ids))
+        return retrieved_memories[-1]
+
+    with mock.patch.object(policy, "retrieve_memories", _retrieve_memories):
+        env_manager.process_steps(env_manager.get_steps())
+    # The policy acting for the agents got the new weights, and kept their memories.
+    assert env_manager.policies[BRAIN_NAME] is policy
+    assert agent_manager.policy is policy
+    for name, weights in trained_policy.get_weights().items():
+        assert torch.equal(policy.get_weights()[name], weights)
+    np.testing.assert_array_equal(retrieved_memories[0], memories)
+    for q in [agent_manager.trajectory_queue, agent_manager.policy_queue]:
+        q.close()
+
+
+@pytest.mark.parametrize(
+    "trainer_config,action_sizes",
+    [(ppo_dummy_config(), (0, 1)), (sac_dummy_config(), (1, 0))],
+    ids=["ppo", "sac"],
+)
+def test_learner_process_trains(trainer_config, action_sizes):
+    env = SimpleEnvironment([BRAIN_NAME], action_sizes=action_sizes)
+    check_environment_trains(
+        env, {BRAIN_NAME: attr.evolve(trainer_config, learner_process=True)}
+    )
+    # The stats of the trainer process are written by the main process.
+    assert all(
+        val > 0.7 for val in StatsReporter.writers[0].get_last_rewards().values()
+    )
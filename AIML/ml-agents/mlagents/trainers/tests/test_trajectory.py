@@ -3,7 +3,7 @@ import numpy as np
 from mlagents.trainers.tests.mock_brain import make_fake_trajectory
 from mlagents.trainers.tests.dummy_config import create_observation_specs_with_shapes
 from mlagents.trainers.trajectory import GroupObsUtil
-from mlagents_envs.base_env import ActionSpec
+from mlagents_envs.base_env import ActionSpec, ActionTuple
 from mlagents.trainers.buffer import AgentBuffer, BufferKey, ObservationKeyPrefix
 
 VEC_OBS_SIZE = 6
@@ -88,3 +88,43 @@ def test_obsutil_group_from_buffer():
                 assert np.isnan(_exp_obs).all()
             else:
                 assert not np.isnan(_exp_obs).any()
+
+
+def test_trajectory_to_columnar_agentbuffer():
+    length = 15
+    trajectory = make_fake_trajectory(
+        length=length,
+        observation_specs=create_observation_specs_with_shapes(
+            [(VEC_OBS_SIZE,), (8, 8, 3)]
+        ),
+        action_spec=ActionSpec(2, (3, 2)),
+        num_other_agents_in_group=2,
+    )
+    # Make every step different, so that the next obs and actions can be checked.
+    steps = [
+        exp._replace(
+            obs=[np.random.rand(*_obs.shape).astype(np.float32) for _obs in exp.obs],
+            action=ActionTuple(
+                continuous=np.random.rand(2).astype(np.float32),
+                discrete=np.random.randint(2, size=2),
+            ),
+            reward=float(i),
+        )
+        for i, exp in enumerate(trajectory.steps)
+    ]
+    trajectory = trajectory._replace(steps=steps)
+
+    agentbuffer = trajectory.to_agentbuffer()
+    columnar_buffer = trajectory.to_columnar_agentbuffer()
+    assert columnar_buffer.keys() == agentbuffer.keys()
+    for key, field in agentbuffer.items():
+        columnar_field = columnar_buffer[key]
+        assert len(columnar_field) == length
+        if field.contains_lists:
+            for entry, columnar_entry in zip(field, columnar_field):
+                assert len(entry) == len(columnar_entry)
+                for value, columnar_value in zip(entry, columnar_entry):
+                    assert np.array_equal(value, columnar_value)
+        else:
+            assert np.array_equal(np.array(field), np.asarray(columnar_field))
+        assert field.padding_value == columnar_field.padding_value
@@ -141,3 +141,34 @@ def test_categorical_dist_instance():
 
     for i in range(1, act_size):
         assert dist_instance.log_prob(torch.tensor([i])) < prob_first_action
+
+
+def test_gaussian_kl_divergence():
+    act_size = 2
+    dist_instance = GaussianDistInstance(
+        torch.zeros(1, act_size), torch.ones(1, act_size)
+    )
+    other_dist_instance = GaussianDistInstance(
+        torch.ones(1, act_size), 2 * torch.ones(1, act_size)
+    )
+    divergence = dist_instance.kl_divergence(dist_instance)
+    assert divergence.shape == (1, 1)
+    assert divergence.item() == pytest.approx(0.0, abs=1e-5)
+    # log(2) + (1 + 1) / 8 - 1 / 2 for each action
+    assert dist_instance.kl_divergence(other_dist_instance).item() == pytest.approx(
+        2 * 0.4431, abs=1e-3
+    )
+
+
+def test_categorical_kl_divergence():
+    dist_instance = CategoricalDistInstance(torch.zeros(1, 2))
+    other_dist_instance = CategoricalDistInstance(
+        torch.log(torch.tensor([[0.75, 0.25]]))
+    )
+    divergence = dist_instance.kl_divergence(dist_instance)
+    assert divergence.shape == (1, 1)
+    assert divergence.item() == pytest.approx(0.0, abs=1e-5)
+    # 0.5 * log(0.5 / 0.75) + 0.5 * log(0.5 / 0.25)
+    assert dist_instance.kl_divergence(other_dist_instance).item() == pytest.approx(
+        0.1438, abs=1e-3
+    )
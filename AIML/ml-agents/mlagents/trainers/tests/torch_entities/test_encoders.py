@@ -123,3 +123,20 @@ def test_visual_encoder_trains(vis_class, size):
         loss.backward()
         optimizer.step()
     assert loss.item() < 0.05
+
+
+@pytest.mark.parametrize(
+    "vis_class",
+    [
+        SimpleVisualEncoder,
+        ResNetVisualEncoder,
+        NatureVisualEncoder,
+        SmallVisualEncoder,
+        FullyConnectedVisualEncoder,
+    ],
+)
+def test_visual_encoder_uint8(vis_class):
+    image_size = (3, 36, 36)
+    enc = vis_class(image_size[1], image_size[2], image_size[0], 16)
+    pixels = torch.randint(0, 256, (2,) + image_size, dtype=torch.uint8)
+    assert torch.allclose(enc(pixels), enc(pixels.float() / 255.0))
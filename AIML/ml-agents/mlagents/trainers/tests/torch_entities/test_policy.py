@@ -1,5 +1,16 @@
+import copy
+import functools
+import warnings
+from unittest import mock
+
 import pytest
+import numpy as np
+
+from mlagents.torch_utils import torch
 
+from mlagents_envs.base_env import ActionTuple
+from mlagents.trainers.behavior_id_utils import get_global_agent_id
+from mlagents.trainers.policy.policy import UnityPolicyException
 from mlagents.trainers.policy.torch_policy import TorchPolicy
 from mlagents.trainers.tests import mock_brain as mb
 from mlagents.trainers.settings import NetworkSettings
@@ -58,6 +69,380 @@ def test_policy_evaluate(rnn, visual, discrete):
         assert run_out["action"].continuous.shape == (NUM_AGENTS, VECTOR_ACTION_SPACE)
 
 
+@pytest.mark.parametrize("discrete", [True, False], ids=["discrete", "continuous"])
+@pytest.mark.parametrize("rnn", [True, False], ids=["rnn", "no_rnn"])
+def test_policy_get_actions(rnn, discrete):
+    policy = create_policy_mock(NetworkSettings(), use_rnn=rnn, use_discrete=discrete)
+    num_agents = [3, 0, 5]
+    decision_requests = [
+        mb.create_steps_from_behavior_spec(policy.behavior_spec, num_agents=n)[0]
+        for n in num_agents
+    ]
+    for steps in decision_requests:
+        steps.obs[0][:] = np.random.rand(*steps.obs[0].shape)
+    # Masks are missing for some workers when they have no discrete actions.
+    if discrete:
+        decision_requests[2].action_mask = None
+    worker_ids = [0, 1, 2]
+
+    action_infos = policy.get_actions(decision_requests, worker_ids)
+
+    assert len(action_infos) == len(decision_requests)
+    for n, steps, action_info in zip(num_agents, decision_requests, action_infos):
+        assert action_info.agent_ids == list(steps.agent_id)
+        if n == 0:
+            assert action_info.outputs == {}
+            continue
+        if discrete:
+            assert action_info.action.discrete.shape == (n, len(DISCRETE_ACTION_SPACE))
+        else:
+            assert action_info.action.continuous.shape == (n, VECTOR_ACTION_SPACE)
+        assert action_info.env_action.continuous.shape[0] == n
+        assert action_info.outputs["log_probs"].continuous.shape[0] == n
+        assert action_info.outputs["entropy"].shape[0] == n
+    if rnn:
+        # Memories are keyed by the worker of each agent, as with get_action.
+        for steps, worker_id in zip(decision_requests, worker_ids):
+            global_agent_ids = [
+                get_global_agent_id(worker_id, int(agent_id))
+                for agent_id in steps.agent_id
+            ]
+            batched_memories = policy.retrieve_memories(global_agent_ids)
+            policy.remove_memories(global_agent_ids)
+            policy.get_action(steps, worker_id)
+            np.testing.assert_allclose(
+                batched_memories, policy.retrieve_memories(global_agent_ids), atol=1e-6
+            )
+
+
+@pytest.mark.parametrize("discrete", [True, False], ids=["discrete", "continuous"])
+@pytest.mark.parametrize("visual", [True, False], ids=["visual", "vector"])
+@pytest.mark.parametrize("rnn", [True, False], ids=["rnn", "no_rnn"])
+def test_policy_jit_inference(rnn, visual, discrete):
+    network_settings = NetworkSettings(normalize=True, deterministic=True)
+    policy = create_policy_mock(
+        network_settings, use_rnn=rnn, use_discrete=discrete, use_visual=visual
+    )
+    jit_policy = create_policy_mock(
+        NetworkSettings(normalize=True, deterministic=True, jit_inference=True),
+        use_rnn=rnn,
+        use_discrete=discrete,
+        use_visual=visual,
+    )
+    jit_policy.load_weights(policy.get_weights())
+
+    def check_same_outputs(num_agents):
+        decision_step, _ = mb.create_steps_from_behavior_spec(
+            policy.behavior_spec, num_agents=num_agents
+        )
+        for obs in decision_step.obs:
+            obs[:] = np.random.rand(*obs.shape)
+        agent_ids = list(decision_step.agent_id)
+        run_out = policy.evaluate(decision_step, agent_ids)
+        jit_run_out = jit_policy.evaluate(decision_step, agent_ids)
+        assert run_out.keys() == jit_run_out.keys()
+        for key in ["action", "env_action", "log_probs"]:
+            for field in ["continuous", "discrete"]:
+                expected = getattr(run_out[key], field)
+                value = getattr(jit_run_out[key], field)
+                assert value.shape == expected.shape
+                assert value.dtype == expected.dtype
+                np.testing.assert_allclose(value, expected, atol=1e-5)
+        np.testing.assert_allclose(
+            jit_run_out["entropy"], run_out["entropy"], atol=1e-5
+        )
+        if rnn:
+            np.testing.assert_allclose(
+                jit_run_out["memory_out"], run_out["memory_out"], atol=1e-5
+            )
+
+    # Batch sizes are padded to the next power of two.
+    for num_agents in [1, 3, 4, 5]:
+        check_same_outputs(num_agents)
+    assert sorted(jit_policy._acting_graphs.keys()) == [1, 4, 8]
+
+    # The normalizers replace their statistics when updated, and the traced graphs
+    # are refreshed with the new weights.
+    buffer = mb.simulate_rollout(8, policy.behavior_spec)
+    for trained_policy in [policy, jit_policy]:
+        trained_policy.actor.update_normalization(buffer)
+    jit_policy.load_weights(policy.get_weights())
+    check_same_outputs(5)
+
+    # The traced graphs are left out when the policy is copied.
+    copied_policy = copy.deepcopy(jit_policy)
+    assert copied_policy._acting_graphs == {}
+    check_same_outputs(2)
+
+
+@pytest.mark.parametrize("discrete", [True, False], ids=["discrete", "continuous"])
+@pytest.mark.parametrize("rnn", [True, False], ids=["rnn", "no_rnn"])
+def test_policy_jit_inference_padded_batch(rnn, discrete):
+    policy = create_policy_mock(
+        NetworkSettings(deterministic=True, jit_inference=True),
+        use_rnn=rnn,
+        use_discrete=discrete,
+    )
+    decision_step, _ = mb.create_steps_from_behavior_spec(
+        policy.behavior_spec, num_agents=5
+    )
+    for obs in decision_step.obs:
+        obs[:] = np.random.rand(*obs.shape)
+    agent_ids = list(decision_step.agent_id)
+    with mock.patch("mlagents.trainers.policy.torch_policy.logger") as mock_logger:
+        run_out = policy.evaluate(decision_step, agent_ids)
+    # The 5 agents are run through the graph traced for 8, which is checked against
+    # the actor without any warning from the tracer.
+    assert list(policy._acting_graphs.keys()) == [8]
+    mock_logger.warning.assert_not_called()
+
+    with torch.no_grad():
+        action, stats, memories = policy.actor.get_action_and_stats(
+            [torch.as_tensor(obs) for obs in decision_step.obs],
+            masks=policy._extract_masks(decision_step),
+            memories=torch.as_tensor(policy.retrieve_memories(agent_ids)).unsqueeze(0),
+        )
+    expected_action = action.to_action_tuple()
+    expected_log_probs = stats["log_probs"].to_log_probs_tuple()
+    for field in ["continuous", "discrete"]:
+        np.testing.assert_allclose(
+            getattr(run_out["action"], field),
+            getattr(expected_action, field),
+            atol=1e-5,
+        )
+        np.testing.assert_allclose(
+            getattr(run_out["log_probs"], field),
+            getattr(expected_log_probs, field),
+            atol=1e-5,
+        )
+    if rnn:
+        np.testing.assert_allclose(
+            run_out["memory_out"], memories.squeeze(0).numpy(), atol=1e-5
+        )
+
+
+def test_policy_jit_inference_logs_tracer_warnings():
+    policy = create_policy_mock(NetworkSettings(jit_inference=True))
+    decision_step, _ = mb.create_steps_from_behavior_spec(
+        policy.behavior_spec, num_agents=2
+    )
+    trace = torch.jit.trace
+
+    def warning_trace(*args, **kwargs):
+        for _ in range(2):
+            warnings.warn(
+                "Converting a tensor to a Python index", torch.jit.TracerWarning
+            )
+        return trace(*args, **kwargs)
+
+    with mock.patch.object(torch.jit, "trace", warning_trace), mock.patch(
+        "mlagents.trainers.policy.torch_policy.logger"
+    ) as mock_logger:
+        policy.evaluate(decision_step, list(decision_step.agent_id))
+    mock_logger.warning.assert_called_once_with(
+        "Tracing the acting graph: Converting a tensor to a Python index"
+    )
+
+
+@pytest.mark.parametrize("discrete", [True, False], ids=["discrete", "continuous"])
+@pytest.mark.parametrize("visual", [True, False], ids=["visual", "vector"])
+@pytest.mark.parametrize("rnn", [True, False], ids=["rnn", "no_rnn"])
+def test_policy_onnx_inference(rnn, visual, discrete):
+    pytest.importorskip("onnxruntime")
+    policy = create_policy_mock(
+        NetworkSettings(normalize=True, deterministic=True),
+        use_rnn=rnn,
+        use_discrete=discrete,
+        use_visual=visual,
+    )
+    onnx_policy = create_policy_mock(
+        NetworkSettings(normalize=True, deterministic=True, onnx_inference=True),
+        use_rnn=rnn,
+        use_discrete=discrete,
+        use_visual=visual,
+    )
+    onnx_policy.load_weights(policy.get_weights())
+
+    def check_same_outputs(num_agents):
+        decision_step, _ = mb.create_steps_from_behavior_spec(
+            policy.behavior_spec, num_agents=num_agents
+        )
+        for obs in decision_step.obs:
+            obs[:] = np.random.rand(*obs.shape)
+        agent_ids = list(decision_step.agent_id)
+        run_out = policy.evaluate(decision_step, agent_ids)
+        onnx_run_out = onnx_policy.evaluate(decision_step, agent_ids)
+        assert run_out.keys() == onnx_run_out.keys()
+        for key in ["action", "env_action", "log_probs"]:
+            for field in ["continuous", "discrete"]:
+                expected = getattr(run_out[key], field)
+                value = getattr(onnx_run_out[key], field)
+                assert value.shape == expected.shape
+                assert value.dtype == expected.dtype
+                np.testing.assert_allclose(value, expected, atol=1e-5)
+        np.testing.assert_allclose(
+            onnx_run_out["entropy"], run_out["entropy"], atol=1e-5
+        )
+        if rnn:
+            np.testing.assert_allclose(
+                onnx_run_out["memory_out"], run_out["memory_out"], atol=1e-5
+            )
+
+    for num_agents in [1, 3, 5]:
+        check_same_outputs(num_agents)
+
+    # New weights are exported in the background, for all the batch sizes already run.
+    buffer = mb.simulate_rollout(8, policy.behavior_spec)
+    policy.actor.update_normalization(buffer)
+    onnx_policy.load_weights(policy.get_weights())
+    onnx_policy._onnx_model.wait_for_refresh()
+    check_same_outputs(5)
+
+    copied_policy = copy.deepcopy(onnx_policy)
+    assert copied_policy._onnx_model._sessions == {}
+    assert copied_policy._onnx_model.acting_graph.actor is copied_policy.actor
+
+
+def test_policy_onnx_inference_warnings():
+    pytest.importorskip("onnxruntime")
+    policy = create_policy_mock(
+        NetworkSettings(onnx_inference=True), use_rnn=True, use_discrete=False
+    )
+    decision_step, _ = mb.create_steps_from_behavior_spec(
+        policy.behavior_spec, num_agents=3
+    )
+    export = torch.onnx.export
+
+    @functools.wraps(export)
+    def warning_export(*args, **kwargs):
+        warnings.warn("Unexpected export warning")
+        return export(*args, **kwargs)
+
+    # The expected warnings of the export are ignored, the others are not.
+    with warnings.catch_warnings(record=True) as caught_warnings, mock.patch.object(
+        torch.onnx, "export", warning_export
+    ):
+        warnings.simplefilter("always")
+        policy.evaluate(decision_step, list(decision_step.agent_id))
+    assert [str(caught.message) for caught in caught_warnings] == [
+        "Unexpected export warning"
+    ]
+
+
+def test_policy_onnx_inference_without_onnxruntime():
+    with mock.patch.dict("sys.modules", {"onnxruntime": None}):
+        with pytest.raises(UnityPolicyException, match=r"mlagents\[onnxruntime\]"):
+            create_policy_mock(NetworkSettings(onnx_inference=True))
+
+
+@pytest.mark.parametrize("discrete", [True, False], ids=["discrete", "continuous"])
+@pytest.mark.parametrize("rnn", [True, False], ids=["rnn", "no_rnn"])
+@pytest.mark.parametrize("jit", [True, False], ids=["jit", "eager"])
+def test_policy_quantized_inference(jit, rnn, discrete):
+    policy = create_policy_mock(
+        NetworkSettings(quantized_inference=True, jit_inference=jit),
+        use_rnn=rnn,
+        use_discrete=discrete,
+    )
+    decision_step, _ = mb.create_steps_from_behavior_spec(
+        policy.behavior_spec, num_agents=NUM_AGENTS
+    )
+    agent_ids = list(decision_step.agent_id)
+
+    # The divergence is measured on the first actions of each quantized actor.
+    run_out = policy.evaluate(decision_step, agent_ids)
+    divergence = run_out["quantization_divergence"]
+    assert divergence.shape == (NUM_AGENTS,)
+    assert np.all(divergence > -1e-5) and np.all(divergence < 0.1)
+    assert "quantization_divergence" not in policy.evaluate(decision_step, agent_ids)
+    assert policy.acting_actor is not policy.actor
+    assert any(
+        isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+        for module in policy.acting_actor.modules()
+    )
+    assert not any(
+        isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+        for module in policy.actor.modules()
+    )
+
+    # New weights are quantized again.
+    quantized_actor = policy.acting_actor
+    policy.load_weights(policy.get_weights())
+    assert "quantization_divergence" in policy.evaluate(decision_step, agent_ids)
+    assert policy.acting_actor is not quantized_actor
+
+    assert copy.deepcopy(policy)._quantized_actor is None
+
+
+def test_policy_quantized_inference_off_cpu():
+    policy = create_policy_mock(
+        NetworkSettings(quantized_inference=True), use_rnn=False, use_discrete=True
+    )
+    decision_step, _ = mb.create_steps_from_behavior_spec(
+        policy.behavior_spec, num_agents=NUM_AGENTS
+    )
+    # The policy acts with the unquantized actor when its device isn't the CPU.
+    with mock.patch(
+        "mlagents.trainers.policy.torch_policy.default_device",
+        return_value=torch.device("cuda"),
+    ):
+        run_out = policy.evaluate(decision_step, list(decision_step.agent_id))
+    assert "quantization_divergence" not in run_out
+    assert not policy.quantized_inference
+    assert policy.acting_actor is policy.actor
+
+
+def test_policy_memories_and_previous_actions():
+    policy = create_policy_mock(NetworkSettings(), use_rnn=True)
+    m_size = policy.m_size
+    num_agents = 2 * policy.memory_slots.capacity + 1
+    agent_ids = [get_global_agent_id(0, i) for i in range(num_agents)]
+    first = np.random.rand(num_agents, m_size).astype(np.float32)
+    second = np.random.rand(num_agents, m_size).astype(np.float32)
+
+    # Unknown agents get zeros, and the table grows to fit all the agents.
+    policy.save_memories(agent_ids, first)
+    assert policy.memory_slots.capacity >= num_agents
+    np.testing.assert_array_equal(policy.retrieve_memories(agent_ids), first)
+    np.testing.assert_array_equal(
+        policy.retrieve_previous_memories(agent_ids), np.zeros_like(first)
+    )
+    policy.save_memories(agent_ids, second)
+    np.testing.assert_array_equal(policy.retrieve_memories(agent_ids), second)
+    np.testing.assert_array_equal(policy.retrieve_previous_memories(agent_ids), first)
+
+    # Removed agents are forgotten and their rows reused by new agents.
+    capacity = policy.memory_slots.capacity
+    policy.remove_memories(agent_ids[:3])
+    new_ids = [get_global_agent_id(1, i) for i in range(3)]
+    mixed_ids = [agent_ids[0], new_ids[0], agent_ids[3]]
+    np.testing.assert_array_equal(
+        policy.retrieve_memories(mixed_ids),
+        np.stack([np.zeros(m_size), np.zeros(m_size), second[3]]),
+    )
+    policy.save_memories(new_ids, first[:3])
+    assert policy.memory_slots.capacity == capacity
+    assert len(policy.memory_slots) == num_agents
+    np.testing.assert_array_equal(policy.retrieve_memories(new_ids), first[:3])
+    np.testing.assert_array_equal(
+        policy.retrieve_previous_memories(new_ids), np.zeros_like(first[:3])
+    )
+
+    actions = np.random.randint(3, size=(num_agents, len(DISCRETE_ACTION_SPACE)))
+    policy.save_previous_action(agent_ids, ActionTuple(discrete=actions))
+    np.testing.assert_array_equal(policy.retrieve_previous_action(agent_ids), actions)
+    # A single agent saved with the actions of the whole step gets the first one.
+    policy.save_previous_action([agent_ids[1]], ActionTuple(discrete=actions))
+    np.testing.assert_array_equal(
+        policy.retrieve_previous_action(agent_ids[:2]), actions[[0, 0]]
+    )
+    policy.remove_previous_action(agent_ids[:1])
+    np.testing.assert_array_equal(
+        policy.retrieve_previous_action(agent_ids[:2]),
+        np.stack([np.zeros_like(actions[0]), actions[0]]),
+    )
+
+
 def test_step_overflow():
     policy = create_policy_mock(NetworkSettings())
     policy.set_step(2**31 - 1)
@@ -137,6 +137,46 @@ def test_simple_ppo(action_sizes):
     check_environment_trains(env, {BRAIN_NAME: config})
 
 
+@pytest.mark.parametrize(
+    "trainer_config,action_sizes",
+    [(PPO_TORCH_CONFIG, (0, 1)), (SAC_TORCH_CONFIG, (1, 0))],
+    ids=["ppo", "sac"],
+)
+def test_columnar_agent_processor(trainer_config, action_sizes):
+    env = SimpleEnvironment([BRAIN_NAME], action_sizes=action_sizes)
+    config = attr.evolve(trainer_config, columnar_agent_processor=True)
+    check_environment_trains(env, {BRAIN_NAME: config})
+
+
+@pytest.mark.parametrize(
+    "trainer_config,action_sizes",
+    [(PPO_TORCH_CONFIG, (0, 1)), (SAC_TORCH_CONFIG, (1, 0))],
+    ids=["ppo", "sac"],
+)
+def test_jit_inference(trainer_config, action_sizes):
+    env = SimpleEnvironment([BRAIN_NAME], action_sizes=action_sizes)
+    network_settings = attr.evolve(
+        trainer_config.network_settings, normalize=True, jit_inference=True
+    )
+    config = attr.evolve(trainer_config, network_settings=network_settings)
+    check_environment_trains(env, {BRAIN_NAME: config})
+
+
+@pytest.mark.parametrize(
+    "trainer_config,action_sizes",
+    [(PPO_TORCH_CONFIG, (0, 1)), (SAC_TORCH_CONFIG, (1, 0))],
+    ids=["ppo", "sac"],
+)
+def test_onnx_inference(trainer_config, action_sizes):
+    pytest.importorskip("onnxruntime")
+    env = SimpleEnvironment([BRAIN_NAME], action_sizes=action_sizes)
+    network_settings = attr.evolve(
+        trainer_config.network_settings, normalize=True, onnx_inference=True
+    )
+    config = attr.evolve(trainer_config, network_settings=network_settings)
+    check_environment_trains(env, {BRAIN_NAME: config})
+
+
 @pytest.mark.parametrize("action_sizes", [(0, 2), (2, 0)])
 def test_2d_ppo(action_sizes):
     env = SimpleEnvironment([BRAIN_NAME], action_sizes=action_sizes, step_size=0.8)
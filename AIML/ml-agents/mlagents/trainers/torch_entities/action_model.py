@@ -163,6 +163,34 @@ class ActionModel(nn.Module):
         entropy_sum = torch.sum(entropies, dim=1)
         return log_probs, entropy_sum
 
+    def kl_divergence(
+        self,
+        inputs: torch.Tensor,
+        masks: torch.Tensor,
+        other: "ActionModel",
+        other_inputs: torch.Tensor,
+    ) -> torch.Tensor:
+        """
+        Computes the KL divergence of the distributions of another action model, such as
+        a quantized copy of this one, from the distributions of this model.
+        :params inputs: The encoding from the network body
+        :params masks: Action masks for discrete actions
+        :params other: The other ActionModel, for the same ActionSpec
+        :params other_inputs: The encoding from the network body of the other model
+        :return: A torch tensor of the divergences summed across actions.
+        """
+        dists = self._get_dists(inputs, masks)
+        other_dists = other._get_dists(other_inputs, masks)
+        divergences: List[torch.Tensor] = []
+        if dists.continuous is not None:
+            divergences.append(dists.continuous.kl_divergence(other_dists.continuous))
+        if dists.discrete is not None:
+            for discrete_dist, other_discrete_dist in zip(
+                dists.discrete, other_dists.discrete  # type: ignore
+            ):
+                divergences.append(discrete_dist.kl_divergence(other_discrete_dist))
+        return torch.sum(torch.cat(divergences, dim=1), dim=1)
+
     def get_action_out(self, inputs: torch.Tensor, masks: torch.Tensor) -> torch.Tensor:
         """
         Gets the tensors corresponding to the output of the policy network to be used for
@@ -149,7 +149,7 @@ class BCModule:
             mini_batch_demo, len(self.policy.behavior_spec.observation_specs)
         )
         # Convert to tensors
-        tensor_obs = [ModelUtils.list_to_tensor(obs) for obs in np_obs]
+        tensor_obs = [ModelUtils.obs_to_tensor(obs) for obs in np_obs]
         act_masks = None
         expert_actions = AgentAction.from_buffer(mini_batch_demo)
         if self.policy.behavior_spec.action_spec.discrete_size > 0:
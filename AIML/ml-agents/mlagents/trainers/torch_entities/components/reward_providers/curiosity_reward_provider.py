@@ -116,7 +116,7 @@ class CuriosityNetwork(torch.nn.Module):
         n_obs = len(self._state_encoder.processors)
         np_obs = ObsUtil.from_buffer(mini_batch, n_obs)
         # Convert to tensors
-        tensor_obs = [ModelUtils.list_to_tensor(obs) for obs in np_obs]
+        tensor_obs = [ModelUtils.obs_to_tensor(obs) for obs in np_obs]
 
         hidden, _ = self._state_encoder.forward(tensor_obs)
         return hidden
@@ -128,7 +128,7 @@ class CuriosityNetwork(torch.nn.Module):
         n_obs = len(self._state_encoder.processors)
         np_obs = ObsUtil.from_buffer_next(mini_batch, n_obs)
         # Convert to tensors
-        tensor_obs = [ModelUtils.list_to_tensor(obs) for obs in np_obs]
+        tensor_obs = [ModelUtils.obs_to_tensor(obs) for obs in np_obs]
 
         hidden, _ = self._state_encoder.forward(tensor_obs)
         return hidden
@@ -13,6 +13,7 @@ from mlagents.trainers.torch_entities.utils import ModelUtils
 from mlagents.trainers.torch_entities.agent_action import AgentAction
 from mlagents.trainers.torch_entities.action_flattener import ActionFlattener
 from mlagents.trainers.torch_entities.networks import NetworkBody
+from mlagents.trainers.torch_entities.encoders import to_float_pixels
 from mlagents.trainers.torch_entities.layers import linear_layer, Initialization
 from mlagents.trainers.demo_loader import demo_to_buffer
 from mlagents.trainers.trajectory import ObsUtil
@@ -126,7 +127,7 @@ class DiscriminatorNetwork(torch.nn.Module):
         n_obs = len(self.encoder.processors)
         np_obs = ObsUtil.from_buffer(mini_batch, n_obs)
         # Convert to tensors
-        tensor_obs = [ModelUtils.list_to_tensor(obs) for obs in np_obs]
+        tensor_obs = [ModelUtils.obs_to_tensor(obs) for obs in np_obs]
         return tensor_obs
 
     def compute_estimate(
@@ -219,6 +220,9 @@ class DiscriminatorNetwork(torch.nn.Module):
         expert_inputs = self.get_state_inputs(expert_batch)
         interp_inputs = []
         for policy_input, expert_input in zip(policy_inputs, expert_inputs):
+            # Demonstrations are stored as floats, the policy's pixels might be uint8.
+            policy_input = to_float_pixels(policy_input)
+            expert_input = to_float_pixels(expert_input)
             obs_epsilon = torch.rand(policy_input.shape)
             interp_input = obs_epsilon * policy_input + (1 - obs_epsilon) * expert_input
             interp_input.requires_grad = True  # For gradient calculation
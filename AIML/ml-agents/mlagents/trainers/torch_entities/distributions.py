@@ -39,6 +39,14 @@ class DistInstance(nn.Module, abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def kl_divergence(self, other: "DistInstance") -> torch.Tensor:
+        """
+        Returns the KL divergence of another distribution of the same type from this one.
+        :param other: The other distribution.
+        """
+        pass
+
     @abc.abstractmethod
     def exported_model_output(self) -> torch.Tensor:
         """
@@ -89,6 +97,19 @@ class GaussianDistInstance(DistInstance):
             keepdim=True,
         )  # Use equivalent behavior to TF
 
+    def kl_divergence(self, other: "GaussianDistInstance") -> torch.Tensor:  # type: ignore
+        """
+        Returns the KL divergence of another distribution from this one, summed across
+        the action dimensions. Squashing both distributions doesn't change it.
+        """
+        var_ratio = (self.std / (other.std + EPSILON)) ** 2
+        mean_term = ((self.mean - other.mean) / (other.std + EPSILON)) ** 2
+        return torch.sum(
+            0.5 * (var_ratio + mean_term - 1 - torch.log(var_ratio + EPSILON)),
+            dim=1,
+            keepdim=True,
+        )
+
     def exported_model_output(self):
         return self.sample()
 
@@ -129,7 +150,7 @@ class CategoricalDistInstance(DiscreteDistInstance):
     def pdf(self, value):
         # This function is equivalent to torch.diag(self.probs.T[value.flatten().long()]),
         # but torch.diag is not supported by ONNX export.
-        idx = torch.arange(start=0, end=len(value)).unsqueeze(-1)
+        idx = torch.arange(start=0, end=value.shape[0]).unsqueeze(-1)
         return torch.gather(
             self.probs.permute(1, 0)[value.flatten().long()], -1, idx
         ).squeeze(-1)
@@ -145,6 +166,16 @@ class CategoricalDistInstance(DiscreteDistInstance):
             self.probs * torch.log(self.probs + EPSILON), dim=-1
         ).unsqueeze(-1)
 
+    def kl_divergence(self, other: "CategoricalDistInstance") -> torch.Tensor:  # type: ignore
+        """
+        Returns the KL divergence of another distribution from this one.
+        """
+        return torch.sum(
+            self.probs * (self.all_log_prob() - other.all_log_prob()),
+            dim=-1,
+            keepdim=True,
+        )
+
     def exported_model_output(self):
         return self.sample()
 
@@ -76,6 +76,16 @@ def conv_output_shape(
     return h, w
 
 
+def to_float_pixels(visual_obs: torch.Tensor) -> torch.Tensor:
+    """
+    Converts visual observations kept as uint8 pixels in [0, 255] to floats in [0, 1].
+    Float observations are returned as they are.
+    """
+    if visual_obs.dtype == torch.uint8:
+        return visual_obs.float() / 255.0
+    return visual_obs
+
+
 def pool_out_shape(h_w: Tuple[int, int], kernel_size: int) -> Tuple[int, int]:
     """
     Calculates the output shape (height and width) of the output of a max pooling layer.
@@ -127,7 +137,7 @@ class FullyConnectedVisualEncoder(nn.Module):
         )
 
     def forward(self, visual_obs: torch.Tensor) -> torch.Tensor:
-        hidden = visual_obs.reshape(-1, self.input_size)
+        hidden = to_float_pixels(visual_obs).reshape(-1, self.input_size)
         return self.dense(hidden)
 
 
@@ -163,7 +173,7 @@ class SmallVisualEncoder(nn.Module):
         )
 
     def forward(self, visual_obs: torch.Tensor) -> torch.Tensor:
-        hidden = self.conv_layers(visual_obs)
+        hidden = self.conv_layers(to_float_pixels(visual_obs))
         hidden = hidden.reshape(-1, self.final_flat)
         return self.dense(hidden)
 
@@ -195,7 +205,7 @@ class SimpleVisualEncoder(nn.Module):
         )
 
     def forward(self, visual_obs: torch.Tensor) -> torch.Tensor:
-        hidden = self.conv_layers(visual_obs)
+        hidden = self.conv_layers(to_float_pixels(visual_obs))
         hidden = hidden.reshape(-1, self.final_flat)
         return self.dense(hidden)
 
@@ -230,7 +240,7 @@ class NatureVisualEncoder(nn.Module):
         )
 
     def forward(self, visual_obs: torch.Tensor) -> torch.Tensor:
-        hidden = self.conv_layers(visual_obs)
+        hidden = self.conv_layers(to_float_pixels(visual_obs))
         hidden = hidden.reshape([-1, self.final_flat])
         return self.dense(hidden)
 
@@ -281,6 +291,6 @@ class ResNetVisualEncoder(nn.Module):
         self.sequential = nn.Sequential(*layers)
 
     def forward(self, visual_obs: torch.Tensor) -> torch.Tensor:
-        hidden = self.sequential(visual_obs)
+        hidden = self.sequential(to_float_pixels(visual_obs))
         before_out = hidden.reshape(-1, self.final_flat_size)
         return torch.relu(self.dense(before_out))
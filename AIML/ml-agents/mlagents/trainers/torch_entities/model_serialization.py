@@ -1,4 +1,6 @@
-from typing import Tuple
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Tuple
+import inspect
 import threading
 from mlagents.torch_utils import torch
 
@@ -41,6 +43,27 @@ class exporting_to_onnx:
         return exporting_to_onnx._local_data._is_exporting
 
 
+@contextmanager
+def onnx_export_lock() -> Iterator[None]:
+    """
+    Holds the lock of exporting_to_onnx without setting is_exporting(), for exports that
+    keep the layout the models have in the trainer.
+    """
+    with exporting_to_onnx._lock:
+        yield
+
+
+def onnx_export_kwargs() -> Dict[str, Any]:
+    """
+    Keyword arguments of torch.onnx.export selecting the TorchScript-based exporter, which
+    newer versions of torch no longer use by default. The models rely on tracing, for
+    instance to check exporting_to_onnx.is_exporting().
+    """
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        return {"dynamo": False}
+    return {}
+
+
 class TensorNames:
     batch_size_placeholder = "batch_size"
     sequence_length_placeholder = "sequence_length"
@@ -169,5 +192,6 @@ class ModelSerializer:
                 input_names=self.input_names,
                 output_names=self.output_names,
                 dynamic_axes=self.dynamic_axes,
+                **onnx_export_kwargs(),
             )
         logger.info(f"Exported {onnx_output_path}")
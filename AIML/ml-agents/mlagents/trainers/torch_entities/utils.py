@@ -235,6 +235,17 @@ class ModelUtils:
         """
         return torch.as_tensor(np.asanyarray(ndarray_list), dtype=dtype)
 
+    @staticmethod
+    def obs_to_tensor(ndarray_list: List[np.ndarray]) -> torch.Tensor:
+        """
+        Converts a list of observations into a tensor, like list_to_tensor. Visual
+        observations kept as uint8 pixels stay uint8, the visual encoders convert them.
+        """
+        array = np.asanyarray(ndarray_list)
+        if array.dtype == np.uint8:
+            return torch.as_tensor(array)
+        return torch.as_tensor(array, dtype=torch.float32)
+
     @staticmethod
     def list_to_tensor_list(
         ndarray_list: List[np.ndarray], dtype: Optional[torch.dtype] = torch.float32
@@ -11,12 +11,20 @@ from mlagents.trainers.policy.checkpoint_manager import ModelCheckpoint
 
 from mlagents_envs.logging_util import get_logger
 from mlagents_envs.timers import timed
-from mlagents.trainers.buffer import RewardSignalUtil
+from mlagents.trainers.buffer import (
+    AgentBuffer,
+    ColumnarAgentBuffer,
+    RewardSignalUtil,
+)
 from mlagents.trainers.policy import Policy
 from mlagents.trainers.optimizer.torch_optimizer import TorchOptimizer
 from mlagents.trainers.trainer.rl_trainer import RLTrainer
 from mlagents.trainers.behavior_id_utils import BehaviorIdentifiers
-from mlagents.trainers.settings import TrainerSettings, OffPolicyHyperparamSettings
+from mlagents.trainers.settings import (
+    TrainerSettings,
+    OffPolicyHyperparamSettings,
+    BufferType,
+)
 
 logger = get_logger(__name__)
 
@@ -78,6 +86,20 @@ class OffPolicyTrainer(RLTrainer):
 
         self.checkpoint_replay_buffer = self.hyperparameters.save_replay_buffer
 
+    def create_update_buffer(self) -> AgentBuffer:
+        """
+        Creates the replay buffer. A columnar replay buffer is a ring buffer holding the last
+        buffer_size experiences, so old experiences are overwritten rather than truncated.
+        """
+        if self.trainer_settings.buffer_type == BufferType.COLUMNAR:
+            buffer_size = self.trainer_settings.hyperparameters.buffer_size
+            memory = self.trainer_settings.network_settings.memory
+            sequence_length = memory.sequence_length if memory is not None else 1
+            return ColumnarAgentBuffer(
+                max_length=buffer_size - buffer_size % sequence_length
+            )
+        return super().create_update_buffer()
+
     def _checkpoint(self) -> ModelCheckpoint:
         """
         Writes a checkpoint model to memory
@@ -15,7 +15,7 @@ from mlagents_envs.logging_util import get_logger
 from mlagents_envs.timers import timed
 from mlagents.trainers.optimizer import Optimizer
 from mlagents.trainers.optimizer.torch_optimizer import TorchOptimizer
-from mlagents.trainers.buffer import AgentBuffer, BufferKey
+from mlagents.trainers.buffer import AgentBuffer, BufferKey, ColumnarAgentBuffer
 from mlagents.trainers.trainer import Trainer
 from mlagents.trainers.torch_entities.components.reward_providers.base_reward_provider import (
     BaseRewardProvider,
@@ -24,7 +24,7 @@ from mlagents_envs.timers import hierarchical_timer
 from mlagents.trainers.model_saver.torch_model_saver import TorchModelSaver
 from mlagents.trainers.agent_processor import AgentManagerQueue
 from mlagents.trainers.trajectory import Trajectory
-from mlagents.trainers.settings import TrainerSettings
+from mlagents.trainers.settings import TrainerSettings, BufferType
 from mlagents.trainers.stats import StatsPropertyType
 from mlagents.trainers.model_saver.model_saver import BaseModelSaver
 
@@ -46,7 +46,7 @@ class RLTrainer(Trainer):
         self.collected_rewards: Dict[str, Dict[str, int]] = {
             "environment": defaultdict(lambda: 0)
         }
-        self.update_buffer: AgentBuffer = AgentBuffer()
+        self.update_buffer: AgentBuffer = self.create_update_buffer()
         self._stats_reporter.add_property(
             StatsPropertyType.HYPERPARAMETERS, self.trainer_settings.as_dict()
         )
@@ -93,6 +93,15 @@ class RLTrainer(Trainer):
                     )
                 rewards[agent_id] = 0
 
+    def create_update_buffer(self) -> AgentBuffer:
+        """
+        Creates the buffer that experiences are accumulated in between updates, using the
+        storage selected by buffer_type in the trainer settings.
+        """
+        if self.trainer_settings.buffer_type == BufferType.COLUMNAR:
+            return ColumnarAgentBuffer()
+        return AgentBuffer()
+
     def _clear_update_buffer(self) -> None:
         """
         Clear the buffers that have been built up during inference.
@@ -235,6 +244,15 @@ class RLTrainer(Trainer):
         if step_after_process >= self._next_summary_step and self.get_step != 0:
             self._write_summary(self._next_summary_step)
 
+    def _trajectory_to_agentbuffer(self, trajectory: Trajectory) -> AgentBuffer:
+        """
+        Converts a Trajectory to an AgentBuffer that uses the storage selected by buffer_type
+        in the trainer settings.
+        """
+        if self.trainer_settings.buffer_type == BufferType.COLUMNAR:
+            return trajectory.to_columnar_agentbuffer()
+        return trajectory.to_agentbuffer()
+
     def _append_to_update_buffer(self, agentbuffer_trajectory: AgentBuffer) -> None:
         """
         Append an AgentBuffer to the update buffer. If the trainer isn't training,
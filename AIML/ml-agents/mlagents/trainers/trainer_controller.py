@@ -11,6 +11,7 @@ import numpy as np
 
 from mlagents_envs.logging_util import get_logger
 from mlagents.trainers.env_manager import EnvManager, EnvironmentStep
+from mlagents.trainers.exception import TrainerConfigError
 from mlagents_envs.exception import (
     UnityEnvironmentException,
     UnityCommunicationException,
@@ -26,7 +27,8 @@ from mlagents.trainers.trainer import Trainer
 from mlagents.trainers.environment_parameter_manager import EnvironmentParameterManager
 from mlagents.trainers.trainer import TrainerFactory
 from mlagents.trainers.behavior_id_utils import BehaviorIdentifiers
-from mlagents.trainers.agent_processor import AgentManager
+from mlagents.trainers.agent_processor import AgentManager, ColumnarAgentManager
+from mlagents.trainers.trainer_process import TrainerProcess
 from mlagents import torch_utils
 from mlagents.torch_utils.globals import get_rank
 
@@ -63,6 +65,7 @@ class TrainerController:
         self.registered_behavior_ids: Set[str] = set()
 
         self.trainer_threads: List[threading.Thread] = []
+        self.trainer_processes: Dict[str, TrainerProcess] = {}
         self.kill_trainers = False
         np.random.seed(training_seed)
         torch_utils.torch.manual_seed(training_seed)
@@ -77,7 +80,10 @@ class TrainerController:
             return
 
         for brain_name in self.trainers.keys():
-            self.trainers[brain_name].save_model()
+            if brain_name in self.trainer_processes:
+                self.trainer_processes[brain_name].save_model()
+            else:
+                self.trainers[brain_name].save_model()
         self.logger.debug("Saved Model")
 
     @staticmethod
@@ -119,12 +125,21 @@ class TrainerController:
         parsed_behavior_id = BehaviorIdentifiers.from_name_behavior_id(name_behavior_id)
         brain_name = parsed_behavior_id.brain_name
         trainerthread = None
+        start_process = False
         if brain_name in self.trainers:
             trainer = self.trainers[brain_name]
+            if brain_name in self.trainer_processes:
+                raise TrainerConfigError(
+                    f"The trainer for {brain_name} runs in its own process and can't train "
+                    f"the additional behavior {name_behavior_id}. Disable learner_process "
+                    "for this behavior."
+                )
         else:
             trainer = self.trainer_factory.generate(brain_name)
             self.trainers[brain_name] = trainer
-            if trainer.threaded:
+            if trainer.parameters.learner_process:
+                start_process = True
+            elif trainer.threaded:
                 # Only create trainer thread for new trainers
                 trainerthread = threading.Thread(
                     target=self.trainer_update_func, args=(trainer,), daemon=True
@@ -140,17 +155,31 @@ class TrainerController:
         )
         trainer.add_policy(parsed_behavior_id, policy)
 
-        agent_manager = AgentManager(
+        agent_manager_type = (
+            ColumnarAgentManager
+            if trainer.parameters.columnar_agent_processor
+            else AgentManager
+        )
+        agent_manager = agent_manager_type(
             policy,
             name_behavior_id,
             trainer.stats_reporter,
             trainer.parameters.time_horizon,
-            threaded=trainer.threaded,
+            # A bounded trajectory queue keeps the environments from running ahead of a
+            # trainer in another thread or process.
+            threaded=trainer.threaded or start_process,
+            process_safe=start_process,
         )
         env_manager.set_agent_manager(name_behavior_id, agent_manager)
         env_manager.set_policy(name_behavior_id, policy)
         self.brain_name_to_identifier[brain_name].add(name_behavior_id)
 
+        if start_process:
+            # The queues are handed to the copy of the trainer in the new process.
+            self.trainer_processes[brain_name] = TrainerProcess(
+                trainer, [agent_manager.trajectory_queue], [agent_manager.policy_queue]
+            )
+            return
         trainer.publish_policy_queue(agent_manager.policy_queue)
         trainer.subscribe_trajectory_queue(agent_manager.trajectory_queue)
 
@@ -198,12 +227,17 @@ class TrainerController:
         finally:
             if self.train_model:
                 self._save_models()
+            for trainer_process in self.trainer_processes.values():
+                trainer_process.close()
 
     def end_trainer_episodes(self) -> None:
         # Reward buffers reset takes place only for curriculum learning
         # else no reset.
-        for trainer in self.trainers.values():
-            trainer.end_episode()
+        for brain_name, trainer in self.trainers.items():
+            if brain_name in self.trainer_processes:
+                self.trainer_processes[brain_name].end_episode()
+            else:
+                trainer.end_episode()
 
     def reset_env_if_ready(self, env: EnvManager) -> None:
         # Get the sizes of the reward buffers.
@@ -216,8 +250,11 @@ class TrainerController:
             curr_step, max_step, reward_buff
         )
         if updated:
-            for trainer in self.trainers.values():
-                trainer.reward_buffer.clear()
+            for brain_name, trainer in self.trainers.items():
+                if brain_name in self.trainer_processes:
+                    self.trainer_processes[brain_name].clear_reward_buffer()
+                else:
+                    trainer.reward_buffer.clear()
         # If ghost trainer swapped teams
         ghost_controller_reset = self.ghost_controller.should_reset()
         if param_must_reset or ghost_controller_reset:
@@ -234,6 +271,9 @@ class TrainerController:
             self._register_new_behaviors(env_manager, new_step_infos)
             num_steps = env_manager.process_steps(new_step_infos)
 
+        for trainer_process in self.trainer_processes.values():
+            trainer_process.update()
+
         # Report current lesson for each environment parameter
         for (
             param_name,
@@ -244,8 +284,8 @@ class TrainerController:
                     f"Environment/Lesson Number/{param_name}", lesson_number
                 )
 
-        for trainer in self.trainers.values():
-            if not trainer.threaded:
+        for brain_name, trainer in self.trainers.items():
+            if not trainer.threaded and brain_name not in self.trainer_processes:
                 with hierarchical_timer("trainer_advance"):
                     trainer.advance()
 
@@ -291,6 +331,19 @@ class TrainerController:
                     )
                     merge_gauges(thread_timer_stack.gauges)
 
+        for trainer_process in self.trainer_processes.values():
+            trainer_process.stop()
+        with hierarchical_timer("trainer_processes") as main_timer_node:
+            for trainer_process in self.trainer_processes.values():
+                if trainer_process.timer_root is not None:
+                    main_timer_node.merge(
+                        trainer_process.timer_root,
+                        root_name="process_root",
+                        is_parallel=True,
+                    )
+                if trainer_process.gauges is not None:
+                    merge_gauges(trainer_process.gauges)
+
     def trainer_update_func(self, trainer: Trainer) -> None:
         while not self.kill_trainers:
             with hierarchical_timer("trainer_advance"):
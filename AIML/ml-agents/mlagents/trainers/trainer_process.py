@@ -0,0 +1,291 @@
+import enum
+import signal
+import threading
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import cloudpickle
+
+from mlagents_envs import logging_util
+from mlagents_envs.logging_util import get_logger
+from mlagents_envs.side_channel.stats_side_channel import StatsAggregationMethod
+from mlagents_envs.timers import (
+    GaugeNode,
+    TimerNode,
+    get_timer_stack_for_thread,
+    hierarchical_timer,
+)
+from mlagents.trainers.agent_processor import AgentManagerQueue
+from mlagents.trainers.exception import TrainerError
+from mlagents.trainers.policy import Policy
+from mlagents.trainers.stats import StatsPropertyType, StatsReporter
+from mlagents.trainers.trainer import Trainer
+from mlagents.trainers.trajectory import Trajectory
+from mlagents.trainers.training_status import GlobalTrainingStatus
+
+logger = get_logger(__name__)
+
+# How long an idle trainer process waits for a command before checking its trajectory
+# queues again.
+IDLE_POLL_S = 0.001
+
+
+class TrainerProcessCommand(enum.Enum):
+    STATUS = 1
+    END_EPISODE = 2
+    CLEAR_REWARD_BUFFER = 3
+    STOP = 4
+    SAVE_MODEL = 5
+    CLOSE = 6
+
+
+class TrainerProcessMessage(NamedTuple):
+    cmd: TrainerProcessCommand
+    payload: Any = None
+
+
+class TrainerStatus(NamedTuple):
+    """
+    State of a Trainer sent from its process. The copy of the Trainer in the main process
+    is updated from it.
+    :param reward_buffer_generation: Number of CLEAR_REWARD_BUFFER commands processed
+        before reward_buffer was read.
+    :param stats_calls: Calls made to the Trainer's StatsReporter since the last status.
+    :param training_status: The Trainer's part of the GlobalTrainingStatus.
+    """
+
+    step: int
+    reward_buffer: List[float]
+    reward_buffer_generation: int
+    stats_calls: List[Tuple[str, Tuple]]
+    training_status: Dict[str, Any]
+    timer_root: Optional[TimerNode] = None
+    gauges: Optional[Dict[str, GaugeNode]] = None
+
+
+class RecordingStatsReporter(StatsReporter):
+    """
+    StatsReporter of a Trainer running in its own process. The calls made to it are replayed
+    on the StatsReporter of the main process, where they are merged with the stats of the
+    AgentManagers and written by the StatsWriters.
+    """
+
+    def __init__(self, category: str):
+        super().__init__(category)
+        self.calls: List[Tuple[str, Tuple]] = []
+
+    def add_property(self, property_type: StatsPropertyType, value: Any) -> None:
+        self.calls.append(("add_property", (property_type, value)))
+
+    def add_stat(
+        self,
+        key: str,
+        value: float,
+        aggregation: StatsAggregationMethod = StatsAggregationMethod.AVERAGE,
+    ) -> None:
+        self.calls.append(("add_stat", (key, value, aggregation)))
+
+    def set_stat(self, key: str, value: float) -> None:
+        self.calls.append(("set_stat", (key, value)))
+
+    def write_stats(self, step: int) -> None:
+        self.calls.append(("write_stats", (step,)))
+
+    def get_and_reset_calls(self) -> List[Tuple[str, Tuple]]:
+        calls = self.calls
+        self.calls = []
+        return calls
+
+
+def trainer_process_worker(
+    conn: Connection,
+    pickled_trainer: bytes,
+    trajectory_queues: List[AgentManagerQueue[Trajectory]],
+    policy_queues: List[AgentManagerQueue[Policy]],
+    training_status: Dict[str, Any],
+    log_level: int,
+) -> None:
+    # The main process handles interrupts and stops this process once the models are saved.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging_util.set_log_level(log_level)
+    trainer: Trainer = cloudpickle.loads(pickled_trainer)
+    stats_reporter = RecordingStatsReporter(trainer.brain_name)
+    trainer._stats_reporter = stats_reporter
+    GlobalTrainingStatus.saved_state[trainer.brain_name] = training_status
+    for trajectory_queue in trajectory_queues:
+        trainer.subscribe_trajectory_queue(trajectory_queue)
+    for policy_queue in policy_queues:
+        trainer.publish_policy_queue(policy_queue)
+    reward_buffer_generation = 0
+    advancing = True
+    last_step = trainer.get_step
+
+    def _get_status(with_timers: bool = False) -> TrainerStatus:
+        timer_stack = get_timer_stack_for_thread(threading.current_thread())
+        return TrainerStatus(
+            trainer.get_step,
+            list(trainer.reward_buffer),
+            reward_buffer_generation,
+            stats_reporter.get_and_reset_calls(),
+            GlobalTrainingStatus.saved_state[trainer.brain_name],
+            timer_stack.root if with_timers and timer_stack else None,
+            timer_stack.gauges if with_timers and timer_stack else None,
+        )
+
+    try:
+        while True:
+            idle = not advancing or all(q.empty() for q in trainer.trajectory_queues)
+            if conn.poll(IDLE_POLL_S if idle else 0):
+                req: TrainerProcessMessage = conn.recv()
+                if req.cmd == TrainerProcessCommand.END_EPISODE:
+                    trainer.end_episode()
+                elif req.cmd == TrainerProcessCommand.CLEAR_REWARD_BUFFER:
+                    trainer.reward_buffer.clear()
+                    reward_buffer_generation = req.payload
+                elif req.cmd == TrainerProcessCommand.STOP:
+                    advancing = False
+                    conn.send(TrainerProcessMessage(req.cmd, _get_status(True)))
+                elif req.cmd == TrainerProcessCommand.SAVE_MODEL:
+                    trainer.save_model()
+                    conn.send(TrainerProcessMessage(req.cmd, _get_status()))
+                elif req.cmd == TrainerProcessCommand.CLOSE:
+                    break
+            elif advancing:
+                with hierarchical_timer("trainer_advance"):
+                    trainer.advance()
+                if stats_reporter.calls or trainer.get_step != last_step:
+                    last_step = trainer.get_step
+                    conn.send(
+                        TrainerProcessMessage(
+                            TrainerProcessCommand.STATUS, _get_status()
+                        )
+                    )
+    except (EOFError, BrokenPipeError):
+        logger.debug(f"Trainer process for {trainer.brain_name} lost its connection.")
+    finally:
+        for q in trainer.trajectory_queues + trainer.policy_queues:
+            q.close()
+
+
+class TrainerProcess:
+    """
+    Runs a Trainer in its own process, so that its updates don't hold the GIL of the
+    process stepping the environments. The Trainer object in the main process is kept in
+    sync with the step count, reward buffer and stats of the one that trains, and the
+    commands that change the state of the trainer are forwarded to the process.
+    """
+
+    def __init__(
+        self,
+        trainer: Trainer,
+        trajectory_queues: List[AgentManagerQueue[Trajectory]],
+        policy_queues: List[AgentManagerQueue[Policy]],
+    ):
+        """
+        :param trainer: Trainer to run, with its policies already added.
+        :param trajectory_queues: Process-safe queues the Trainer ingests Trajectories from.
+        :param policy_queues: Process-safe queues the Trainer publishes its Policies to.
+        """
+        self.trainer = trainer
+        self.timer_root: Optional[TimerNode] = None
+        self.gauges: Optional[Dict[str, GaugeNode]] = None
+        self._queues = trajectory_queues + policy_queues
+        self._reward_buffer_generation = 0
+        self._conn, child_conn = Pipe()
+        # Need to use cloudpickle for the trainer since it holds lambdas, which aren't picklable
+        # when the process is spawned.
+        self._process = Process(
+            target=trainer_process_worker,
+            args=(
+                child_conn,
+                cloudpickle.dumps(trainer),
+                trajectory_queues,
+                policy_queues,
+                dict(GlobalTrainingStatus.saved_state[trainer.brain_name]),
+                logger.level,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+        child_conn.close()
+
+    def update(self) -> None:
+        """
+        Applies the statuses the trainer process sent since the last call.
+        """
+        try:
+            while self._conn.poll():
+                self._handle(self._conn.recv())
+        except (EOFError, BrokenPipeError):
+            raise TrainerError(
+                f"The trainer process for {self.trainer.brain_name} exited unexpectedly."
+            )
+
+    def end_episode(self) -> None:
+        self._send(TrainerProcessCommand.END_EPISODE)
+
+    def clear_reward_buffer(self) -> None:
+        """
+        Clears the reward buffer, ignoring the rewards of statuses sent before the trainer
+        process cleared its own.
+        """
+        self.trainer.reward_buffer.clear()
+        self._reward_buffer_generation += 1
+        self._send(
+            TrainerProcessCommand.CLEAR_REWARD_BUFFER, self._reward_buffer_generation
+        )
+
+    def stop(self) -> None:
+        """
+        Stops the training and retrieves the timers of the trainer process. The process
+        keeps running to save the models.
+        """
+        status = self._request(TrainerProcessCommand.STOP)
+        if status is not None:
+            self.timer_root = status.timer_root
+            self.gauges = status.gauges
+
+    def save_model(self) -> None:
+        self._request(TrainerProcessCommand.SAVE_MODEL)
+
+    def close(self, timeout_seconds: float = 10.0) -> None:
+        self._send(TrainerProcessCommand.CLOSE)
+        self._process.join(timeout_seconds)
+        if self._process.is_alive():
+            self._process.terminate()
+        for q in self._queues:
+            q.close()
+        self._conn.close()
+
+    def _send(self, cmd: TrainerProcessCommand, payload: Any = None) -> None:
+        try:
+            self._conn.send(TrainerProcessMessage(cmd, payload))
+        except (BrokenPipeError, OSError):
+            logger.debug(f"Trainer process for {self.trainer.brain_name} is closed.")
+
+    def _request(self, cmd: TrainerProcessCommand) -> Optional[TrainerStatus]:
+        self._send(cmd)
+        try:
+            while True:
+                message: TrainerProcessMessage = self._conn.recv()
+                self._handle(message)
+                if message.cmd == cmd:
+                    return message.payload
+        except (EOFError, BrokenPipeError, OSError):
+            logger.warning(
+                f"Trainer process for {self.trainer.brain_name} exited before {cmd.name}."
+            )
+            return None
+
+    def _handle(self, message: TrainerProcessMessage) -> None:
+        status: TrainerStatus = message.payload
+        self.trainer._step = status.step
+        if status.reward_buffer_generation == self._reward_buffer_generation:
+            self.trainer.reward_buffer.clear()
+            self.trainer.reward_buffer.extend(status.reward_buffer)
+        for method, args in status.stats_calls:
+            getattr(self.trainer.stats_reporter, method)(*args)
+        GlobalTrainingStatus.saved_state[self.trainer.brain_name] = dict(
+            status.training_status
+        )
@@ -1,8 +1,11 @@
-from typing import List, NamedTuple
+from typing import Any, List, NamedTuple, Optional, Sequence
 import numpy as np
 
 from mlagents.trainers.buffer import (
     AgentBuffer,
+    AgentBufferField,
+    ColumnarAgentBuffer,
+    ColumnarAgentBufferField,
     ObservationKeyPrefix,
     AgentBufferKey,
     BufferKey,
@@ -100,6 +103,20 @@ class GroupObsUtil:
     ) -> List[List[np.ndarray]]:
         return list(map(list, zip(*list_list)))
 
+    @staticmethod
+    def _padded_group_obs(field: AgentBufferField) -> List[np.array]:
+        """
+        Pads the group observations of a field with NaNs for the missing agents. Since
+        they are converted to floats, visual observations kept as uint8 pixels are
+        scaled to [0, 1] here.
+        """
+        padded = field.padded_to_batch(pad_value=np.nan)
+        first_obs = next((entry[0] for entry in field if len(entry) > 0), None)
+        if first_obs is not None and first_obs.dtype == np.uint8:
+            for obs in padded:
+                obs /= np.float32(255.0)
+        return padded
+
     @staticmethod
     def from_buffer(batch: AgentBuffer, num_obs: int) -> List[np.array]:
         """
@@ -108,7 +125,7 @@ class GroupObsUtil:
         separated_obs: List[np.array] = []
         for i in range(num_obs):
             separated_obs.append(
-                batch[GroupObsUtil.get_name_at(i)].padded_to_batch(pad_value=np.nan)
+                GroupObsUtil._padded_group_obs(batch[GroupObsUtil.get_name_at(i)])
             )
         # separated_obs contains a List(num_obs) of Lists(num_agents), we want to flip
         # that and get a List(num_agents) of Lists(num_obs)
@@ -123,9 +140,7 @@ class GroupObsUtil:
         separated_obs: List[np.array] = []
         for i in range(num_obs):
             separated_obs.append(
-                batch[GroupObsUtil.get_name_at_next(i)].padded_to_batch(
-                    pad_value=np.nan
-                )
+                GroupObsUtil._padded_group_obs(batch[GroupObsUtil.get_name_at_next(i)])
             )
         # separated_obs contains a List(num_obs) of Lists(num_agents), we want to flip
         # that and get a List(num_agents) of Lists(num_obs)
@@ -290,6 +305,121 @@ class Trajectory(NamedTuple):
             obs = next_obs
         return agent_buffer_trajectory
 
+    def to_columnar_agentbuffer(self) -> ColumnarAgentBuffer:
+        """
+        Converts a Trajectory to a ColumnarAgentBuffer. This contains the same fields as
+        to_agentbuffer, but each field is built across the whole trajectory at once.
+        The observations and next observations are views on the same array.
+        :returns: ColumnarAgentBuffer of the same length as the trajectory.
+        """
+        agent_buffer_trajectory = ColumnarAgentBuffer()
+        steps = self.steps
+        num_steps = len(steps)
+
+        def _set_array(key: AgentBufferKey, data: np.ndarray) -> None:
+            agent_buffer_trajectory[key] = ColumnarAgentBufferField.from_array(data)
+
+        def _set_lists(key: AgentBufferKey, data: List[List[Any]]) -> None:
+            agent_buffer_trajectory[key] = ColumnarAgentBufferField(data)
+
+        for i in range(len(steps[0].obs)):
+            all_obs = np.stack([exp.obs[i] for exp in steps] + [self.next_obs[i]])
+            _set_array(ObsUtil.get_name_at(i), all_obs[:-1])
+            _set_array(ObsUtil.get_name_at_next(i), all_obs[1:])
+
+            group_obs = [
+                [status.obs[i] for status in exp.group_status] for exp in steps
+            ]
+            next_group_obs = group_obs[1:] + [[_obs[i] for _obs in self.next_group_obs]]
+            _set_lists(GroupObsUtil.get_name_at(i), group_obs)
+            _set_lists(GroupObsUtil.get_name_at_next(i), next_group_obs)
+
+        # Take care of teammate actions and rewards. The next teammate actions of the last
+        # step are its current teammate actions.
+        group_cont_actions = [
+            [status.action.continuous for status in exp.group_status] for exp in steps
+        ]
+        group_disc_actions = [
+            [status.action.discrete for status in exp.group_status] for exp in steps
+        ]
+        _set_lists(BufferKey.GROUP_CONTINUOUS_ACTION, group_cont_actions)
+        _set_lists(BufferKey.GROUP_DISCRETE_ACTION, group_disc_actions)
+        _set_lists(
+            BufferKey.GROUP_NEXT_CONT_ACTION,
+            group_cont_actions[1:] + group_cont_actions[-1:],
+        )
+        _set_lists(
+            BufferKey.GROUP_NEXT_DISC_ACTION,
+            group_disc_actions[1:] + group_disc_actions[-1:],
+        )
+        _set_lists(
+            BufferKey.GROUPMATE_REWARDS,
+            [[status.reward for status in exp.group_status] for exp in steps],
+        )
+        _set_lists(
+            BufferKey.GROUP_DONES,
+            [[status.done for status in exp.group_status] for exp in steps],
+        )
+        _set_array(
+            BufferKey.GROUP_REWARD,
+            np.array([exp.group_reward for exp in steps], dtype=np.float32),
+        )
+
+        if steps[0].memory is not None:
+            _set_array(BufferKey.MEMORY, np.stack([exp.memory for exp in steps]))
+
+        _set_array(BufferKey.MASKS, np.ones(num_steps, dtype=np.float32))
+        _set_array(BufferKey.DONE, np.array([exp.done for exp in steps]))
+
+        # Adds the log prob and action of continuous/discrete separately. The next actions
+        # of the last step are zeros.
+        cont_actions = np.stack([exp.action.continuous for exp in steps])
+        disc_actions = np.stack([exp.action.discrete for exp in steps])
+        _set_array(BufferKey.CONTINUOUS_ACTION, cont_actions)
+        _set_array(BufferKey.DISCRETE_ACTION, disc_actions)
+        _set_array(
+            BufferKey.NEXT_CONT_ACTION,
+            np.concatenate([cont_actions[1:], np.zeros_like(cont_actions[-1:])]),
+        )
+        _set_array(
+            BufferKey.NEXT_DISC_ACTION,
+            np.concatenate([disc_actions[1:], np.zeros_like(disc_actions[-1:])]),
+        )
+        _set_array(
+            BufferKey.CONTINUOUS_LOG_PROBS,
+            np.stack([exp.action_probs.continuous for exp in steps]),
+        )
+        _set_array(
+            BufferKey.DISCRETE_LOG_PROBS,
+            np.stack([exp.action_probs.discrete for exp in steps]),
+        )
+
+        # Store action masks. Note that 1 means active, while in AgentExperience
+        # False means active.
+        if all(exp.action_mask is not None for exp in steps):
+            action_masks = 1 - np.stack(
+                [np.concatenate(exp.action_mask) for exp in steps]
+            )
+        else:
+            # This should never be needed unless the environment somehow doesn't supply the
+            # action mask in a discrete space.
+            action_masks = np.stack(
+                [
+                    1 - np.concatenate(exp.action_mask)
+                    if exp.action_mask is not None
+                    else np.ones(exp.action.discrete.shape, dtype=np.float32)
+                    for exp in steps
+                ]
+            )
+        _set_array(BufferKey.ACTION_MASK, action_masks)
+        agent_buffer_trajectory[BufferKey.ACTION_MASK].padding_value = 1
+        _set_array(BufferKey.PREV_ACTION, np.stack([exp.prev_action for exp in steps]))
+        _set_array(
+            BufferKey.ENVIRONMENT_REWARDS,
+            np.array([exp.reward for exp in steps], dtype=np.float32),
+        )
+        return agent_buffer_trajectory
+
     @property
     def done_reached(self) -> bool:
         """
@@ -311,3 +441,170 @@ class Trajectory(NamedTuple):
         Returns true if trajectory was terminated because max steps was reached.
         """
         return self.steps[-1].interrupted
+
+
+class ColumnarTrajectory(NamedTuple):
+    """
+    Trajectory of an agent without groupmates, assembled by the ColumnarAgentProcessor.
+    Each field is an array with a row per step instead of a list of AgentExperiences, and
+    the trainers use it like a Trajectory. The AgentExperiences of its steps are only
+    created when they are accessed.
+    """
+
+    obs: List[np.ndarray]
+    next_obs: List[np.ndarray]
+    rewards: np.ndarray
+    group_rewards: np.ndarray
+    dones: np.ndarray
+    interrupted_steps: np.ndarray
+    continuous_actions: np.ndarray
+    discrete_actions: np.ndarray
+    continuous_log_probs: np.ndarray
+    discrete_log_probs: np.ndarray
+    # One array per discrete action branch, True where the action is masked.
+    action_masks: Optional[List[np.ndarray]]
+    prev_actions: np.ndarray
+    memories: Optional[np.ndarray]
+    agent_id: str
+    behavior_id: str
+
+    @property
+    def steps(self) -> "ColumnarTrajectorySteps":
+        return ColumnarTrajectorySteps(self)
+
+    @property
+    def next_group_obs(self) -> List[List[np.ndarray]]:
+        return []
+
+    def to_agentbuffer(self) -> AgentBuffer:
+        """
+        Converts the ColumnarTrajectory to an AgentBuffer, like Trajectory.to_agentbuffer.
+        """
+        return Trajectory(
+            list(self.steps), self.next_obs, [], self.agent_id, self.behavior_id
+        ).to_agentbuffer()
+
+    def to_columnar_agentbuffer(self) -> ColumnarAgentBuffer:
+        """
+        Converts the ColumnarTrajectory to a ColumnarAgentBuffer, like
+        Trajectory.to_columnar_agentbuffer, directly from its arrays.
+        """
+        agent_buffer_trajectory = ColumnarAgentBuffer()
+        num_steps = len(self.rewards)
+
+        def _set_array(key: AgentBufferKey, data: np.ndarray) -> None:
+            agent_buffer_trajectory[key] = ColumnarAgentBufferField.from_array(data)
+
+        def _set_empty_lists(key: AgentBufferKey) -> None:
+            agent_buffer_trajectory[key] = ColumnarAgentBufferField(
+                [[] for _ in range(num_steps)]
+            )
+
+        for i, obs in enumerate(self.obs):
+            all_obs = np.concatenate([obs, self.next_obs[i][np.newaxis]])
+            _set_array(ObsUtil.get_name_at(i), all_obs[:-1])
+            _set_array(ObsUtil.get_name_at_next(i), all_obs[1:])
+            _set_empty_lists(GroupObsUtil.get_name_at(i))
+            _set_empty_lists(GroupObsUtil.get_name_at_next(i))
+
+        for key in (
+            BufferKey.GROUP_CONTINUOUS_ACTION,
+            BufferKey.GROUP_DISCRETE_ACTION,
+            BufferKey.GROUP_NEXT_CONT_ACTION,
+            BufferKey.GROUP_NEXT_DISC_ACTION,
+            BufferKey.GROUPMATE_REWARDS,
+            BufferKey.GROUP_DONES,
+        ):
+            _set_empty_lists(key)
+        _set_array(BufferKey.GROUP_REWARD, self.group_rewards.astype(np.float32))
+
+        if self.memories is not None:
+            _set_array(BufferKey.MEMORY, self.memories)
+
+        _set_array(BufferKey.MASKS, np.ones(num_steps, dtype=np.float32))
+        _set_array(BufferKey.DONE, self.dones)
+
+        cont_actions = self.continuous_actions
+        disc_actions = self.discrete_actions
+        _set_array(BufferKey.CONTINUOUS_ACTION, cont_actions)
+        _set_array(BufferKey.DISCRETE_ACTION, disc_actions)
+        _set_array(
+            BufferKey.NEXT_CONT_ACTION,
+            np.concatenate([cont_actions[1:], np.zeros_like(cont_actions[-1:])]),
+        )
+        _set_array(
+            BufferKey.NEXT_DISC_ACTION,
+            np.concatenate([disc_actions[1:], np.zeros_like(disc_actions[-1:])]),
+        )
+        _set_array(BufferKey.CONTINUOUS_LOG_PROBS, self.continuous_log_probs)
+        _set_array(BufferKey.DISCRETE_LOG_PROBS, self.discrete_log_probs)
+
+        # Note that 1 means active in the buffer, while the masks are True when masked.
+        if self.action_masks is not None:
+            action_masks = 1 - np.concatenate(self.action_masks, axis=1)
+        else:
+            action_masks = np.ones(disc_actions.shape, dtype=np.float32)
+        _set_array(BufferKey.ACTION_MASK, action_masks)
+        agent_buffer_trajectory[BufferKey.ACTION_MASK].padding_value = 1
+        _set_array(BufferKey.PREV_ACTION, self.prev_actions)
+        _set_array(BufferKey.ENVIRONMENT_REWARDS, self.rewards.astype(np.float32))
+        return agent_buffer_trajectory
+
+    @property
+    def done_reached(self) -> bool:
+        """
+        Returns true if trajectory is terminated with a Done.
+        """
+        return bool(self.dones[-1])
+
+    @property
+    def all_group_dones_reached(self) -> bool:
+        """
+        Returns true, the agent has no groupmates.
+        """
+        return True
+
+    @property
+    def interrupted(self) -> bool:
+        """
+        Returns true if trajectory was terminated because max steps was reached.
+        """
+        return bool(self.interrupted_steps[-1])
+
+
+class ColumnarTrajectorySteps(Sequence):
+    """
+    The steps of a ColumnarTrajectory, as AgentExperiences created on access.
+    """
+
+    def __init__(self, trajectory: ColumnarTrajectory):
+        self._trajectory = trajectory
+
+    def __len__(self) -> int:
+        return len(self._trajectory.rewards)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        traj = self._trajectory
+        return AgentExperience(
+            obs=[obs[index] for obs in traj.obs],
+            reward=traj.rewards[index],
+            done=bool(traj.dones[index]),
+            action=ActionTuple(
+                continuous=traj.continuous_actions[index],
+                discrete=traj.discrete_actions[index],
+            ),
+            action_probs=LogProbsTuple(
+                continuous=traj.continuous_log_probs[index],
+                discrete=traj.discrete_log_probs[index],
+            ),
+            action_mask=[mask[index] for mask in traj.action_masks]
+            if traj.action_masks is not None
+            else None,
+            prev_action=traj.prev_actions[index],
+            interrupted=bool(traj.interrupted_steps[index]),
+            memory=traj.memories[index] if traj.memories is not None else None,
+            group_status=[],
+            group_reward=traj.group_rewards[index],
+        )
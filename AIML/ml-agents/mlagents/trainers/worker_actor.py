@@ -0,0 +1,166 @@
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from mlagents_envs.base_env import BehaviorName
+from mlagents_envs.side_channel.stats_side_channel import (
+    EnvironmentStats,
+    StatsAggregationMethod,
+)
+from mlagents.trainers.action_info import ActionInfo
+from mlagents.trainers.agent_processor import AgentManagerQueue, AgentProcessor
+from mlagents.trainers.env_manager import AllStepResult
+from mlagents.trainers.policy import Policy
+from mlagents.trainers.stats import StatsReporter
+from mlagents.trainers.trajectory import Trajectory
+
+
+class ActorPolicyUpdate(NamedTuple):
+    """
+    Sent to the environment workers when a trainer publishes a policy. The first update of
+    a behavior carries a CPU copy of the whole policy, later ones only its weights.
+    """
+
+    behavior_name: BehaviorName
+    version: int
+    max_trajectory_length: int
+    policy: Optional[Policy] = None
+    weights: Optional[Dict[str, Any]] = None
+
+
+class ActorStepResult(NamedTuple):
+    """
+    Returned by an environment worker along with its step, in place of the observations.
+    :param trajectories: Completed trajectories, with the version of the policy that
+        generated them.
+    :param stats: Stats of the worker's AgentProcessors, per behavior.
+    """
+
+    trajectories: List[Tuple[Trajectory, int]]
+    stats: Dict[BehaviorName, EnvironmentStats]
+
+
+class CollectingStatsReporter(StatsReporter):
+    """
+    StatsReporter that keeps the stats it is given, so that a worker can send them back to
+    be recorded in the trainer process.
+    """
+
+    def __init__(self, category: str):
+        super().__init__(category)
+        self.stats: EnvironmentStats = defaultdict(list)
+
+    def add_stat(
+        self,
+        key: str,
+        value: float,
+        aggregation: StatsAggregationMethod = StatsAggregationMethod.AVERAGE,
+    ) -> None:
+        self.stats[key].append((value, aggregation))
+
+    def set_stat(self, key: str, value: float) -> None:
+        self.stats[key].append((value, StatsAggregationMethod.MOST_RECENT))
+
+    def get_and_reset_stats(self) -> EnvironmentStats:
+        stats = self.stats
+        self.stats = defaultdict(list)
+        return stats
+
+
+class ActorAgentProcessor(AgentProcessor):
+    """
+    AgentProcessor of a WorkerActor. Each trajectory is put on its queue along with the
+    version of the policy at the time the trajectory is completed.
+    """
+
+    def __init__(self, update: ActorPolicyUpdate, stats_reporter: StatsReporter):
+        super().__init__(
+            update.policy,
+            update.behavior_name,
+            stats_reporter,
+            update.max_trajectory_length,
+        )
+        self.policy_version = update.version
+        self.versioned_trajectory_queue: AgentManagerQueue[
+            Tuple[Trajectory, int]
+        ] = AgentManagerQueue(update.behavior_name)
+
+    def publish_trajectory(self, trajectory: Trajectory) -> None:
+        self.versioned_trajectory_queue.put((trajectory, self.policy_version))
+
+
+class WorkerActor:
+    """
+    Policy and AgentProcessor of a single behavior inside an environment worker.
+    """
+
+    def __init__(self, update: ActorPolicyUpdate):
+        self.policy = update.policy
+        self.stats_reporter = CollectingStatsReporter(update.behavior_name)
+        self.processor = ActorAgentProcessor(update, self.stats_reporter)
+
+
+class WorkerActors:
+    """
+    Runs inference and assembles trajectories for every behavior that a trainer has
+    published a policy for, inside an environment worker process.
+    """
+
+    def __init__(self, worker_id: int):
+        self.worker_id = worker_id
+        self.actors: Dict[BehaviorName, WorkerActor] = {}
+
+    def update_policy(
+        self, update: ActorPolicyUpdate, last_step_result: Optional[AllStepResult]
+    ) -> None:
+        """
+        Creates or updates the actor of a behavior.
+        :param update: Policy or weights sent by the trainer process.
+        :param last_step_result: The step the environment is waiting for actions on. A new
+            actor starts its trajectories from it.
+        """
+        actor = self.actors.get(update.behavior_name)
+        if actor is None:
+            actor = self.actors[update.behavior_name] = WorkerActor(update)
+            if last_step_result and update.behavior_name in last_step_result:
+                decision_steps, terminal_steps = last_step_result[update.behavior_name]
+                actor.processor.add_experiences(
+                    decision_steps, terminal_steps, self.worker_id, ActionInfo.empty()
+                )
+        else:
+            actor.policy.load_weights(update.weights)
+            actor.processor.policy_version = update.version
+
+    def get_actions(self, all_step_result: AllStepResult) -> Dict[str, ActionInfo]:
+        all_action_info: Dict[str, ActionInfo] = {}
+        for behavior_name, (decision_steps, _) in all_step_result.items():
+            if behavior_name in self.actors:
+                all_action_info[behavior_name] = self.actors[
+                    behavior_name
+                ].policy.get_action(decision_steps, self.worker_id)
+        return all_action_info
+
+    def add_experiences(
+        self, all_step_result: AllStepResult, all_action_info: Dict[str, ActionInfo]
+    ) -> None:
+        for behavior_name, (decision_steps, terminal_steps) in all_step_result.items():
+            if behavior_name in self.actors:
+                self.actors[behavior_name].processor.add_experiences(
+                    decision_steps,
+                    terminal_steps,
+                    self.worker_id,
+                    all_action_info.get(behavior_name, ActionInfo.empty()),
+                )
+
+    def end_episode(self) -> None:
+        for actor in self.actors.values():
+            actor.processor.end_episode()
+
+    def get_and_reset_results(self) -> ActorStepResult:
+        trajectories: List[Tuple[Trajectory, int]] = []
+        stats: Dict[BehaviorName, EnvironmentStats] = {}
+        for behavior_name, actor in self.actors.items():
+            trajectory_queue = actor.processor.versioned_trajectory_queue
+            while not trajectory_queue.empty():
+                trajectories.append(trajectory_queue.get_nowait())
+            stats[behavior_name] = actor.stats_reporter.get_and_reset_stats()
+        return ActorStepResult(trajectories, stats)
@@ -74,6 +74,10 @@ setup(
         'pypiwin32==223;platform_system=="Windows"',
         "onnx==1.15.0",
     ],
+    extras_require={
+        # Used by the onnx_inference network setting.
+        "onnxruntime": ["onnxruntime>=1.16"]
+    },
     python_requires=">=3.10.1,<=3.10.12",
     entry_points={
         "console_scripts": [